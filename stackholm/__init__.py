@@ -1,4 +1,11 @@
-from typing import Tuple
+from importlib import import_module
+from typing import (
+    Any,
+    Dict,
+    List,
+    TYPE_CHECKING,
+    Tuple,
+)
 
 from stackholm.__version__ import (
     VERSION,
@@ -8,44 +15,95 @@ from stackholm.context import Context
 from stackholm.exceptions import (
     ContextIsNotActive,
     NoContextIsActive,
+    WireFormatError,
 )
 from stackholm.state import State
 from stackholm.storage import Storage
-from stackholm.storages import (
-    ContextVarStorage,
-    OptimizedListState,
-    OptimizedListStorage,
-    ThreadLocal,
-    ThreadLocalStorage,
-)
 
 
 from stackholm.storages._discovery import IS_ASGIREF_INSTALLED  # noqa
 
 
+if TYPE_CHECKING:
+    from stackholm.aggregate import AggregateKey
+    from stackholm.auto import auto_storage
+    from stackholm.caching import scoped_cache
+    from stackholm.snapshot import get_exception_context
+    from stackholm.storages import (
+        ASGIRefLocal,
+        ASGIRefLocalStorage,
+        CompactArrayState,
+        ContextVarStorage,
+        OptimizedListState,
+        OptimizedListStorage,
+        ReferenceState,
+        ThreadLocal,
+        ThreadLocalStorage,
+    )
+    from stackholm.template import ContextTemplate
+    from stackholm.transaction import TransactionalContext
+
+
 __all__: Tuple[str, ...] = (
     '__version__',
     'VERSION',
+    'AggregateKey',
+    'auto_storage',
+    'scoped_cache',
+    'get_exception_context',
     'Context',
+    'ContextTemplate',
+    'TransactionalContext',
     'NoContextIsActive',
     'ContextIsNotActive',
+    'WireFormatError',
     'State',
     'Storage',
+    'CompactArrayState',
     'ContextVarStorage',
     'OptimizedListState',
     'OptimizedListStorage',
+    'ReferenceState',
     'ThreadLocal',
     'ThreadLocalStorage',
 )
 
 
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    'AggregateKey': 'stackholm.aggregate',
+    'auto_storage': 'stackholm.auto',
+    'scoped_cache': 'stackholm.caching',
+    'get_exception_context': 'stackholm.snapshot',
+    'ContextTemplate': 'stackholm.template',
+    'TransactionalContext': 'stackholm.transaction',
+    'CompactArrayState': 'stackholm.storages',
+    'ContextVarStorage': 'stackholm.storages',
+    'OptimizedListState': 'stackholm.storages',
+    'OptimizedListStorage': 'stackholm.storages',
+    'ReferenceState': 'stackholm.storages',
+    'ThreadLocal': 'stackholm.storages',
+    'ThreadLocalStorage': 'stackholm.storages',
+}
+
+
 if IS_ASGIREF_INSTALLED:
-    from stackholm.storages import (
-        ASGIRefLocal,
-        ASGIRefLocalStorage,
-    )
+    _LAZY_ATTRIBUTES['ASGIRefLocal'] = 'stackholm.storages'
+    _LAZY_ATTRIBUTES['ASGIRefLocalStorage'] = 'stackholm.storages'
 
     __all__ += (
         'ASGIRefLocal',
         'ASGIRefLocalStorage',
     )
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals().keys()) | set(__all__))
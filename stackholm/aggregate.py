@@ -0,0 +1,152 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
+
+from stackholm.context import Context
+from stackholm.exceptions import NoContextIsActive
+
+
+__all__ = (
+    'AGGREGATE_KEY_PREFIX',
+    'AggregateKey',
+    'merge_aggregate_checkpoints',
+)
+
+
+AGGREGATE_KEY_PREFIX = 'stackholm.aggregate:'
+
+VALUE_T = TypeVar('VALUE_T')
+
+T = TypeVar('T')
+
+_MISSING: Any = object()
+
+AggregateEntry = Tuple[Any, Any, Callable[[Any, Any], Any]]
+
+
+class AggregateKey(Generic[VALUE_T]):
+
+    key: str
+
+    reducer: Callable[[VALUE_T, VALUE_T], VALUE_T]
+
+    aggregate_key: str
+
+    def __init__(
+        self,
+        key: str,
+        reducer: Callable[[VALUE_T, VALUE_T], VALUE_T],
+    ) -> None:
+        self.key = key
+        self.reducer = reducer
+        self.aggregate_key = AGGREGATE_KEY_PREFIX + key
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.key!r}, {self.reducer!r})'
+
+    def _get_enclosing_aggregate(
+        self,
+        context_class: Type[Context],
+        current: Context,
+    ) -> VALUE_T:
+        entry: Optional[AggregateEntry] = current._checkpoint_data.get(self.aggregate_key)
+        if entry is not None:
+            return entry[0]
+        context = context_class.get_nearest_checkpoint(self.aggregate_key)
+        if context is None:
+            return _MISSING
+        return context._checkpoint_data[self.aggregate_key][1]
+
+    def set(
+        self,
+        context_class: Type[Context],
+        value: VALUE_T,
+    ) -> None:
+        current = context_class.get_current()
+        if current is None:
+            raise NoContextIsActive()
+        base = self._get_enclosing_aggregate(context_class, current)
+        aggregate = value if base is _MISSING else self.reducer(base, value)
+        context_class.set_checkpoint_value(self.key, value)
+        context_class.set_checkpoint_value(self.aggregate_key, (base, aggregate, self.reducer))
+
+    @overload
+    def get(
+        self,
+        context_class: Type[Context],
+    ) -> Union[VALUE_T, None]:
+        ...
+
+    @overload
+    def get(
+        self,
+        context_class: Type[Context],
+        default: T,
+    ) -> Union[VALUE_T, T]:
+        ...
+
+    def get(
+        self,
+        context_class,
+        default=None,
+    ):
+        entry = context_class.get_checkpoint_value(self.aggregate_key)
+        if entry is None:
+            return default
+        return entry[1]
+
+    @overload
+    def pop(
+        self,
+        context_class: Type[Context],
+    ) -> Union[VALUE_T, None]:
+        ...
+
+    @overload
+    def pop(
+        self,
+        context_class: Type[Context],
+        default: T,
+    ) -> Union[VALUE_T, T]:
+        ...
+
+    def pop(
+        self,
+        context_class,
+        default=None,
+    ):
+        context_class.pop_checkpoint_value(self.aggregate_key)
+        return context_class.pop_checkpoint_value(self.key, default)
+
+
+def merge_aggregate_checkpoints(
+    target_data: Dict[str, Any],
+    checkpoint_data: Dict[str, Any],
+) -> None:
+    merged_entries: List[Tuple[str, AggregateEntry]] = []
+    prefix_length = len(AGGREGATE_KEY_PREFIX)
+    for key in checkpoint_data.keys():
+        if not key.startswith(AGGREGATE_KEY_PREFIX):
+            continue
+        target_entry: Optional[AggregateEntry] = target_data.get(key)
+        if target_entry is None:
+            continue
+        value = checkpoint_data.get(key[prefix_length:], _MISSING)
+        if value is _MISSING:
+            continue
+        reducer = checkpoint_data[key][2]
+        base = target_entry[0]
+        aggregate = value if base is _MISSING else reducer(base, value)
+        merged_entries.append((key, (base, aggregate, reducer)))
+    for key, entry in merged_entries:
+        checkpoint_data[key] = entry
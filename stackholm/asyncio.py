@@ -0,0 +1,175 @@
+import asyncio
+from concurrent.futures import Executor
+import contextvars
+import functools
+import sys
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from stackholm.state import State
+from stackholm.storage import Storage
+
+
+__all__ = (
+    'fork_context',
+    'bind',
+    'create_task_factory',
+    'install_task_factory',
+    'call_soon',
+    'call_later',
+    'run_in_executor',
+)
+
+
+T = TypeVar('T')
+
+TaskFactory = Callable[..., 'asyncio.Future[Any]']
+
+
+def _set_states(states: Sequence[Tuple[Storage, State]]) -> None:
+    for storage, state in states:
+        storage.set_state(state)
+
+
+def _fork_states(storages: Iterable[Storage]) -> List[Tuple[Storage, State]]:
+    return [(storage, storage.fork_state()) for storage in storages]
+
+
+def fork_context(storages: Iterable[Storage]) -> contextvars.Context:
+    context = contextvars.copy_context()
+    context.run(_set_states, _fork_states(storages))
+    return context
+
+
+def _deactivate_task_contexts(
+    states: Sequence[Tuple[Storage, State]],
+    future: 'asyncio.Future[Any]',
+) -> None:
+    for storage, state in reversed(states):
+        contexts = state.get_contexts()
+        if contexts and isinstance(contexts[-1], storage.get_task_context_class()):
+            contexts[-1].deactivate()
+
+
+def _call_with_states(
+    states: Sequence[Tuple[Storage, State]],
+    function: Callable[..., T],
+    args: Tuple[Any, ...],
+    kwargs: Any,
+) -> T:
+    previous_states: List[Tuple[Storage, State]] = [(storage, storage.get_state()) for storage, _ in states]
+    _set_states(states)
+    try:
+        return function(*args, **kwargs)
+    finally:
+        _set_states(previous_states)
+
+
+def bind(
+    storages: Iterable[Storage],
+    function: Callable[..., T],
+) -> Callable[..., T]:
+    context = contextvars.copy_context()
+    states = [(storage, storage.fork_state()) for storage in storages]
+
+    @functools.wraps(function)
+    def run(
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        return context.run(_call_with_states, states, function, args, kwargs)
+
+    return run
+
+
+def create_task_factory(
+    storages: Iterable[Storage],
+    task_factory: Optional[TaskFactory] = None,
+) -> TaskFactory:
+    storages = tuple(storages)
+
+    def factory(
+        loop: asyncio.AbstractEventLoop,
+        coro: Coroutine[Any, Any, Any],
+        **kwargs: Any,
+    ) -> 'asyncio.Future[Any]':
+        parent_context = kwargs.pop('context', None)
+        if parent_context is None:
+            context = contextvars.copy_context()
+            states = _fork_states(storages)
+        else:
+            context = parent_context.copy()
+            states = context.run(_fork_states, storages)
+        context.run(_set_states, states)
+        task: 'asyncio.Future[Any]'
+        if sys.version_info >= (3, 11):
+            if task_factory is None:
+                task = asyncio.Task(coro, loop=loop, context=context, **kwargs)
+            else:
+                task = task_factory(loop, coro, context=context, **kwargs)
+        elif task_factory is None:
+            task = context.run(asyncio.Task, coro, loop=loop, **kwargs)
+        else:
+            task = context.run(task_factory, loop, coro, **kwargs)
+        if isinstance(task, asyncio.Task):
+            for storage, state in states:
+                storage.set_state_owner(state, task)
+        task.add_done_callback(functools.partial(_deactivate_task_contexts, states), context=context)
+        return task
+
+    return factory
+
+
+def install_task_factory(
+    storages: Iterable[Storage],
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> TaskFactory:
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    factory = create_task_factory(storages, loop.get_task_factory())
+    loop.set_task_factory(factory)
+    return factory
+
+
+def call_soon(
+    storages: Iterable[Storage],
+    callback: Callable[..., Any],
+    *args: Any,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> asyncio.Handle:
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    return loop.call_soon(callback, *args, context=fork_context(storages))
+
+
+def call_later(
+    storages: Iterable[Storage],
+    delay: float,
+    callback: Callable[..., Any],
+    *args: Any,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> asyncio.TimerHandle:
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    return loop.call_later(delay, callback, *args, context=fork_context(storages))
+
+
+def run_in_executor(
+    storages: Iterable[Storage],
+    executor: Optional[Executor],
+    function: Callable[..., T],
+    *args: Any,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> 'asyncio.Future[T]':
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    return loop.run_in_executor(executor, bind(storages, function), *args)
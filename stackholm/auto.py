@@ -0,0 +1,100 @@
+from contextvars import ContextVar
+import sys
+from typing import (
+    Any,
+    Optional,
+)
+
+from stackholm.state import State
+from stackholm.storage import Storage
+from stackholm.storages._discovery import IS_ASGIREF_INSTALLED
+
+
+__all__ = (
+    'RuntimeInfo',
+    'inspect_runtime',
+    'auto_storage',
+)
+
+
+class RuntimeInfo:
+
+    has_running_loop: bool
+
+    uses_asgiref: bool
+
+    has_threads: bool
+
+    is_free_threaded: bool
+
+    def __init__(
+        self,
+        has_running_loop: bool = False,
+        uses_asgiref: bool = False,
+        has_threads: bool = False,
+        is_free_threaded: bool = False,
+    ) -> None:
+        self.has_running_loop = has_running_loop
+        self.uses_asgiref = uses_asgiref
+        self.has_threads = has_threads
+        self.is_free_threaded = is_free_threaded
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__name__}('
+            f'has_running_loop={self.has_running_loop}, '
+            f'uses_asgiref={self.uses_asgiref}, '
+            f'has_threads={self.has_threads}, '
+            f'is_free_threaded={self.is_free_threaded})'
+        )
+
+
+def _has_running_loop() -> bool:
+    asyncio = sys.modules.get('asyncio')
+    if asyncio is None:
+        return False
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _has_threads() -> bool:
+    threading = sys.modules.get('threading')
+    if threading is None:
+        return False
+    return threading.active_count() > 1
+
+
+def _is_free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    if is_gil_enabled is None:
+        return False
+    return not is_gil_enabled()
+
+
+def inspect_runtime() -> RuntimeInfo:
+    return RuntimeInfo(
+        has_running_loop=_has_running_loop(),
+        uses_asgiref=IS_ASGIREF_INSTALLED and 'asgiref.sync' in sys.modules,
+        has_threads=_has_threads(),
+        is_free_threaded=_is_free_threaded(),
+    )
+
+
+def auto_storage(
+    *args: Any,
+    context_var: Optional[ContextVar[State]] = None,
+    runtime: Optional[RuntimeInfo] = None,
+    **kwargs: Any,
+) -> Storage:
+    runtime = runtime or inspect_runtime()
+    if runtime.uses_asgiref:
+        from stackholm.storages.asgiref_local import ASGIRefLocalStorage
+        return ASGIRefLocalStorage(*args, **kwargs)
+    if (runtime.has_threads or runtime.is_free_threaded) and not runtime.has_running_loop:
+        from stackholm.storages.thread_local import ThreadLocalStorage
+        return ThreadLocalStorage(*args, **kwargs)
+    from stackholm.storages.contextvar import ContextVarStorage
+    return ContextVarStorage(context_var or ContextVar('stackholm.auto_storage'), *args, **kwargs)
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from functools import update_wrapper
+import itertools
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
+
+from stackholm.context import Context
+
+
+__all__ = (
+    'SCOPED_CACHE_KEY_PREFIX',
+    'scoped_cache',
+)
+
+
+FUNCTION_T = TypeVar('FUNCTION_T', bound=Callable[..., Any])
+
+
+SCOPED_CACHE_KEY_PREFIX = 'stackholm.scoped_cache:'
+
+_KWARGS_MARK = object()
+
+_MISSING = object()
+
+_sequence = itertools.count()
+
+
+def _make_key(
+    args: Tuple[Any, ...],
+    kwargs: Any,
+) -> Hashable:
+    if kwargs:
+        return args + (_KWARGS_MARK,) + tuple(kwargs.items())
+    if len(args) == 1 and args[0].__class__ in (int, str):
+        return args[0]
+    return args
+
+
+def scoped_cache(
+    context_class: Type[Context],
+    maxsize: Optional[int] = 128,
+    scope_key: Optional[str] = None,
+) -> Callable[[FUNCTION_T], FUNCTION_T]:
+
+    def decorator(function: FUNCTION_T) -> FUNCTION_T:
+        block_key = f'{SCOPED_CACHE_KEY_PREFIX}{function.__module__}.{function.__qualname__}:{next(_sequence)}'
+
+        def get_owner() -> Optional[Context]:
+            if scope_key is None:
+                return context_class.get_current()
+            return context_class.get_nearest_checkpoint(scope_key)
+
+        def get_cache(
+            owner: Context,
+            create: bool,
+        ) -> 'Optional[OrderedDict[Hashable, Any]]':
+            cache = owner._block_data.get(block_key)
+            if cache is None and create:
+                cache = OrderedDict()
+                owner._block_data[block_key] = cache
+                owner.add_deactivation_callback(lambda: owner._block_data.pop(block_key, None))
+            return cache
+
+        def wrapper(
+            *args: Any,
+            **kwargs: Any,
+        ) -> Any:
+            if maxsize == 0:
+                return function(*args, **kwargs)
+            owner = get_owner()
+            if owner is None:
+                return function(*args, **kwargs)
+            cache = cast('OrderedDict[Hashable, Any]', get_cache(owner, True))
+            key = _make_key(args, kwargs)
+            result = cache.get(key, _MISSING)
+            if result is not _MISSING:
+                cache.move_to_end(key)
+                return result
+            result = function(*args, **kwargs)
+            cache[key] = result
+            if maxsize is not None and len(cache) > maxsize:
+                cache.popitem(last=False)
+            return result
+
+        def cache_clear() -> None:
+            owner = get_owner()
+            if owner is None:
+                return
+            cache = get_cache(owner, False)
+            if cache is not None:
+                cache.clear()
+
+        setattr(wrapper, 'cache_clear', cache_clear)
+        return cast(FUNCTION_T, update_wrapper(wrapper, function))
+
+    return decorator
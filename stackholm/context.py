@@ -1,10 +1,15 @@
 from contextlib import ContextDecorator
+import copy
+from time import monotonic
 from types import TracebackType
 from typing import (
     Any,
+    Callable,
     Dict,
+    List,
     Optional,
     TYPE_CHECKING,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -15,6 +20,10 @@ from stackholm.exceptions import (
     ContextIsNotActive,
     NoContextIsActive,
 )
+from stackholm.snapshot import (
+    EXCEPTION_CONTEXT_ATTRIBUTE,
+    attach_exception_context,
+)
 
 
 if TYPE_CHECKING:
@@ -22,7 +31,10 @@ if TYPE_CHECKING:
 
 
 __all__ = (
+    'COPY_ON_WRITE_TYPES',
+    'RESOURCE_KEY_PREFIX',
     'Context',
+    'ElidedScope',
 )
 
 
@@ -30,9 +42,24 @@ T = TypeVar('T')
 
 VALUE_T = TypeVar('VALUE_T')
 
+RESOURCE_T = TypeVar('RESOURCE_T')
+
+
+RESOURCE_KEY_PREFIX = 'stackholm.resource:'
+
+COPY_ON_WRITE_TYPES = (
+    dict,
+    list,
+    set,
+)
+
 
 class Context(ContextDecorator):
 
+    capture_exception_context: bool = False
+
+    exception_context_keys: Optional[Tuple[str, ...]] = None
+
     _storage: 'Storage'
 
     _index: Optional[int]
@@ -41,16 +68,74 @@ class Context(ContextDecorator):
 
     _checkpoint_data: Dict[str, Any]
 
+    _deactivation_callbacks: Optional[List[Callable[[], Any]]]
+
+    _checkpoint_expirations: Optional[Dict[str, float]]
+
     @classmethod
     def get_current(cls) -> Optional['Context']:
-        return cls._storage.get_last_context()
+        state = cls._storage.state
+        if state.get_elided_depth():
+            return cls._materialize_elided_frame()
+        return state.get_last_context()
+
+    @classmethod
+    def elided(cls) -> 'ElidedScope':
+        return ElidedScope(cls._storage)
+
+    @classmethod
+    def _materialize_elided_frame(cls) -> 'Context':
+        context = cls.__new__(cls)
+        Context.__init__(context)
+        context._index = cls._storage.materialize_elided_frame(context)
+        return context
 
     @classmethod
     def get_nearest_checkpoint(
         cls,
         key: str,
     ) -> Optional['Context']:
-        return cls._storage.get_nearest_checkpoint(key)
+        context = cls._storage.get_nearest_checkpoint(key)
+        if context is not None and context._checkpoint_expirations is not None:
+            return cls._purge_expired_checkpoint(key, context)
+        return context
+
+    @classmethod
+    def _purge_expired_checkpoint(
+        cls,
+        key: str,
+        context: Optional['Context'],
+    ) -> Optional['Context']:
+        now = monotonic()
+        while context is not None:
+            expirations = context._checkpoint_expirations
+            if expirations is None:
+                break
+            expires_at = expirations.get(key)
+            if expires_at is None or expires_at > now:
+                break
+            context._remove_checkpoint(key)
+            context = cls._storage.get_nearest_checkpoint(key)
+        return context
+
+    @classmethod
+    def purge_expired_checkpoints(cls) -> int:
+        now = monotonic()
+        count = 0
+        state = cls._storage.state
+        for context in list(state.get_contexts()):
+            expirations = context._checkpoint_expirations
+            if expirations is None:
+                continue
+            is_inherited = state.is_inherited_frame(context.index)
+            for key, expires_at in list(expirations.items()):
+                if expires_at > now:
+                    continue
+                if is_inherited and state.get_nearest_checkpoint(key) is not context:
+                    continue
+                context._remove_checkpoint(key)
+                count += 1
+        return count
 
     @classmethod
     @overload
@@ -85,12 +170,58 @@ class Context(ContextDecorator):
         cls,
         key: str,
         value: Any,
+        ttl: Optional[float] = None,
     ) -> None:
         context = cls.get_current()
         if context is None:
             raise NoContextIsActive()
         context._checkpoint_data[key] = value
         cls._storage.add_checkpoint(key, context.index)
+        if ttl is not None:
+            if context._checkpoint_expirations is None:
+                context._checkpoint_expirations = {}
+            context._checkpoint_expirations[key] = monotonic() + ttl
+        elif context._checkpoint_expirations is not None:
+            context._remove_checkpoint_expiration(key)
+
+    @classmethod
+    @overload
+    def get_checkpoint_value_for_update(
+        cls,
+        key: str,
+    ) -> Union[VALUE_T, None]:
+        ...
+
+    @classmethod
+    @overload
+    def get_checkpoint_value_for_update(
+        cls,
+        key: str,
+        default: VALUE_T,
+    ) -> Union[VALUE_T, T]:
+        ...
+
+    @classmethod
+    def get_checkpoint_value_for_update(
+        cls,
+        key,
+        default=None,
+    ):
+        current = cls.get_current()
+        if current is None:
+            raise NoContextIsActive()
+        context = cls.get_nearest_checkpoint(key)
+        if context is not None and key in context._checkpoint_data:
+            value = context._checkpoint_data[key]
+            if context is current or not isinstance(value, COPY_ON_WRITE_TYPES):
+                return value
+            value = copy.copy(value)
+        elif default is None:
+            return None
+        else:
+            value = default
+        cls.set_checkpoint_value(key, value)
+        return value
 
     @classmethod
     @overload
@@ -118,7 +249,12 @@ class Context(ContextDecorator):
         context = cls.get_nearest_checkpoint(key)
         if context is None:
             return default
-        cls._storage.remove_checkpoint(key, context.index)
+        storage = cls._storage
+        storage.remove_checkpoint(key, context.index)
+        if storage.state.is_inherited_frame(context.index):
+            return context._checkpoint_data.get(key, default)
+        if context._checkpoint_expirations is not None:
+            context._remove_checkpoint_expiration(key)
         return context._checkpoint_data.pop(key, default)
 
     @classmethod
@@ -129,10 +265,31 @@ class Context(ContextDecorator):
         while cls._storage.get_nearest_checkpoint(key) is not None:
             cls.pop_checkpoint_value(key)
 
+    @classmethod
+    def get_or_create_resource(
+        cls,
+        key: str,
+        factory: Callable[[], RESOURCE_T],
+        close: Optional[Callable[[RESOURCE_T], Any]] = None,
+    ) -> RESOURCE_T:
+        resource_key = RESOURCE_KEY_PREFIX + key
+        context = cls.get_nearest_checkpoint(resource_key)
+        if context is not None and resource_key in context._checkpoint_data:
+            return context._checkpoint_data[resource_key]
+        context = cls.get_current()
+        if context is None:
+            raise NoContextIsActive()
+        resource = factory()
+        cls.set_checkpoint_value(resource_key, resource)
+        context.add_deactivation_callback(_ResourceRelease(context, resource_key, resource, close))
+        return resource
+
     def __init__(self) -> None:
         self._index = None
         self._block_data = {}
         self._checkpoint_data = {}
+        self._deactivation_callbacks = None
+        self._checkpoint_expirations = None
 
     def __enter__(self) -> 'Context':
         return self.activate()
@@ -143,8 +300,21 @@ class Context(ContextDecorator):
         exception: Optional[BaseException],
         traceback: Optional[TracebackType],
     ) -> None:
+        if exception is not None and self.capture_exception_context:
+            self._capture_exception_context(exception)
         self.deactivate()
 
+    async def __aenter__(self) -> 'Context':
+        return self.__enter__()
+
+    async def __aexit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.__exit__(exception_type, exception, traceback)
+
     def _recreate_cm(self) -> 'Context':
         return self.activate()
 
@@ -223,18 +393,156 @@ class Context(ContextDecorator):
     def checkpoint_data(self) -> Dict[str, Any]:
         return self._checkpoint_data
 
+    def _remove_checkpoint(
+        self,
+        key: str,
+    ) -> None:
+        storage = self.storage
+        if not storage.state.is_inherited_frame(self.index):
+            self._checkpoint_data.pop(key, None)
+            if self._checkpoint_expirations is not None:
+                self._remove_checkpoint_expiration(key)
+        storage.remove_checkpoint(key, self.index)
+
+    def _remove_checkpoint_expiration(
+        self,
+        key: str,
+    ) -> None:
+        expirations = self._checkpoint_expirations
+        if expirations is None:
+            return
+        expirations.pop(key, None)
+        if not expirations:
+            self._checkpoint_expirations = None
+
+    def _capture_exception_context(
+        self,
+        exception: BaseException,
+    ) -> None:
+        if EXCEPTION_CONTEXT_ATTRIBUTE in exception.__dict__:
+            return
+        frames = tuple(context._checkpoint_data for context in self.storage.state.get_contexts())
+        attach_exception_context(exception, frames, self.exception_context_keys)
+
     def activate(self) -> 'Context':
         if self.is_active:
             return self
-        self._index = self.storage.push_context(self)
-        for key in self._checkpoint_data.keys():
-            self.storage.add_checkpoint(key, self.index)
+        self._index = self.storage.push_context_with_checkpoints(self, self._checkpoint_data.keys())
         return self
 
     def deactivate(self) -> None:
         if not self.is_active:
             return
-        for key in self._checkpoint_data.keys():
-            self.storage.remove_checkpoint(key, self.index)
-        self.storage.pop_context(self.index)
+        self.storage.pop_context_with_checkpoints(self.index, self._checkpoint_data.keys())
         self._index = None
+        if self._deactivation_callbacks is not None:
+            self._run_deactivation_callbacks()
+
+    def add_deactivation_callback(
+        self,
+        callback: Callable[[], Any],
+    ) -> None:
+        if not self.is_active:
+            raise ContextIsNotActive(self)
+        if self._deactivation_callbacks is None:
+            self._deactivation_callbacks = []
+        self._deactivation_callbacks.append(callback)
+
+    def _move_resource_releases(
+        self,
+        target: 'Context',
+    ) -> None:
+        callbacks = self._deactivation_callbacks
+        if callbacks is None:
+            return
+        remaining_callbacks: List[Callable[[], Any]] = []
+        for callback in callbacks:
+            if (
+                isinstance(callback, _ResourceRelease)
+                and callback.owner is self
+                and callback.key in self._checkpoint_data
+            ):
+                callback.owner = target
+                target.add_deactivation_callback(callback)
+            else:
+                remaining_callbacks.append(callback)
+        self._deactivation_callbacks = remaining_callbacks or None
+
+    def _run_deactivation_callbacks(self) -> None:
+        callbacks = self._deactivation_callbacks
+        self._deactivation_callbacks = None
+        error: Optional[BaseException] = None
+        while callbacks:
+            callback = callbacks.pop()
+            try:
+                callback()
+            except BaseException as exception:
+                if error is None:
+                    error = exception
+        if error is not None:
+            raise error
+
+
+class _ResourceRelease:
+
+    __slots__ = (
+        'owner',
+        'key',
+        'resource',
+        'close',
+    )
+
+    owner: Context
+
+    key: str
+
+    resource: Any
+
+    close: Optional[Callable[[Any], Any]]
+
+    def __init__(
+        self,
+        owner: Context,
+        key: str,
+        resource: Any,
+        close: Optional[Callable[[Any], Any]],
+    ) -> None:
+        self.owner = owner
+        self.key = key
+        self.resource = resource
+        self.close = close
+
+    def __call__(self) -> None:
+        self.owner._checkpoint_data.pop(self.key, None)
+        if self.close is not None:
+            self.close(self.resource)
+
+
+class ElidedScope(ContextDecorator):
+
+    _storage: 'Storage'
+
+    def __init__(
+        self,
+        storage: 'Storage',
+    ) -> None:
+        self._storage = storage
+
+    def __enter__(self) -> None:
+        self._storage.push_elided_frame()
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        storage = self._storage
+        if storage.pop_elided_frame():
+            return
+        context = storage.get_last_context()
+        if context is not None:
+            context.deactivate()
+
+    def _recreate_cm(self) -> 'ElidedScope':
+        return self
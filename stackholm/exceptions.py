@@ -8,6 +8,7 @@ if TYPE_CHECKING:
 __all__ = (
     'ContextIsNotActive',
     'NoContextIsActive',
+    'WireFormatError',
 )
 
 
@@ -29,3 +30,12 @@ class NoContextIsActive(Exception):
         message: str = 'No context is active.',
     ) -> None:
         super(NoContextIsActive, self).__init__(message)
+
+
+class WireFormatError(Exception):
+
+    def __init__(
+        self,
+        message: str = 'Malformed wire format data.',
+    ) -> None:
+        super(WireFormatError, self).__init__(message)
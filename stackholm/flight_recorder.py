@@ -0,0 +1,684 @@
+import argparse
+import atexit
+from contextlib import suppress
+from datetime import (
+    datetime,
+    timezone,
+)
+import itertools
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+from time import time_ns
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+import weakref
+
+from stackholm.context import Context
+from stackholm.recording import Opcode
+from stackholm.state import State
+
+
+__all__ = (
+    'FLIGHT_RECORDER_MAGIC',
+    'FLIGHT_RECORDER_VERSION',
+    'NO_KEY',
+    'FlightRecorderState',
+    'FlightRecorder',
+    'FlightRecord',
+    'FlightLog',
+    'read_flight_log',
+    'remove_stale_flight_logs',
+    'main',
+)
+
+
+FLIGHT_RECORDER_MAGIC = b'SHFR'
+
+FLIGHT_RECORDER_VERSION = 1
+
+NO_KEY = 0xFFFFFFFF
+
+_HEADER = struct.Struct('<4sB3xIIII')
+
+_HEADER_SIZE = 64
+
+_KEY_ENTRY = struct.Struct('<IH')
+
+_RECORD = struct.Struct('<QqIiIB3x')
+
+_OPCODE_NAMES = {
+    value: name.lower()
+    for name, value in vars(Opcode).items()
+    if not name.startswith('_')
+}
+
+_PUSH_OPCODES = frozenset((
+    Opcode.PUSH_CONTEXT,
+    Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS,
+    Opcode.MATERIALIZE_ELIDED_FRAME,
+))
+
+_POP_OPCODES = frozenset((
+    Opcode.POP_CONTEXT,
+    Opcode.POP_CONTEXT_WITH_CHECKPOINTS,
+    Opcode.MERGE_CONTEXT,
+))
+
+_FORWARDED_METHODS = (
+    'get_last_context',
+    'get_nearest_checkpoint',
+    'get_elided_depth',
+    'get_contexts',
+    'get_checkpoint_keys',
+    'get_checkpoint_index_lengths',
+    'get_elided_frame_count',
+    'is_inherited_frame',
+    'bump_version',
+)
+
+
+class FlightRecorderState(State):
+
+    inner: State
+
+    state_id: int
+
+    _recorder: 'FlightRecorder'
+
+    _write: Callable[[int, int, int], None]
+
+    _get_key_id: Callable[[str], int]
+
+    def __init__(
+        self,
+        inner: State,
+        recorder: 'FlightRecorder',
+        state_id: int,
+    ) -> None:
+        self.inner = inner
+        self.state_id = state_id
+        self._recorder = recorder
+        self._write = recorder._create_writer(state_id)
+        self._get_key_id = recorder._get_key_id
+        for name in _FORWARDED_METHODS:
+            setattr(self, name, getattr(inner, name))
+
+    def __getattr__(
+        self,
+        name: str,
+    ) -> Any:
+        if name == 'inner':
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def fork(self) -> 'FlightRecorderState':
+        return self._recorder._wrap_state(self.inner.fork())
+
+    def _write_keys(
+        self,
+        opcode: int,
+        index: int,
+        keys: Iterable[str],
+    ) -> None:
+        write = self._write
+        get_key_id = self._get_key_id
+        is_empty = True
+        for key in keys:
+            is_empty = False
+            write(opcode, index, get_key_id(key))
+        if is_empty:
+            write(opcode, index, NO_KEY)
+
+    def push_context(
+        self,
+        context: Context,
+    ) -> int:
+        index = self.inner.push_context(context)
+        self._write(Opcode.PUSH_CONTEXT, index, NO_KEY)
+        return index
+
+    def pop_context(
+        self,
+        index: int = -1,
+    ) -> Optional[Context]:
+        self._write(Opcode.POP_CONTEXT, index, NO_KEY)
+        return self.inner.pop_context(index)
+
+    def get_last_context(self) -> Optional[Context]:
+        return self.inner.get_last_context()
+
+    def add_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        self._write(Opcode.ADD_CHECKPOINT, context_index, self._get_key_id(key))
+        self.inner.add_checkpoint(key, context_index)
+
+    def remove_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        self._write(Opcode.REMOVE_CHECKPOINT, context_index, self._get_key_id(key))
+        self.inner.remove_checkpoint(key, context_index)
+
+    def get_nearest_checkpoint(
+        self,
+        key: str,
+    ) -> Optional[Context]:
+        return self.inner.get_nearest_checkpoint(key)
+
+    def push_context_with_checkpoints(
+        self,
+        context: Context,
+        keys: Iterable[str],
+    ) -> int:
+        if not keys:
+            index = self.inner.push_context_with_checkpoints(context, keys)
+            self._write(Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS, index, NO_KEY)
+            return index
+        keys = tuple(keys)
+        index = self.inner.push_context_with_checkpoints(context, keys)
+        self._write_keys(Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS, index, keys)
+        return index
+
+    def pop_context_with_checkpoints(
+        self,
+        index: int,
+        keys: Iterable[str],
+    ) -> Optional[Context]:
+        self._write(Opcode.POP_CONTEXT_WITH_CHECKPOINTS, index, NO_KEY)
+        return self.inner.pop_context_with_checkpoints(index, keys)
+
+    def merge_context(
+        self,
+        index: int,
+        keys: Iterable[str],
+        target_index: int,
+        target_keys: Collection[str],
+    ) -> Optional[Context]:
+        self._write(Opcode.MERGE_CONTEXT, index, target_index)
+        return self.inner.merge_context(index, keys, target_index, target_keys)
+
+    def push_elided_frame(self) -> None:
+        self._write(Opcode.PUSH_ELIDED_FRAME, 0, NO_KEY)
+        self.inner.push_elided_frame()
+
+    def pop_elided_frame(self) -> bool:
+        self._write(Opcode.POP_ELIDED_FRAME, 0, NO_KEY)
+        return self.inner.pop_elided_frame()
+
+    def get_elided_depth(self) -> int:
+        return self.inner.get_elided_depth()
+
+    def materialize_elided_frame(
+        self,
+        context: Context,
+    ) -> int:
+        index = self.inner.materialize_elided_frame(context)
+        self._write(Opcode.MATERIALIZE_ELIDED_FRAME, index, NO_KEY)
+        return index
+
+    def get_contexts(self) -> Sequence[Context]:
+        return self.inner.get_contexts()
+
+    def get_checkpoint_keys(self) -> Collection[str]:
+        return self.inner.get_checkpoint_keys()
+
+    def get_checkpoint_index_lengths(self) -> Dict[str, int]:
+        return self.inner.get_checkpoint_index_lengths()
+
+    def get_elided_frame_count(self) -> int:
+        return self.inner.get_elided_frame_count()
+
+    def bump_version(self) -> None:
+        self.inner.bump_version()
+
+    def is_inherited_frame(
+        self,
+        index: int,
+    ) -> bool:
+        return self.inner.is_inherited_frame(index)
+
+
+_DEFAULT_NAME_PATTERN = re.compile(r'^stackholm-(\d+)\.flight$')
+
+
+def _get_default_directory() -> str:
+    return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+
+def _get_default_path() -> str:
+    return os.path.join(_get_default_directory(), f'stackholm-{os.getpid()}.flight')
+
+
+def _get_child_path(path: str) -> str:
+    root, extension = os.path.splitext(path)
+    return f'{root}-{os.getpid()}{extension}'
+
+
+_RECORDERS: 'weakref.WeakSet[FlightRecorder]' = weakref.WeakSet()
+
+
+def _reopen_recorders_after_fork() -> None:
+    for recorder in list(_RECORDERS):
+        recorder._reopen_after_fork()
+
+
+def _close_recorders() -> None:
+    for recorder in list(_RECORDERS):
+        recorder.close()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reopen_recorders_after_fork)
+
+atexit.register(_close_recorders)
+
+
+def _is_process_alive(pid: int) -> bool:
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_stale_flight_logs(
+    directory: Optional[Union[str, 'os.PathLike[str]']] = None,
+) -> List[str]:
+    directory = os.fspath(directory) if directory is not None else _get_default_directory()
+    removed: List[str] = []
+    for name in os.listdir(directory):
+        match = _DEFAULT_NAME_PATTERN.match(name)
+        if match is None or _is_process_alive(int(match.group(1))):
+            continue
+        path = os.path.join(directory, name)
+        with suppress(FileNotFoundError):
+            os.unlink(path)
+            removed.append(path)
+    return removed
+
+
+class FlightRecorder:
+
+    path: str
+
+    capacity: int
+
+    key_table_size: int
+
+    state_class: Callable[[], State]
+
+    remove_on_close: bool
+
+    _mmap: mmap.mmap
+
+    _records_offset: int
+
+    _key_table_used: int
+
+    _key_ids: Dict[str, int]
+
+    _sequence: 'itertools.count[int]'
+
+    _state_ids: 'itertools.count[int]'
+
+    _states: 'weakref.WeakSet[FlightRecorderState]'
+
+    _lock: threading.Lock
+
+    _is_default_path: bool
+
+    _is_closed: bool
+
+    def __init__(
+        self,
+        path: Optional[Union[str, 'os.PathLike[str]']] = None,
+        capacity: int = 65536,
+        key_table_size: int = 65536,
+        state_class: Optional[Callable[[], State]] = None,
+        remove_on_close: Optional[bool] = None,
+    ) -> None:
+        if state_class is None:
+            from stackholm.storages.optimized_list.optimized_list_state import (
+                OptimizedListState,
+            )
+            state_class = OptimizedListState
+        self._is_default_path = path is None
+        self.path = os.fspath(path) if path is not None else _get_default_path()
+        self.capacity = capacity
+        self.key_table_size = key_table_size
+        self.state_class = state_class
+        self.remove_on_close = path is None if remove_on_close is None else remove_on_close
+        self._records_offset = _HEADER_SIZE + key_table_size
+        self._state_ids = itertools.count()
+        self._states = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._is_closed = False
+        self._open()
+        _RECORDERS.add(self)
+
+    def _open(self) -> None:
+        size = self._records_offset + self.capacity * _RECORD.size
+        with open(self.path, 'w+b') as file:
+            file.truncate(size)
+            self._mmap = mmap.mmap(file.fileno(), size)
+        self._key_table_used = 0
+        self._key_ids = {}
+        self._sequence = itertools.count(1)
+        self._write_header()
+
+    def _reopen_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        if self._is_closed:
+            return
+        with suppress(ValueError, BufferError):
+            self._mmap.close()
+        self.path = _get_default_path() if self._is_default_path else _get_child_path(self.path)
+        self._open()
+        for state in list(self._states):
+            state._write = self._create_writer(state.state_id)
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(
+            self._mmap,
+            0,
+            FLIGHT_RECORDER_MAGIC,
+            FLIGHT_RECORDER_VERSION,
+            os.getpid(),
+            self.capacity,
+            self.key_table_size,
+            self._key_table_used,
+        )
+
+    def _create_writer(
+        self,
+        state_id: int,
+    ) -> Callable[[int, int, int], None]:
+        pack_into = _RECORD.pack_into
+        buffer = self._mmap
+        records_offset = self._records_offset
+        capacity = self.capacity
+        record_size = _RECORD.size
+        get_number = self._sequence.__next__
+
+        def write(
+            opcode: int,
+            index: int,
+            key_id: int,
+        ) -> None:
+            number = get_number()
+            pack_into(
+                buffer,
+                records_offset + (number % capacity) * record_size,
+                number,
+                time_ns(),
+                state_id,
+                index,
+                key_id,
+                opcode,
+            )
+
+        return write
+
+    def _get_key_id(
+        self,
+        key: str,
+    ) -> int:
+        key_id = self._key_ids.get(key)
+        if key_id is not None:
+            return key_id
+        with self._lock:
+            key_id = self._key_ids.get(key)
+            if key_id is not None:
+                return key_id
+            key_id = len(self._key_ids)
+            encoded_key = key.encode('utf-8')[:0xFFFF]
+            entry_size = _KEY_ENTRY.size + len(encoded_key)
+            if self._key_table_used + entry_size <= self.key_table_size:
+                offset = _HEADER_SIZE + self._key_table_used
+                _KEY_ENTRY.pack_into(self._mmap, offset, key_id, len(encoded_key))
+                self._mmap[offset + _KEY_ENTRY.size:offset + entry_size] = encoded_key
+                self._key_table_used += entry_size
+                self._write_header()
+            self._key_ids[key] = key_id
+        return key_id
+
+    def create_state(self) -> FlightRecorderState:
+        return self._wrap_state(self.state_class())
+
+    def _wrap_state(
+        self,
+        inner: State,
+    ) -> FlightRecorderState:
+        state = FlightRecorderState(inner, self, next(self._state_ids))
+        self._states.add(state)
+        return state
+
+    def flush(self) -> None:
+        self._mmap.flush()
+
+    def close(self) -> None:
+        if self._is_closed:
+            return
+        self._is_closed = True
+        with suppress(ValueError, BufferError):
+            self._mmap.flush()
+            self._mmap.close()
+        if self.remove_on_close:
+            with suppress(FileNotFoundError):
+                os.unlink(self.path)
+
+    def __enter__(self) -> 'FlightRecorder':
+        return self
+
+    def __exit__(
+        self,
+        *args: Any,
+    ) -> None:
+        self.close()
+
+
+class FlightRecord:
+
+    __slots__ = (
+        'sequence',
+        'timestamp',
+        'state_id',
+        'opcode',
+        'index',
+        'key',
+    )
+
+    sequence: int
+
+    timestamp: int
+
+    state_id: int
+
+    opcode: int
+
+    index: int
+
+    key: Optional[str]
+
+    def __init__(
+        self,
+        sequence: int,
+        timestamp: int,
+        state_id: int,
+        opcode: int,
+        index: int,
+        key: Optional[str],
+    ) -> None:
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.state_id = state_id
+        self.opcode = opcode
+        self.index = index
+        self.key = key
+
+    @property
+    def operation(self) -> str:
+        return _OPCODE_NAMES.get(self.opcode, f'opcode_{self.opcode}')
+
+    def format(self) -> str:
+        moment = datetime.fromtimestamp(self.timestamp / 1e9, timezone.utc).isoformat()
+        line = f'{self.sequence:>10} {moment} state={self.state_id} {self.operation} index={self.index}'
+        if self.key is not None:
+            line += f' key={self.key}'
+        return line
+
+
+class FlightLog:
+
+    pid: int
+
+    capacity: int
+
+    records: List[FlightRecord]
+
+    def __init__(
+        self,
+        pid: int,
+        capacity: int,
+        records: List[FlightRecord],
+    ) -> None:
+        self.pid = pid
+        self.capacity = capacity
+        self.records = records
+
+    @property
+    def dropped(self) -> int:
+        if not self.records:
+            return 0
+        return self.records[0].sequence - 1
+
+    def get_open_frames(self) -> Dict[int, List[Tuple[int, List[str]]]]:
+        stacks: Dict[int, List[Tuple[int, List[str]]]] = {}
+        for record in self.records:
+            stack = stacks.setdefault(record.state_id, [])
+            opcode = record.opcode
+            if opcode in _PUSH_OPCODES:
+                _push_frame(stack, record)
+            elif opcode in _POP_OPCODES:
+                _pop_frames(stack, record.index)
+            elif record.key is None:
+                continue
+            elif opcode == Opcode.ADD_CHECKPOINT:
+                keys = _find_frame_keys(stack, record.index)
+                if keys is not None and record.key not in keys:
+                    keys.append(record.key)
+            elif opcode == Opcode.REMOVE_CHECKPOINT:
+                keys = _find_frame_keys(stack, record.index)
+                if keys is not None and record.key in keys:
+                    keys.remove(record.key)
+        return {state_id: stack for state_id, stack in stacks.items() if stack}
+
+
+def _push_frame(
+    stack: List[Tuple[int, List[str]]],
+    record: FlightRecord,
+) -> None:
+    if not stack or stack[-1][0] != record.index:
+        stack.append((record.index, []))
+    if record.opcode == Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS and record.key is not None:
+        stack[-1][1].append(record.key)
+
+
+def _pop_frames(
+    stack: List[Tuple[int, List[str]]],
+    index: int,
+) -> None:
+    if index < 0:
+        if stack:
+            stack.pop()
+        return
+    while stack and stack[-1][0] >= index:
+        stack.pop()
+
+
+def _find_frame_keys(
+    stack: List[Tuple[int, List[str]]],
+    index: int,
+) -> Optional[List[str]]:
+    for frame_index, keys in reversed(stack):
+        if frame_index == index:
+            return keys
+    return None
+
+
+def read_flight_log(data: Union[bytes, bytearray, memoryview, mmap.mmap]) -> FlightLog:
+    buffer = memoryview(data)
+    magic, version, pid, capacity, key_table_size, key_table_used = _HEADER.unpack_from(buffer, 0)
+    if magic != FLIGHT_RECORDER_MAGIC or version != FLIGHT_RECORDER_VERSION:
+        raise ValueError('Unsupported flight recorder file.')
+    keys: Dict[int, str] = {}
+    offset = _HEADER_SIZE
+    end = _HEADER_SIZE + key_table_used
+    while offset < end:
+        key_id, length = _KEY_ENTRY.unpack_from(buffer, offset)
+        offset += _KEY_ENTRY.size
+        keys[key_id] = str(buffer[offset:offset + length], 'utf-8', 'replace')
+        offset += length
+    records: List[FlightRecord] = []
+    records_offset = _HEADER_SIZE + key_table_size
+    for sequence, timestamp, state_id, index, key_id, opcode in _RECORD.iter_unpack(
+        buffer[records_offset:records_offset + capacity * _RECORD.size],
+    ):
+        if sequence == 0:
+            continue
+        key: Optional[str] = None
+        if opcode != Opcode.MERGE_CONTEXT and key_id != NO_KEY:
+            key = keys.get(key_id, f'#{key_id}')
+        records.append(FlightRecord(sequence, timestamp, state_id, opcode, index, key))
+    records.sort(key=lambda record: record.sequence)
+    return FlightLog(pid, capacity, records)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m stackholm.flight_recorder',
+        description='Decode a flight recorder buffer.',
+    )
+    parser.add_argument('path')
+    parser.add_argument('--last', type=int, default=50, help='Number of records to print, 0 prints all.')
+    arguments = parser.parse_args(argv)
+    with open(arguments.path, 'rb') as file:
+        log = read_flight_log(file.read())
+    print(f'pid {log.pid}, {len(log.records)} records, {log.dropped} overwritten')
+    records = log.records[-arguments.last:] if arguments.last > 0 else log.records
+    for record in records:
+        print(record.format())
+    open_frames = log.get_open_frames()
+    if open_frames:
+        print('open frames:')
+        for state_id, stack in sorted(open_frames.items()):
+            print(f'  state={state_id} depth={len(stack)}')
+            for index, keys in stack:
+                print(f'    index={index} keys={",".join(keys)}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+import gc
+import os
+import threading
+from typing import (
+    List,
+    Optional,
+)
+from weakref import WeakKeyDictionary
+
+from stackholm.context import Context
+from stackholm.storage import Storage
+
+
+__all__ = (
+    'ForkPolicy',
+    'register_fork_handlers',
+    'unregister_fork_handlers',
+    'reset_storage',
+)
+
+
+class ForkPolicy:
+
+    keep_root: bool
+
+    freeze_gc: bool
+
+    def __init__(
+        self,
+        keep_root: bool = False,
+        freeze_gc: bool = False,
+    ) -> None:
+        self.keep_root = keep_root
+        self.freeze_gc = freeze_gc
+
+
+_policies: 'WeakKeyDictionary[Storage, ForkPolicy]' = WeakKeyDictionary()
+
+_lock = threading.Lock()
+
+_is_registered = False
+
+_is_gc_frozen = False
+
+
+def reset_storage(
+    storage: Storage,
+    keep_root: bool = False,
+) -> Optional[Context]:
+    contexts = list(storage.get_state().get_contexts())
+    root = contexts[0] if keep_root and contexts else None
+    for state in storage.get_states():
+        for context in state.get_contexts():
+            if context is root:
+                continue
+            context._index = None
+            context._deactivation_callbacks = None
+    state = storage.create_state()
+    if root is not None:
+        root._index = state.push_context_with_checkpoints(root, root._checkpoint_data.keys())
+    storage.set_state(state)
+    return root
+
+
+def _before_fork() -> None:
+    global _is_gc_frozen
+    _lock.acquire()
+    if any(policy.freeze_gc for policy in _policies.values()):
+        gc.freeze()
+        _is_gc_frozen = True
+
+
+def _after_fork_in_parent() -> None:
+    global _is_gc_frozen
+    if _is_gc_frozen:
+        gc.unfreeze()
+        _is_gc_frozen = False
+    _lock.release()
+
+
+def _after_fork_in_child() -> None:
+    global _is_gc_frozen
+    _is_gc_frozen = False
+    try:
+        items = list(_policies.items())
+    finally:
+        _lock.release()
+    errors: List[BaseException] = []
+    for storage, policy in items:
+        try:
+            reset_storage(storage, keep_root=policy.keep_root)
+        except BaseException as exception:
+            errors.append(exception)
+    if errors:
+        raise errors[0]
+
+
+def register_fork_handlers(
+    storage: Storage,
+    keep_root: bool = False,
+    freeze_gc: bool = False,
+) -> ForkPolicy:
+    global _is_registered
+    policy = ForkPolicy(keep_root=keep_root, freeze_gc=freeze_gc)
+    with _lock:
+        _policies[storage] = policy
+        if not _is_registered and hasattr(os, 'register_at_fork'):
+            os.register_at_fork(
+                before=_before_fork,
+                after_in_parent=_after_fork_in_parent,
+                after_in_child=_after_fork_in_child,
+            )
+            _is_registered = True
+    return policy
+
+
+def unregister_fork_handlers(storage: Storage) -> None:
+    with _lock:
+        _policies.pop(storage, None)
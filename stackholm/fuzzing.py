@@ -0,0 +1,386 @@
+import argparse
+import random
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from stackholm.context import Context
+from stackholm.state import State
+
+
+__all__ = (
+    'DEFAULT_KEYS',
+    'get_default_engines',
+    'Mismatch',
+    'DifferentialFuzzer',
+    'FuzzReport',
+    'run_differential_fuzz',
+    'main',
+)
+
+
+DEFAULT_KEYS = ('a', 'b', 'c', 'd', 'e')
+
+_CONTEXT_FRAME = 'context'
+
+_ELIDED_FRAME = 'elided'
+
+
+def get_default_engines() -> Dict[str, Callable[[], State]]:
+    from stackholm.storages.compact_array.compact_array_state import (
+        CompactArrayState,
+    )
+    from stackholm.storages.optimized_list.optimized_list_state import (
+        OptimizedListState,
+    )
+    return {
+        'OptimizedListState': OptimizedListState,
+        'CompactArrayState': CompactArrayState,
+    }
+
+
+def _format_result(result: Any) -> str:
+    if isinstance(result, Context):
+        return f'<context {id(result):#x}>'
+    if isinstance(result, list):
+        return '[' + ', '.join(_format_result(item) for item in result) + ']'
+    return repr(result)
+
+
+def _is_same_result(
+    expected: Any,
+    actual: Any,
+) -> bool:
+    if isinstance(expected, Context) or isinstance(actual, Context):
+        return expected is actual
+    if isinstance(expected, list) and isinstance(actual, list):
+        return len(expected) == len(actual) and all(map(_is_same_result, expected, actual))
+    return bool(expected == actual)
+
+
+class Mismatch:
+
+    engine: str
+
+    seed: int
+
+    operation: int
+
+    description: str
+
+    expected: str
+
+    actual: str
+
+    history: List[str]
+
+    def __init__(
+        self,
+        engine: str,
+        seed: int,
+        operation: int,
+        description: str,
+        expected: Any,
+        actual: Any,
+        history: Sequence[str],
+    ) -> None:
+        self.engine = engine
+        self.seed = seed
+        self.operation = operation
+        self.description = description
+        self.expected = _format_result(expected)
+        self.actual = _format_result(actual)
+        self.history = list(history)
+
+    def format(self) -> str:
+        return (
+            f'{self.engine} (seed {self.seed}, operation {self.operation}): {self.description}'
+            f' returned {self.actual} instead of {self.expected}'
+        )
+
+
+class DifferentialFuzzer:
+
+    engines: Dict[str, Callable[[], State]]
+
+    reference_class: Callable[[], State]
+
+    seed: int
+
+    keys: Tuple[str, ...]
+
+    max_depth: int
+
+    rng: random.Random
+
+    reference: State
+
+    states: Dict[str, State]
+
+    frames: List[Tuple[str, Optional[Context], Set[str]]]
+
+    history: List[str]
+
+    def __init__(
+        self,
+        engines: Optional[Dict[str, Callable[[], State]]] = None,
+        seed: int = 0,
+        keys: Sequence[str] = DEFAULT_KEYS,
+        max_depth: int = 8,
+        reference_class: Optional[Callable[[], State]] = None,
+    ) -> None:
+        if engines is None:
+            engines = get_default_engines()
+        if reference_class is None:
+            from stackholm.storages.reference.reference_state import (
+                ReferenceState,
+            )
+            reference_class = ReferenceState
+        self.engines = dict(engines)
+        self.reference_class = reference_class
+        self.seed = seed
+        self.keys = tuple(keys)
+        self.max_depth = max_depth
+        self.rng = random.Random(seed)
+        self.reference = reference_class()
+        self.states = {name: engine() for name, engine in self.engines.items()}
+        self.frames = []
+        self.history = []
+
+    def _get_context_index(
+        self,
+        frame_position: int,
+    ) -> int:
+        return sum(1 for kind, _, _ in self.frames[:frame_position] if kind == _CONTEXT_FRAME)
+
+    def _get_context_positions(
+        self,
+        key: Optional[str] = None,
+    ) -> List[int]:
+        return [
+            position
+            for position, (kind, _, keys) in enumerate(self.frames)
+            if kind == _CONTEXT_FRAME and (key is None or key in keys)
+        ]
+
+    def _choose_operation(self) -> Tuple[str, Callable[[State], Any]]:
+        rng = self.rng
+        frames = self.frames
+        key = rng.choice(self.keys)
+        top_kind = frames[-1][0] if frames else None
+        roll = rng.random()
+
+        if not frames or (roll < 0.2 and len(frames) < self.max_depth):
+            context = Context()
+            keys = {candidate for candidate in self.keys if rng.random() < 0.3}
+            frames.append((_CONTEXT_FRAME, context, keys))
+            ordered_keys = sorted(keys)
+            return (
+                f'push_context_with_checkpoints(<context>, {ordered_keys!r})',
+                lambda state: state.push_context_with_checkpoints(context, ordered_keys),
+            )
+
+        if roll < 0.25 and len(frames) < self.max_depth:
+            frames.append((_ELIDED_FRAME, None, set()))
+            return 'push_elided_frame()', lambda state: state.push_elided_frame()
+
+        if top_kind == _ELIDED_FRAME:
+            if roll < 0.6:
+                frames.pop()
+                return 'pop_elided_frame()', lambda state: state.pop_elided_frame()
+            context = Context()
+            frames[-1] = (_CONTEXT_FRAME, context, set())
+            return (
+                'materialize_elided_frame(<context>)',
+                lambda state: state.materialize_elided_frame(context),
+            )
+
+        index = self._get_context_index(len(frames) - 1)
+        _, _, top_keys = frames[-1]
+
+        if roll < 0.4:
+            top_keys.add(key)
+            return f'add_checkpoint({key!r}, {index})', lambda state: state.add_checkpoint(key, index)
+
+        if roll < 0.55:
+            positions = self._get_context_positions(key)
+            if positions:
+                position = positions[-1] if rng.random() < 0.7 else rng.choice(positions)
+                frames[position][2].discard(key)
+                key_index = self._get_context_index(position)
+                return (
+                    f'remove_checkpoint({key!r}, {key_index})',
+                    lambda state: state.remove_checkpoint(key, key_index),
+                )
+
+        if roll < 0.7:
+            frames.pop()
+            ordered_keys = sorted(top_keys)
+            return (
+                f'pop_context_with_checkpoints({index}, {ordered_keys!r})',
+                lambda state: state.pop_context_with_checkpoints(index, ordered_keys),
+            )
+
+        if roll < 0.8 and index > 0:
+            frames.pop()
+            target_position = self._get_context_positions()[-1]
+            target_keys = frames[target_position][2]
+            ordered_keys = sorted(top_keys)
+            ordered_target_keys = frozenset(target_keys)
+            target_keys.update(top_keys)
+            return (
+                f'merge_context({index}, {ordered_keys!r}, {index - 1}, {sorted(ordered_target_keys)!r})',
+                lambda state: state.merge_context(index, ordered_keys, index - 1, ordered_target_keys),
+            )
+
+        return f'get_nearest_checkpoint({key!r})', lambda state: state.get_nearest_checkpoint(key)
+
+    def _observe(
+        self,
+        state: State,
+    ) -> List[Tuple[str, Any]]:
+        observations: List[Tuple[str, Any]] = [
+            ('get_last_context()', state.get_last_context()),
+            ('get_elided_depth()', state.get_elided_depth()),
+            ('get_contexts()', list(state.get_contexts())),
+        ]
+        for key in self.keys:
+            observations.append((f'get_nearest_checkpoint({key!r})', state.get_nearest_checkpoint(key)))
+        return observations
+
+    def step(self) -> Optional[Mismatch]:
+        description, operation = self._choose_operation()
+        self.history.append(description)
+        operation_number = len(self.history)
+        expected = operation(self.reference)
+        expected_observations = self._observe(self.reference)
+        for name, state in self.states.items():
+            try:
+                actual = operation(state)
+            except Exception as exception:
+                return Mismatch(name, self.seed, operation_number, description, expected, exception, self.history)
+            if not _is_same_result(expected, actual):
+                return Mismatch(name, self.seed, operation_number, description, expected, actual, self.history)
+            try:
+                actual_observations = self._observe(state)
+            except Exception as exception:
+                return Mismatch(name, self.seed, operation_number, description, None, exception, self.history)
+            for (observation, expected_value), (_, actual_value) in zip(expected_observations, actual_observations):
+                if not _is_same_result(expected_value, actual_value):
+                    return Mismatch(
+                        name,
+                        self.seed,
+                        operation_number,
+                        f'{observation} after {description}',
+                        expected_value,
+                        actual_value,
+                        self.history,
+                    )
+        return None
+
+    def run(
+        self,
+        operations: int,
+    ) -> Optional[Mismatch]:
+        for _ in range(operations):
+            mismatch = self.step()
+            if mismatch is not None:
+                return mismatch
+        return None
+
+
+class FuzzReport:
+
+    runs: int
+
+    operations: int
+
+    mismatches: List[Mismatch]
+
+    def __init__(
+        self,
+        runs: int,
+        operations: int,
+        mismatches: Sequence[Mismatch],
+    ) -> None:
+        self.runs = runs
+        self.operations = operations
+        self.mismatches = list(mismatches)
+
+    @property
+    def is_consistent(self) -> bool:
+        return not self.mismatches
+
+    def format(self) -> str:
+        return f'{self.runs} runs, {self.operations} operations, {len(self.mismatches)} mismatches'
+
+
+def run_differential_fuzz(
+    engines: Optional[Dict[str, Callable[[], State]]] = None,
+    runs: int = 100,
+    operations: int = 200,
+    seed: int = 0,
+    keys: Sequence[str] = DEFAULT_KEYS,
+    max_depth: int = 8,
+) -> FuzzReport:
+    mismatches: List[Mismatch] = []
+    total_operations = 0
+    for run_seed in range(seed, seed + runs):
+        fuzzer = DifferentialFuzzer(engines, seed=run_seed, keys=keys, max_depth=max_depth)
+        mismatch = fuzzer.run(operations)
+        total_operations += len(fuzzer.history)
+        if mismatch is not None:
+            mismatches.append(mismatch)
+    return FuzzReport(runs, total_operations, mismatches)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from importlib import import_module
+
+    parser = argparse.ArgumentParser(
+        prog='python -m stackholm.fuzzing',
+        description='Compare State engines against the reference implementation.',
+    )
+    parser.add_argument(
+        '--engine',
+        action='append',
+        default=[],
+        help='Dotted path of a State class, can be repeated. Defaults to the bundled engines.',
+    )
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-depth', type=int, default=8)
+    arguments = parser.parse_args(argv)
+
+    engines: Optional[Dict[str, Callable[[], State]]] = None
+    if arguments.engine:
+        engines = {}
+        for engine_path in arguments.engine:
+            module_name, _, attribute = engine_path.rpartition('.')
+            engines[attribute] = getattr(import_module(module_name), attribute)
+
+    report = run_differential_fuzz(
+        engines,
+        runs=arguments.runs,
+        operations=arguments.operations,
+        seed=arguments.seed,
+        max_depth=arguments.max_depth,
+    )
+    print(report.format())
+    for mismatch in report.mismatches[:10]:
+        print(f'  {mismatch.format()}')
+        for description in mismatch.history[-10:]:
+            print(f'    {description}')
+    return 0 if report.is_consistent else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+import logging
+from time import monotonic
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
+from weakref import WeakKeyDictionary
+
+from stackholm.context import Context
+from stackholm.state import State
+
+
+__all__ = (
+    'RESERVED_KEY_PREFIX',
+    'CheckpointValuesCache',
+    'CheckpointLogFilter',
+    'CheckpointLogRecordFactory',
+    'install_log_record_factory',
+)
+
+
+LogRecordFactory = Callable[..., logging.LogRecord]
+
+
+RESERVED_KEY_PREFIX = 'checkpoint_'
+
+_RESERVED_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord('', logging.NOTSET, '', 0, '', (), None).__dict__,
+) | frozenset((
+    'message',
+    'asctime',
+))
+
+
+class CheckpointValuesCache:
+
+    context_class: Type[Context]
+
+    keys: Tuple[str, ...]
+
+    _entries: 'WeakKeyDictionary[State, Tuple[int, Mapping[str, Any], Optional[float]]]'
+
+    def __init__(
+        self,
+        context_class: Type[Context],
+        keys: Iterable[str],
+    ) -> None:
+        self.context_class = context_class
+        self.keys = tuple(keys)
+        self._entries = WeakKeyDictionary()
+
+    def _extract(self) -> Tuple[Mapping[str, Any], Optional[float]]:
+        get_nearest_checkpoint = self.context_class.get_nearest_checkpoint
+        values: Dict[str, Any] = {}
+        expires_at: Optional[float] = None
+        for key in self.keys:
+            context = get_nearest_checkpoint(key)
+            if context is None:
+                values[key] = None
+                continue
+            values[key] = context._checkpoint_data.get(key)
+            expirations = context._checkpoint_expirations
+            if expirations is not None:
+                key_expires_at = expirations.get(key)
+                if key_expires_at is not None and (expires_at is None or key_expires_at < expires_at):
+                    expires_at = key_expires_at
+        return MappingProxyType(values), expires_at
+
+    def extract(self) -> Mapping[str, Any]:
+        return self._extract()[0]
+
+    def get(self) -> Mapping[str, Any]:
+        state = self.context_class._storage.state
+        version: Optional[int] = getattr(state, 'version', None)
+        if version is None:
+            return self.extract()
+        entry = self._entries.get(state)
+        if entry is not None and entry[0] == version and (entry[2] is None or monotonic() < entry[2]):
+            return entry[1]
+        values, expires_at = self._extract()
+        self._entries[state] = (getattr(state, 'version'), values, expires_at)
+        return values
+
+
+def _get_flattened_names(keys: Iterable[str]) -> Dict[str, str]:
+    return {
+        key: RESERVED_KEY_PREFIX + key if key in _RESERVED_RECORD_ATTRIBUTES else key
+        for key in keys
+    }
+
+
+def _attach_values(
+    record: logging.LogRecord,
+    values: Mapping[str, Any],
+    attribute_name: Optional[str],
+    flattened_names: Optional[Dict[str, str]],
+) -> None:
+    if attribute_name is not None:
+        setattr(record, attribute_name, values)
+    if flattened_names is not None:
+        record_data = record.__dict__
+        for key, value in values.items():
+            record_data[flattened_names[key]] = value
+
+
+class CheckpointLogFilter(logging.Filter):
+
+    cache: CheckpointValuesCache
+
+    attribute_name: Optional[str]
+
+    flatten: bool
+
+    flattened_names: Optional[Dict[str, str]]
+
+    def __init__(
+        self,
+        context_class: Type[Context],
+        keys: Iterable[str],
+        attribute_name: Optional[str] = 'checkpoint_values',
+        flatten: bool = False,
+        name: str = '',
+    ) -> None:
+        super(CheckpointLogFilter, self).__init__(name)
+        self.cache = CheckpointValuesCache(context_class, keys)
+        self.attribute_name = attribute_name
+        self.flatten = flatten
+        self.flattened_names = _get_flattened_names(self.cache.keys) if flatten else None
+
+    def filter(
+        self,
+        record: logging.LogRecord,
+    ) -> bool:
+        _attach_values(record, self.cache.get(), self.attribute_name, self.flattened_names)
+        return True
+
+
+class CheckpointLogRecordFactory:
+
+    cache: CheckpointValuesCache
+
+    previous_factory: LogRecordFactory
+
+    attribute_name: Optional[str]
+
+    flatten: bool
+
+    flattened_names: Optional[Dict[str, str]]
+
+    def __init__(
+        self,
+        context_class: Type[Context],
+        keys: Iterable[str],
+        previous_factory: Optional[LogRecordFactory] = None,
+        attribute_name: Optional[str] = 'checkpoint_values',
+        flatten: bool = False,
+    ) -> None:
+        self.cache = CheckpointValuesCache(context_class, keys)
+        self.previous_factory = previous_factory or logging.getLogRecordFactory()
+        self.attribute_name = attribute_name
+        self.flatten = flatten
+        self.flattened_names = _get_flattened_names(self.cache.keys) if flatten else None
+
+    def __call__(
+        self,
+        *args: Any,
+        **kwargs: Any,
+    ) -> logging.LogRecord:
+        record = self.previous_factory(*args, **kwargs)
+        _attach_values(record, self.cache.get(), self.attribute_name, self.flattened_names)
+        return record
+
+
+def install_log_record_factory(
+    context_class: Type[Context],
+    keys: Iterable[str],
+    attribute_name: Optional[str] = 'checkpoint_values',
+    flatten: bool = False,
+) -> CheckpointLogRecordFactory:
+    factory = CheckpointLogRecordFactory(
+        context_class,
+        keys,
+        attribute_name=attribute_name,
+        flatten=flatten,
+    )
+    logging.setLogRecordFactory(factory)
+    return factory
@@ -0,0 +1,318 @@
+import random
+import sys
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from stackholm.context import Context
+from stackholm.storage import (
+    Storage,
+    get_storages,
+)
+
+
+__all__ = (
+    'DEFAULT_MAX_SIZE_DEPTH',
+    'StateMemoryUsage',
+    'MemoryReport',
+    'create_memory_report',
+    'create_process_memory_report',
+)
+
+
+DEFAULT_MAX_SIZE_DEPTH = 3
+
+
+class StateMemoryUsage:
+
+    state_id: int
+
+    frames: int
+
+    checkpoint_entries: int
+
+    index_entries: int
+
+    elided_frames: int
+
+    owner: Optional[str]
+
+    retained_bytes: int
+
+    def __init__(
+        self,
+        state_id: int,
+        frames: int,
+        checkpoint_entries: int,
+        index_entries: int = 0,
+        elided_frames: int = 0,
+        owner: Optional[str] = None,
+    ) -> None:
+        self.state_id = state_id
+        self.frames = frames
+        self.checkpoint_entries = checkpoint_entries
+        self.index_entries = index_entries
+        self.elided_frames = elided_frames
+        self.owner = owner
+        self.retained_bytes = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'state_id': self.state_id,
+            'owner': self.owner,
+            'frames': self.frames,
+            'checkpoint_entries': self.checkpoint_entries,
+            'index_entries': self.index_entries,
+            'elided_frames': self.elided_frames,
+            'retained_bytes': self.retained_bytes,
+        }
+
+
+class MemoryReport:
+
+    storages: int
+
+    live_states: int
+
+    frames: int
+
+    sampled_frames: int
+
+    checkpoint_keys: int
+
+    checkpoint_entries: int
+
+    block_entries: int
+
+    elided_frames: int
+
+    index_entries: Dict[str, int]
+
+    max_index_lengths: Dict[str, int]
+
+    checkpoint_bytes: Dict[str, int]
+
+    block_bytes: Dict[str, int]
+
+    states: List[StateMemoryUsage]
+
+    def __init__(self) -> None:
+        self.storages = 0
+        self.live_states = 0
+        self.frames = 0
+        self.sampled_frames = 0
+        self.checkpoint_keys = 0
+        self.checkpoint_entries = 0
+        self.block_entries = 0
+        self.elided_frames = 0
+        self.index_entries = {}
+        self.max_index_lengths = {}
+        self.checkpoint_bytes = {}
+        self.block_bytes = {}
+        self.states = []
+
+    @property
+    def is_sampled(self) -> bool:
+        return self.sampled_frames < self.frames
+
+    @property
+    def retained_bytes(self) -> int:
+        return sum(self.checkpoint_bytes.values()) + sum(self.block_bytes.values())
+
+    def get_top_keys(
+        self,
+        limit: int = 10,
+    ) -> List[Tuple[str, int]]:
+        sizes: Dict[str, int] = dict(self.checkpoint_bytes)
+        for key, size in self.block_bytes.items():
+            sizes[key] = sizes.get(key, 0) + size
+        return sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def merge(
+        self,
+        report: 'MemoryReport',
+    ) -> None:
+        self.storages += report.storages
+        self.live_states += report.live_states
+        self.frames += report.frames
+        self.sampled_frames += report.sampled_frames
+        self.checkpoint_keys += report.checkpoint_keys
+        self.checkpoint_entries += report.checkpoint_entries
+        self.block_entries += report.block_entries
+        self.elided_frames += report.elided_frames
+        _add_index_lengths(self, report.index_entries, report.max_index_lengths)
+        for key, size in report.checkpoint_bytes.items():
+            self.checkpoint_bytes[key] = self.checkpoint_bytes.get(key, 0) + size
+        for key, size in report.block_bytes.items():
+            self.block_bytes[key] = self.block_bytes.get(key, 0) + size
+        self.states.extend(report.states)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'storages': self.storages,
+            'live_states': self.live_states,
+            'frames': self.frames,
+            'sampled_frames': self.sampled_frames,
+            'checkpoint_keys': self.checkpoint_keys,
+            'checkpoint_entries': self.checkpoint_entries,
+            'block_entries': self.block_entries,
+            'elided_frames': self.elided_frames,
+            'retained_bytes': self.retained_bytes,
+            'checkpoint_bytes': dict(self.checkpoint_bytes),
+            'block_bytes': dict(self.block_bytes),
+            'index_entries': dict(self.index_entries),
+            'max_index_lengths': dict(self.max_index_lengths),
+            'states': [state.to_dict() for state in self.states],
+        }
+
+
+def _add_index_lengths(
+    report: MemoryReport,
+    index_entries: Dict[str, int],
+    max_index_lengths: Dict[str, int],
+) -> None:
+    for key, count in index_entries.items():
+        report.index_entries[key] = report.index_entries.get(key, 0) + count
+    for key, length in max_index_lengths.items():
+        if length > report.max_index_lengths.get(key, 0):
+            report.max_index_lengths[key] = length
+
+
+def _get_size(
+    value: Any,
+    seen: Set[int],
+    depth: int,
+) -> int:
+    value_id = id(value)
+    if value_id in seen:
+        return 0
+    seen.add(value_id)
+    size = sys.getsizeof(value, 0)
+    if depth <= 0:
+        return size
+    if isinstance(value, dict):
+        for key, item in list(value.items()):
+            size += _get_size(key, seen, depth - 1)
+            size += _get_size(item, seen, depth - 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in list(value):
+            size += _get_size(item, seen, depth - 1)
+    return size
+
+
+def _add_sizes(
+    sizes: Dict[str, int],
+    data: Dict[str, Any],
+    seen: Set[int],
+    scale: float,
+    max_depth: int,
+) -> int:
+    total = 0
+    for key, value in list(data.items()):
+        size = int(_get_size(value, seen, max_depth) * scale)
+        sizes[key] = sizes.get(key, 0) + size
+        total += size
+    return total
+
+
+def _scale_report(
+    report: MemoryReport,
+    scale: float,
+) -> None:
+    report.frames = int(report.frames * scale)
+    report.checkpoint_entries = int(report.checkpoint_entries * scale)
+    report.block_entries = int(report.block_entries * scale)
+    report.elided_frames = int(report.elided_frames * scale)
+    for sizes in (report.index_entries, report.checkpoint_bytes, report.block_bytes):
+        for key, value in sizes.items():
+            sizes[key] = int(value * scale)
+
+
+def _measure_contexts(
+    report: MemoryReport,
+    usage: StateMemoryUsage,
+    contexts: List[Context],
+    seen: Set[int],
+    scale: float,
+    max_depth: int,
+) -> None:
+    checkpoint_entries = 0
+    block_entries = 0
+    for context in contexts:
+        checkpoint_entries += len(context._checkpoint_data)
+        block_entries += len(context._block_data)
+        usage.retained_bytes += _add_sizes(report.checkpoint_bytes, context._checkpoint_data, seen, scale, max_depth)
+        usage.retained_bytes += _add_sizes(report.block_bytes, context._block_data, seen, scale, max_depth)
+    usage.checkpoint_entries = int(checkpoint_entries * scale)
+    report.checkpoint_entries += usage.checkpoint_entries
+    report.block_entries += int(block_entries * scale)
+
+
+def create_memory_report(
+    storage: Storage,
+    sample_size: Optional[int] = None,
+    max_depth: int = DEFAULT_MAX_SIZE_DEPTH,
+) -> MemoryReport:
+    report = MemoryReport()
+    report.storages = 1
+    states = storage.get_states()
+    report.live_states = len(states)
+    if sample_size is not None:
+        states = random.sample(states, len(states))
+    keys: Set[str] = set()
+    seen_contexts: Set[int] = set()
+    seen: Set[int] = set()
+    measured_states = 0
+    for state in states:
+        if sample_size is not None and report.sampled_frames >= sample_size:
+            break
+        measured_states += 1
+        contexts = list(state.get_contexts())
+        new_contexts = [context for context in contexts if id(context) not in seen_contexts]
+        seen_contexts.update(id(context) for context in new_contexts)
+        keys.update(list(state.get_checkpoint_keys()))
+        index_lengths = state.get_checkpoint_index_lengths()
+        _add_index_lengths(report, index_lengths, index_lengths)
+        elided_frames = state.get_elided_frame_count()
+        usage = StateMemoryUsage(
+            id(state),
+            len(contexts),
+            0,
+            index_entries=sum(index_lengths.values()),
+            elided_frames=elided_frames,
+            owner=storage.get_state_owner(state),
+        )
+        report.states.append(usage)
+        report.frames += len(new_contexts)
+        report.elided_frames += elided_frames
+        scale = 1.0
+        if sample_size is not None and len(new_contexts) > sample_size - report.sampled_frames:
+            sampled_contexts = random.sample(new_contexts, sample_size - report.sampled_frames)
+            scale = len(new_contexts) / len(sampled_contexts) if sampled_contexts else 0.0
+        else:
+            sampled_contexts = new_contexts
+        report.sampled_frames += len(sampled_contexts)
+        _measure_contexts(report, usage, sampled_contexts, seen, scale, max_depth)
+    report.checkpoint_keys = len(keys)
+    if measured_states < report.live_states:
+        _scale_report(report, report.live_states / measured_states if measured_states else 0.0)
+    report.states.sort(key=lambda usage: usage.retained_bytes, reverse=True)
+    return report
+
+
+def create_process_memory_report(
+    storages: Optional[Iterable[Storage]] = None,
+    sample_size: Optional[int] = None,
+    max_depth: int = DEFAULT_MAX_SIZE_DEPTH,
+) -> MemoryReport:
+    report = MemoryReport()
+    for storage in (storages if storages is not None else get_storages()):
+        report.merge(create_memory_report(storage, sample_size=sample_size, max_depth=max_depth))
+    report.states.sort(key=lambda usage: usage.retained_bytes, reverse=True)
+    return report
@@ -0,0 +1,382 @@
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+import itertools
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from stackholm.context import Context
+from stackholm.storage import Storage
+from stackholm.storages.optimized_list.optimized_list_state import (
+    OptimizedListState,
+)
+
+
+__all__ = (
+    'DEFAULT_DEPTH_BUCKETS',
+    'StateCounters',
+    'StorageSample',
+    'InstrumentedOptimizedListState',
+    'StorageMetricsCollector',
+)
+
+
+DEFAULT_DEPTH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+_COUNTER_TOKENS = itertools.count()
+
+
+class StateCounters:
+
+    __slots__ = (
+        'token',
+        'lookups',
+        'misses',
+        'peak_depth',
+    )
+
+    token: int
+
+    lookups: int
+
+    misses: int
+
+    peak_depth: int
+
+    def __init__(self) -> None:
+        self.token = next(_COUNTER_TOKENS)
+        self.lookups = 0
+        self.misses = 0
+        self.peak_depth = 0
+
+
+class InstrumentedOptimizedListState(OptimizedListState):
+
+    counters: StateCounters
+
+    def __init__(self) -> None:
+        super(InstrumentedOptimizedListState, self).__init__()
+        self.counters = StateCounters()
+
+    def push_context(
+        self,
+        context: Context,
+    ) -> int:
+        index = super(InstrumentedOptimizedListState, self).push_context(context)
+        if index >= self.counters.peak_depth:
+            self.counters.peak_depth = index + 1
+        return index
+
+    def get_nearest_checkpoint(
+        self,
+        key: str,
+    ) -> Optional[Context]:
+        counters = self.counters
+        counters.lookups += 1
+        context = super(InstrumentedOptimizedListState, self).get_nearest_checkpoint(key)
+        if context is None:
+            counters.misses += 1
+        return context
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class StorageSample:
+
+    live_states: int
+
+    depths: List[int]
+
+    checkpoint_keys: int
+
+    lookups: int
+
+    misses: int
+
+    peak_depth: int
+
+    def __init__(self) -> None:
+        self.live_states = 0
+        self.depths = []
+        self.checkpoint_keys = 0
+        self.lookups = 0
+        self.misses = 0
+        self.peak_depth = 0
+
+
+class _StorageTracker:
+
+    storage: Storage
+
+    counters: Dict[int, StateCounters]
+
+    retired_lookups: int
+
+    retired_misses: int
+
+    peak_depth: int
+
+    depth_bucket_counts: List[int]
+
+    depth_sum: int
+
+    depth_count: int
+
+    last_lookups: int
+
+    last_sampled_at: Optional[float]
+
+    lookups_per_second: float
+
+    def __init__(
+        self,
+        storage: Storage,
+        buckets: Sequence[int],
+    ) -> None:
+        self.storage = storage
+        self.counters = {}
+        self.retired_lookups = 0
+        self.retired_misses = 0
+        self.peak_depth = 0
+        self.depth_bucket_counts = [0] * len(buckets)
+        self.depth_sum = 0
+        self.depth_count = 0
+        self.last_lookups = 0
+        self.last_sampled_at = None
+        self.lookups_per_second = 0.0
+
+
+class StorageMetricsCollector:
+
+    namespace: str
+
+    buckets: Tuple[int, ...]
+
+    _trackers: Dict[str, _StorageTracker]
+
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        storages: Optional[Dict[str, Storage]] = None,
+        namespace: str = 'stackholm',
+        buckets: Sequence[int] = DEFAULT_DEPTH_BUCKETS,
+    ) -> None:
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self._trackers = {}
+        self._lock = threading.Lock()
+        for name, storage in (storages or {}).items():
+            self.register(name, storage)
+
+    def register(
+        self,
+        name: str,
+        storage: Storage,
+    ) -> None:
+        with self._lock:
+            self._trackers[name] = _StorageTracker(storage, self.buckets)
+
+    def unregister(
+        self,
+        name: str,
+    ) -> None:
+        with self._lock:
+            self._trackers.pop(name, None)
+
+    def _sample_tracker(
+        self,
+        tracker: _StorageTracker,
+        now: float,
+    ) -> StorageSample:
+        sample = StorageSample()
+        keys: Set[str] = set()
+        live_counters: Dict[int, StateCounters] = {}
+        for state in tracker.storage.get_states():
+            sample.live_states += 1
+            depth = len(state.get_contexts())
+            sample.depths.append(depth)
+            keys.update(list(state.get_checkpoint_keys()))
+            counters = getattr(state, 'counters', None)
+            if counters is not None:
+                live_counters[counters.token] = counters
+        for token, counters in tracker.counters.items():
+            if token not in live_counters:
+                tracker.retired_lookups += counters.lookups
+                tracker.retired_misses += counters.misses
+        tracker.counters = live_counters
+        sample.checkpoint_keys = len(keys)
+        sample.lookups = tracker.retired_lookups
+        sample.misses = tracker.retired_misses
+        peak_depth = max(sample.depths, default=0)
+        for counters in live_counters.values():
+            sample.lookups += counters.lookups
+            sample.misses += counters.misses
+            peak_depth = max(peak_depth, counters.peak_depth)
+        tracker.peak_depth = max(tracker.peak_depth, peak_depth)
+        sample.peak_depth = tracker.peak_depth
+        for depth in sample.depths:
+            tracker.depth_sum += depth
+            tracker.depth_count += 1
+            for bucket_index, bucket in enumerate(self.buckets):
+                if depth <= bucket:
+                    tracker.depth_bucket_counts[bucket_index] += 1
+        if tracker.last_sampled_at is not None and now > tracker.last_sampled_at:
+            elapsed = now - tracker.last_sampled_at
+            tracker.lookups_per_second = (sample.lookups - tracker.last_lookups) / elapsed
+        tracker.last_lookups = sample.lookups
+        tracker.last_sampled_at = now
+        return sample
+
+    def collect(self) -> Dict[str, StorageSample]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: self._sample_tracker(tracker, now)
+                for name, tracker in self._trackers.items()
+            }
+
+    def render(self) -> str:
+        samples = self.collect()
+        prefix = self.namespace
+        lines: List[str] = []
+
+        def add_metric(
+            name: str,
+            metric_type: str,
+            description: str,
+            values: List[Tuple[str, Dict[str, str], float]],
+        ) -> None:
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+            for suffix, labels, value in values:
+                formatted_labels = ','.join(
+                    f'{label}="{_escape_label_value(label_value)}"'
+                    for label, label_value in labels.items()
+                )
+                lines.append(f'{prefix}_{name}{suffix}{{{formatted_labels}}} {_format_value(value)}')
+
+        def per_storage(getter: Any) -> List[Tuple[str, Dict[str, str], float]]:
+            return [
+                ('', {'storage': name}, getter(name, sample))
+                for name, sample in samples.items()
+            ]
+
+        with self._lock:
+            trackers = dict(self._trackers)
+
+        add_metric(
+            'live_states',
+            'gauge',
+            'Number of live states (threads or tasks holding state).',
+            per_storage(lambda name, sample: sample.live_states),
+        )
+        add_metric(
+            'stack_depth_current',
+            'gauge',
+            'Deepest stack among the live states.',
+            per_storage(lambda name, sample: max(sample.depths, default=0)),
+        )
+        add_metric(
+            'stack_depth_peak',
+            'gauge',
+            'Deepest stack observed since the collector started.',
+            per_storage(lambda name, sample: sample.peak_depth),
+        )
+        add_metric(
+            'checkpoint_keys',
+            'gauge',
+            'Number of distinct checkpoint keys indexed by the live states.',
+            per_storage(lambda name, sample: sample.checkpoint_keys),
+        )
+        add_metric(
+            'lookups_total',
+            'counter',
+            'Checkpoint lookups performed by instrumented states.',
+            per_storage(lambda name, sample: sample.lookups),
+        )
+        add_metric(
+            'lookup_misses_total',
+            'counter',
+            'Checkpoint lookups that found no checkpoint.',
+            per_storage(lambda name, sample: sample.misses),
+        )
+        add_metric(
+            'lookups_per_second',
+            'gauge',
+            'Checkpoint lookup rate between the last two samples.',
+            per_storage(lambda name, sample: trackers[name].lookups_per_second),
+        )
+        add_metric(
+            'lookup_miss_ratio',
+            'gauge',
+            'Ratio of checkpoint lookups that found no checkpoint.',
+            per_storage(lambda name, sample: sample.misses / sample.lookups if sample.lookups else 0),
+        )
+
+        histogram_values: List[Tuple[str, Dict[str, str], float]] = []
+        for name in samples.keys():
+            tracker = trackers[name]
+            for bucket, count in zip(self.buckets, tracker.depth_bucket_counts):
+                histogram_values.append(('_bucket', {'storage': name, 'le': str(bucket)}, count))
+            histogram_values.append(('_bucket', {'storage': name, 'le': '+Inf'}, tracker.depth_count))
+            histogram_values.append(('_sum', {'storage': name}, tracker.depth_sum))
+            histogram_values.append(('_count', {'storage': name}, tracker.depth_count))
+        add_metric(
+            'stack_depth',
+            'histogram',
+            'Stack depth of each live state, observed at every sample.',
+            histogram_values,
+        )
+        lines.append('')
+        return '\n'.join(lines)
+
+    def serve(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+    ) -> ThreadingHTTPServer:
+        collector = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self) -> None:
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = collector.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(
+                self,
+                format: str,
+                *args: Any,
+            ) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        thread = threading.Thread(target=server.serve_forever, name='stackholm-metrics', daemon=True)
+        thread.start()
+        return server
@@ -0,0 +1,551 @@
+import argparse
+from array import array
+from importlib import import_module
+import itertools
+import os
+import struct
+import threading
+from time import perf_counter_ns
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+import weakref
+
+from stackholm.context import Context
+from stackholm.state import State
+
+
+__all__ = (
+    'TRACE_MAGIC',
+    'TRACE_VERSION',
+    'Opcode',
+    'RecordingState',
+    'TraceRecorder',
+    'TraceRecord',
+    'read_trace',
+    'ReplayReport',
+    'TraceReplayer',
+    'main',
+)
+
+
+TRACE_MAGIC = b'SHTR'
+
+TRACE_VERSION = 1
+
+
+class Opcode:
+
+    DEFINE_KEY = 0
+
+    PUSH_CONTEXT = 1
+
+    POP_CONTEXT = 2
+
+    GET_LAST_CONTEXT = 3
+
+    ADD_CHECKPOINT = 4
+
+    REMOVE_CHECKPOINT = 5
+
+    GET_NEAREST_CHECKPOINT = 6
+
+    PUSH_CONTEXT_WITH_CHECKPOINTS = 7
+
+    POP_CONTEXT_WITH_CHECKPOINTS = 8
+
+    MERGE_CONTEXT = 9
+
+    PUSH_ELIDED_FRAME = 10
+
+    POP_ELIDED_FRAME = 11
+
+    MATERIALIZE_ELIDED_FRAME = 12
+
+
+_FILE_HEADER = struct.Struct('<4sB')
+
+_CHUNK_HEADER = struct.Struct('<II')
+
+_RECORD_HEADER = struct.Struct('<BiI')
+
+_KEY_RECORD = struct.Struct('<BiII')
+
+
+class RecordingState(State):
+
+    inner: State
+
+    state_id: int
+
+    _recorder: 'TraceRecorder'
+
+    _buffer: bytearray
+
+    _key_ids: Dict[str, int]
+
+    def __init__(
+        self,
+        inner: State,
+        recorder: 'TraceRecorder',
+        state_id: int,
+    ) -> None:
+        self.inner = inner
+        self.state_id = state_id
+        self._recorder = recorder
+        self._buffer = bytearray()
+        self._key_ids = {}
+
+    def __getattr__(
+        self,
+        name: str,
+    ) -> Any:
+        if name == 'inner':
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def fork(self) -> 'RecordingState':
+        return self._recorder._wrap_state(self.inner.fork())
+
+    def _get_key_id(
+        self,
+        key: str,
+    ) -> int:
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self._key_ids)
+            self._key_ids[key] = key_id
+            encoded_key = key.encode('utf-8')
+            self._buffer += _RECORD_HEADER.pack(Opcode.DEFINE_KEY, key_id, len(encoded_key)) + encoded_key
+        return key_id
+
+    def _record(
+        self,
+        opcode: int,
+        index: int,
+    ) -> None:
+        buffer = self._buffer
+        buffer += _RECORD_HEADER.pack(opcode, index, 0)
+        if len(buffer) >= self._recorder.buffer_size:
+            self.flush()
+
+    def _record_key(
+        self,
+        opcode: int,
+        index: int,
+        key: str,
+    ) -> None:
+        buffer = self._buffer
+        buffer += _KEY_RECORD.pack(opcode, index, 1, self._get_key_id(key))
+        if len(buffer) >= self._recorder.buffer_size:
+            self.flush()
+
+    def _record_keys(
+        self,
+        opcode: int,
+        index: int,
+        keys: Iterable[Any],
+    ) -> None:
+        key_ids = array('I', (self._get_key_id(key) if isinstance(key, str) else key for key in keys))
+        buffer = self._buffer
+        buffer += _RECORD_HEADER.pack(opcode, index, len(key_ids)) + key_ids.tobytes()
+        if len(buffer) >= self._recorder.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._recorder._write_chunk(self.state_id, self._buffer)
+
+    def push_context(
+        self,
+        context: Context,
+    ) -> int:
+        index = self.inner.push_context(context)
+        self._record(Opcode.PUSH_CONTEXT, index)
+        return index
+
+    def pop_context(
+        self,
+        index: int = -1,
+    ) -> Optional[Context]:
+        self._record(Opcode.POP_CONTEXT, index)
+        return self.inner.pop_context(index)
+
+    def get_last_context(self) -> Optional[Context]:
+        self._record(Opcode.GET_LAST_CONTEXT, 0)
+        return self.inner.get_last_context()
+
+    def add_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        self._record_key(Opcode.ADD_CHECKPOINT, context_index, key)
+        self.inner.add_checkpoint(key, context_index)
+
+    def remove_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        self._record_key(Opcode.REMOVE_CHECKPOINT, context_index, key)
+        self.inner.remove_checkpoint(key, context_index)
+
+    def get_nearest_checkpoint(
+        self,
+        key: str,
+    ) -> Optional[Context]:
+        self._record_key(Opcode.GET_NEAREST_CHECKPOINT, 0, key)
+        return self.inner.get_nearest_checkpoint(key)
+
+    def push_context_with_checkpoints(
+        self,
+        context: Context,
+        keys: Iterable[str],
+    ) -> int:
+        keys = tuple(keys)
+        index = self.inner.push_context_with_checkpoints(context, keys)
+        self._record_keys(Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS, index, keys)
+        return index
+
+    def pop_context_with_checkpoints(
+        self,
+        index: int,
+        keys: Iterable[str],
+    ) -> Optional[Context]:
+        keys = tuple(keys)
+        self._record_keys(Opcode.POP_CONTEXT_WITH_CHECKPOINTS, index, keys)
+        return self.inner.pop_context_with_checkpoints(index, keys)
+
+    def merge_context(
+        self,
+        index: int,
+        keys: Iterable[str],
+        target_index: int,
+        target_keys: Collection[str],
+    ) -> Optional[Context]:
+        keys = tuple(keys)
+        merged_target_keys = tuple(key for key in keys if key in target_keys)
+        self._record_keys(
+            Opcode.MERGE_CONTEXT,
+            index,
+            itertools.chain((target_index, len(keys)), keys, merged_target_keys),
+        )
+        return self.inner.merge_context(index, keys, target_index, target_keys)
+
+    def push_elided_frame(self) -> None:
+        self._record(Opcode.PUSH_ELIDED_FRAME, 0)
+        self.inner.push_elided_frame()
+
+    def pop_elided_frame(self) -> bool:
+        self._record(Opcode.POP_ELIDED_FRAME, 0)
+        return self.inner.pop_elided_frame()
+
+    def get_elided_depth(self) -> int:
+        return self.inner.get_elided_depth()
+
+    def materialize_elided_frame(
+        self,
+        context: Context,
+    ) -> int:
+        index = self.inner.materialize_elided_frame(context)
+        self._record(Opcode.MATERIALIZE_ELIDED_FRAME, index)
+        return index
+
+    def get_contexts(self) -> Sequence[Context]:
+        return self.inner.get_contexts()
+
+    def get_checkpoint_keys(self) -> Collection[str]:
+        return self.inner.get_checkpoint_keys()
+
+    def get_checkpoint_index_lengths(self) -> Dict[str, int]:
+        return self.inner.get_checkpoint_index_lengths()
+
+    def get_elided_frame_count(self) -> int:
+        return self.inner.get_elided_frame_count()
+
+    def bump_version(self) -> None:
+        self.inner.bump_version()
+
+    def is_inherited_frame(
+        self,
+        index: int,
+    ) -> bool:
+        return self.inner.is_inherited_frame(index)
+
+
+class TraceRecorder:
+
+    buffer_size: int
+
+    state_class: Callable[[], State]
+
+    _file: BinaryIO
+
+    _owns_file: bool
+
+    _lock: threading.Lock
+
+    _state_ids: Iterator[int]
+
+    _states: 'weakref.WeakSet[RecordingState]'
+
+    def __init__(
+        self,
+        file: Union[str, 'os.PathLike[str]', BinaryIO],
+        state_class: Optional[Callable[[], State]] = None,
+        buffer_size: int = 64 * 1024,
+    ) -> None:
+        if isinstance(file, (str, os.PathLike)):
+            self._file = open(file, 'wb')
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+        if state_class is None:
+            from stackholm.storages.optimized_list.optimized_list_state import (
+                OptimizedListState,
+            )
+            state_class = OptimizedListState
+        self.state_class = state_class
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._state_ids = itertools.count()
+        self._states = weakref.WeakSet()
+        self._file.write(_FILE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION))
+
+    def create_state(self) -> RecordingState:
+        return self._wrap_state(self.state_class())
+
+    def _wrap_state(
+        self,
+        inner: State,
+    ) -> RecordingState:
+        state = RecordingState(inner, self, next(self._state_ids))
+        weakref.finalize(state, self._write_chunk, state.state_id, state._buffer)
+        self._states.add(state)
+        return state
+
+    def _write_chunk(
+        self,
+        state_id: int,
+        buffer: bytearray,
+    ) -> None:
+        if not buffer:
+            return
+        with self._lock:
+            if self._file.closed:
+                return
+            data = bytes(buffer)
+            del buffer[:len(data)]
+            if not data:
+                return
+            self._file.write(_CHUNK_HEADER.pack(state_id, len(data)))
+            self._file.write(data)
+
+    def flush(self) -> None:
+        for state in list(self._states):
+            state.flush()
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> 'TraceRecorder':
+        return self
+
+    def __exit__(
+        self,
+        *args: Any,
+    ) -> None:
+        self.close()
+
+
+TraceRecord = Tuple[int, int, int, Tuple[Any, ...]]
+
+
+def read_trace(data: Union[bytes, bytearray, memoryview]) -> Iterator[TraceRecord]:
+    buffer = memoryview(data)
+    magic, version = _FILE_HEADER.unpack_from(buffer, 0)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError('Unsupported trace file.')
+    offset = _FILE_HEADER.size
+    keys: Dict[Tuple[int, int], str] = {}
+    while offset < len(buffer):
+        state_id, size = _CHUNK_HEADER.unpack_from(buffer, offset)
+        offset += _CHUNK_HEADER.size
+        end = offset + size
+        while offset < end:
+            opcode, index, count = _RECORD_HEADER.unpack_from(buffer, offset)
+            offset += _RECORD_HEADER.size
+            if opcode == Opcode.DEFINE_KEY:
+                keys[(state_id, index)] = str(buffer[offset:offset + count], 'utf-8')
+                offset += count
+                continue
+            values = struct.unpack_from(f'<{count}I', buffer, offset)
+            offset += count * 4
+            if opcode == Opcode.MERGE_CONTEXT:
+                target_index, keys_count = values[0], values[1]
+                key_names = tuple(keys[(state_id, key_id)] for key_id in values[2:])
+                values = (target_index, key_names[:keys_count], key_names[keys_count:])
+            else:
+                values = tuple(keys[(state_id, key_id)] for key_id in values)
+            yield state_id, opcode, index, values
+
+
+class ReplayReport:
+
+    state_class: str
+
+    states: int
+
+    operations: int
+
+    duration: float
+
+    def __init__(
+        self,
+        state_class: str,
+        states: int,
+        operations: int,
+        duration: float,
+    ) -> None:
+        self.state_class = state_class
+        self.states = states
+        self.operations = operations
+        self.duration = duration
+
+    @property
+    def operations_per_second(self) -> float:
+        if self.duration <= 0:
+            return 0.0
+        return self.operations / self.duration
+
+    def format(self) -> str:
+        return (
+            f'{self.state_class}: {self.states} states, {self.operations} operations'
+            f' in {self.duration:.3f}s, {self.operations_per_second:,.0f} ops/s'
+        )
+
+
+def _create_context() -> Context:
+    context = Context.__new__(Context)
+    Context.__init__(context)
+    return context
+
+
+class TraceReplayer:
+
+    records: List[TraceRecord]
+
+    def __init__(
+        self,
+        trace: Union[str, 'os.PathLike[str]', bytes, bytearray, memoryview],
+    ) -> None:
+        if isinstance(trace, (str, os.PathLike)):
+            with open(trace, 'rb') as file:
+                trace = file.read()
+        self.records = list(read_trace(trace))
+
+    def _compile(
+        self,
+        state_class: Callable[[], State],
+    ) -> Tuple[int, List[Tuple[Callable[..., Any], Tuple[Any, ...]]]]:
+        states: Dict[int, State] = {}
+        operations: List[Tuple[Callable[..., Any], Tuple[Any, ...]]] = []
+        for state_id, opcode, index, values in self.records:
+            state = states.get(state_id)
+            if state is None:
+                state = states[state_id] = state_class()
+            if opcode == Opcode.PUSH_CONTEXT:
+                operations.append((state.push_context, (_create_context(),)))
+            elif opcode == Opcode.POP_CONTEXT:
+                operations.append((state.pop_context, (index,)))
+            elif opcode == Opcode.GET_LAST_CONTEXT:
+                operations.append((state.get_last_context, ()))
+            elif opcode == Opcode.ADD_CHECKPOINT:
+                operations.append((state.add_checkpoint, (values[0], index)))
+            elif opcode == Opcode.REMOVE_CHECKPOINT:
+                operations.append((state.remove_checkpoint, (values[0], index)))
+            elif opcode == Opcode.GET_NEAREST_CHECKPOINT:
+                operations.append((state.get_nearest_checkpoint, (values[0],)))
+            elif opcode == Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS:
+                operations.append((state.push_context_with_checkpoints, (_create_context(), values)))
+            elif opcode == Opcode.POP_CONTEXT_WITH_CHECKPOINTS:
+                operations.append((state.pop_context_with_checkpoints, (index, values)))
+            elif opcode == Opcode.MERGE_CONTEXT:
+                target_index, keys, target_keys = values
+                operations.append((state.merge_context, (index, keys, target_index, frozenset(target_keys))))
+            elif opcode == Opcode.PUSH_ELIDED_FRAME:
+                operations.append((state.push_elided_frame, ()))
+            elif opcode == Opcode.POP_ELIDED_FRAME:
+                operations.append((state.pop_elided_frame, ()))
+            elif opcode == Opcode.MATERIALIZE_ELIDED_FRAME:
+                operations.append((state.materialize_elided_frame, (_create_context(),)))
+            else:
+                raise ValueError(f'Unknown opcode: {opcode}.')
+        return len(states), operations
+
+    def replay(
+        self,
+        state_class: Optional[Type[State]] = None,
+    ) -> ReplayReport:
+        if state_class is None:
+            from stackholm.storages.optimized_list.optimized_list_state import (
+                OptimizedListState,
+            )
+            state_class = OptimizedListState
+        states, operations = self._compile(state_class)
+        start = perf_counter_ns()
+        for function, args in operations:
+            function(*args)
+        duration = (perf_counter_ns() - start) / 1e9
+        return ReplayReport(state_class.__qualname__, states, len(operations), duration)
+
+
+def _import_state_class(path: str) -> Type[State]:
+    module_name, _, attribute = path.rpartition('.')
+    if ':' in path:
+        module_name, attribute = path.split(':', 1)
+    return getattr(import_module(module_name), attribute)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m stackholm.recording',
+        description='Replay a recorded storage trace against State implementations.',
+    )
+    parser.add_argument('trace')
+    parser.add_argument(
+        '--state',
+        action='append',
+        default=[],
+        help='Dotted path of a State class, can be repeated.',
+    )
+    parser.add_argument('--repeat', type=int, default=1)
+    arguments = parser.parse_args(argv)
+    replayer = TraceReplayer(arguments.trace)
+    state_paths = arguments.state or ['stackholm.storages.optimized_list.OptimizedListState']
+    for state_path in state_paths:
+        state_class = _import_state_class(state_path)
+        for _ in range(arguments.repeat):
+            print(replayer.replay(state_class).format())
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
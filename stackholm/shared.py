@@ -0,0 +1,210 @@
+from contextlib import suppress
+import mmap
+import os
+import tempfile
+from typing import (
+    Any,
+    Iterable,
+    Mapping,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+)
+import weakref
+
+from stackholm.context import Context
+from stackholm.wire import (
+    EncodedValue,
+    LazyCheckpointData,
+    decode_checkpoint_values,
+    encode_checkpoint_values,
+    encode_context,
+)
+
+
+__all__ = (
+    'SharedCheckpointData',
+    'SharedCheckpointLayer',
+)
+
+
+CONTEXT_T = TypeVar('CONTEXT_T', bound=Context)
+
+LAYER_T = TypeVar('LAYER_T', bound='SharedCheckpointLayer')
+
+PathLike = Union[str, 'os.PathLike[str]']
+
+
+def _get_default_directory() -> str:
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+def _write_layer(
+    data: bytes,
+    path: Optional[PathLike],
+) -> str:
+    if path is None:
+        descriptor, path = tempfile.mkstemp(prefix='stackholm-', suffix='.layer', dir=_get_default_directory())
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        return path
+    path = os.fspath(path)
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(temporary_path)
+        raise
+    return path
+
+
+def _unlink_layer(
+    path: str,
+    owner_pid: int,
+) -> None:
+    if os.getpid() != owner_pid:
+        return
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+class SharedCheckpointData(LazyCheckpointData):
+
+    __slots__ = ()
+
+    def _resolve(
+        self,
+        key: str,
+        value: Any,
+    ) -> Any:
+        if value.__class__ is EncodedValue:
+            return value.decode_once()
+        return value
+
+    def is_decoded(
+        self,
+        key: str,
+    ) -> bool:
+        value = self._data.get(key)
+        return value.__class__ is not EncodedValue or value.is_cached
+
+
+class SharedCheckpointLayer:
+
+    path: str
+
+    data: SharedCheckpointData
+
+    is_owner: bool
+
+    _mmap: Optional[mmap.mmap]
+
+    _finalizer: Optional[weakref.finalize]
+
+    def __init__(
+        self,
+        path: PathLike,
+        is_owner: bool = False,
+        unlink_after_map: bool = False,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.is_owner = is_owner
+        self._finalizer = None
+        if is_owner:
+            self._finalizer = weakref.finalize(self, _unlink_layer, self.path, os.getpid())
+        try:
+            with open(self.path, 'rb') as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            if unlink_after_map:
+                self.unlink()
+        self.data = decode_checkpoint_values(self._mmap, SharedCheckpointData)
+
+    @classmethod
+    def create(
+        cls: Type[LAYER_T],
+        values: Mapping[str, Any],
+        path: Optional[PathLike] = None,
+        unlink_after_map: bool = False,
+    ) -> LAYER_T:
+        return cls(
+            _write_layer(encode_checkpoint_values(values), path),
+            is_owner=True,
+            unlink_after_map=unlink_after_map,
+        )
+
+    @classmethod
+    def create_from_context(
+        cls: Type[LAYER_T],
+        context_class: Type[Context],
+        keys: Iterable[str],
+        path: Optional[PathLike] = None,
+        unlink_after_map: bool = False,
+    ) -> LAYER_T:
+        return cls(
+            _write_layer(encode_context(context_class, keys), path),
+            is_owner=True,
+            unlink_after_map=unlink_after_map,
+        )
+
+    @classmethod
+    def attach(
+        cls: Type[LAYER_T],
+        path: PathLike,
+    ) -> LAYER_T:
+        return cls(path)
+
+    @property
+    def is_closed(self) -> bool:
+        return self._mmap is None
+
+    def get_checkpoint_data(self) -> SharedCheckpointData:
+        return self.data.lazy_copy()
+
+    def create_context(
+        self,
+        context_class: Type[CONTEXT_T],
+    ) -> CONTEXT_T:
+        context = context_class()
+        context._checkpoint_data = self.get_checkpoint_data()  # type: ignore[assignment]
+        return context
+
+    def activate(
+        self,
+        context_class: Type[CONTEXT_T],
+    ) -> CONTEXT_T:
+        context = self.create_context(context_class)
+        context.activate()
+        return context
+
+    def close(self) -> None:
+        if self._mmap is None:
+            return
+        self.data = SharedCheckpointData()
+        mapping, self._mmap = self._mmap, None
+        with suppress(BufferError):
+            mapping.close()
+
+    def unlink(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer()
+            return
+        with suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    def __enter__(self: LAYER_T) -> LAYER_T:
+        return self
+
+    def __exit__(
+        self,
+        *args: Any,
+    ) -> None:
+        self.close()
+        if self.is_owner:
+            self.unlink()
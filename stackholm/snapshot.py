@@ -0,0 +1,107 @@
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+
+__all__ = (
+    'EXCEPTION_CONTEXT_ATTRIBUTE',
+    'INTERNAL_KEY_PREFIX',
+    'CheckpointSnapshot',
+    'add_exception_context_note',
+    'attach_exception_context',
+    'get_exception_context',
+)
+
+
+EXCEPTION_CONTEXT_ATTRIBUTE = '__stackholm_context__'
+
+INTERNAL_KEY_PREFIX = 'stackholm.'
+
+_SUPPORTS_NOTES = hasattr(BaseException, 'add_note')
+
+
+class CheckpointSnapshot:
+
+    __slots__ = (
+        '_frames',
+        '_keys',
+        '_values',
+    )
+
+    _frames: Tuple[Mapping[str, Any], ...]
+
+    _keys: Optional[Tuple[str, ...]]
+
+    _values: Optional[Mapping[str, Any]]
+
+    def __init__(
+        self,
+        frames: Tuple[Mapping[str, Any], ...],
+        keys: Optional[Sequence[str]] = None,
+    ) -> None:
+        self._frames = frames
+        self._keys = tuple(keys) if keys is not None else None
+        self._values = None
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._values is not None
+
+    @property
+    def values(self) -> Mapping[str, Any]:
+        if self._values is None:
+            values: Dict[str, Any] = {}
+            for frame in self._frames:
+                values.update(frame)
+            if self._keys is not None:
+                values = {key: values[key] for key in self._keys if key in values}
+            else:
+                values = {
+                    key: value
+                    for key, value in values.items()
+                    if not key.startswith(INTERNAL_KEY_PREFIX)
+                }
+            self._values = MappingProxyType(values)
+            self._frames = ()
+        return self._values
+
+    def __str__(self) -> str:
+        formatted_values = ', '.join(f'{key}={value!r}' for key, value in self.values.items())
+        return f'stackholm context: {formatted_values}'
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__} {dict(self.values)!r}>'
+
+
+def attach_exception_context(
+    exception: BaseException,
+    frames: Tuple[Mapping[str, Any], ...],
+    keys: Optional[Sequence[str]] = None,
+) -> None:
+    if EXCEPTION_CONTEXT_ATTRIBUTE in exception.__dict__:
+        return
+    exception.__dict__[EXCEPTION_CONTEXT_ATTRIBUTE] = CheckpointSnapshot(frames, keys)
+
+
+def get_exception_context(exception: BaseException) -> Optional[Mapping[str, Any]]:
+    snapshot: Optional[CheckpointSnapshot] = exception.__dict__.get(EXCEPTION_CONTEXT_ATTRIBUTE)
+    if snapshot is None:
+        return None
+    return snapshot.values
+
+
+def add_exception_context_note(exception: BaseException) -> bool:
+    snapshot: Optional[CheckpointSnapshot] = exception.__dict__.get(EXCEPTION_CONTEXT_ATTRIBUTE)
+    if snapshot is None or not _SUPPORTS_NOTES:
+        return False
+    note = str(snapshot)
+    if note in exception.__dict__.get('__notes__', ()):
+        return False
+    exception.add_note(note)
+    return True
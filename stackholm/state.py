@@ -1,9 +1,20 @@
 import abc
-from typing import Optional
+from typing import (
+    Collection,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+    TYPE_CHECKING,
+)
 
 from stackholm.context import Context
 
 
+if TYPE_CHECKING:
+    from stackholm.template import ActivationPlan
+
+
 __all__ = (
     'State',
 )
@@ -53,3 +64,100 @@ class State(
         key: str,
     ) -> Optional[Context]:
         raise NotImplementedError()
+
+    def push_context_with_checkpoints(
+        self,
+        context: Context,
+        keys: Iterable[str],
+    ) -> int:
+        context_index = self.push_context(context)
+        for key in keys:
+            self.add_checkpoint(key, context_index)
+        return context_index
+
+    def pop_context_with_checkpoints(
+        self,
+        index: int,
+        keys: Iterable[str],
+    ) -> Optional[Context]:
+        for key in keys:
+            self.remove_checkpoint(key, index)
+        return self.pop_context(index)
+
+    def push_context_with_plan(
+        self,
+        context: Context,
+        plan: 'ActivationPlan',
+    ) -> int:
+        return self.push_context_with_checkpoints(context, plan.keys)
+
+    def pop_context_with_plan(
+        self,
+        index: int,
+        plan: 'ActivationPlan',
+    ) -> Optional[Context]:
+        return self.pop_context_with_checkpoints(index, plan.keys)
+
+    def merge_context(
+        self,
+        index: int,
+        keys: Iterable[str],
+        target_index: int,
+        target_keys: Collection[str],
+    ) -> Optional[Context]:
+        keys = tuple(keys)
+        context = self.pop_context_with_checkpoints(index, keys)
+        for key in keys:
+            if key not in target_keys:
+                self.add_checkpoint(key, target_index)
+        return context
+
+    @abc.abstractmethod
+    def push_elided_frame(self) -> None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def pop_elided_frame(self) -> bool:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_elided_depth(self) -> int:
+        raise NotImplementedError()
+
+    def get_elided_frame_count(self) -> int:
+        return self.get_elided_depth()
+
+    @abc.abstractmethod
+    def materialize_elided_frame(
+        self,
+        context: Context,
+    ) -> int:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_contexts(self) -> Sequence[Context]:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_checkpoint_keys(self) -> Collection[str]:
+        raise NotImplementedError()
+
+    def get_checkpoint_index_lengths(self) -> Dict[str, int]:
+        lengths: Dict[str, int] = {}
+        for context in self.get_contexts():
+            for key in context._checkpoint_data.keys():
+                lengths[key] = lengths.get(key, 0) + 1
+        return lengths
+
+    def bump_version(self) -> None:
+        pass
+
+    def is_inherited_frame(
+        self,
+        index: int,
+    ) -> bool:
+        return False
+
+    @abc.abstractmethod
+    def fork(self) -> 'State':
+        raise NotImplementedError()
@@ -1,30 +1,62 @@
 import abc
 from typing import (
     Any,
+    Collection,
     Dict,
+    Iterable,
+    List,
     Optional,
+    TYPE_CHECKING,
     Tuple,
     Type,
     TypeVar,
     overload,
 )
+from weakref import WeakSet
 
 from stackholm.context import Context
 from stackholm.state import State
 
 
+if TYPE_CHECKING:
+    from stackholm.memory import MemoryReport
+    from stackholm.template import (
+        ActivationPlan,
+        ContextTemplate,
+    )
+
+
 __all__ = (
     'Storage',
+    'get_storages',
 )
 
 
 CONTEXT_T_co = TypeVar('CONTEXT_T_co', bound=Context, covariant=True)
 
+TEMPLATE_T_co = TypeVar('TEMPLATE_T_co', bound='ContextTemplate', covariant=True)
+
+
+_STORAGES: 'WeakSet[Storage]' = WeakSet()
+
+
+def get_storages() -> List['Storage']:
+    return list(_STORAGES)
+
 
 class Storage(
     metaclass=abc.ABCMeta,
 ):
 
+    def __new__(
+        cls,
+        *args: Any,
+        **kwargs: Any,
+    ) -> 'Storage':
+        storage = super(Storage, cls).__new__(cls)
+        _STORAGES.add(storage)
+        return storage
+
     @classmethod
     def get_base_context_class(cls) -> Type[Context]:
         return Context
@@ -71,6 +103,53 @@ class Storage(
         context_class = type(name, bases, namespace)
         return context_class
 
+    @overload
+    def create_context_template(
+        self,
+        keys: Iterable[str],
+        name: Optional[str] = None,
+        bases: Optional[Tuple[Type, ...]] = None,
+        namespace: Optional[Dict[str, Any]] = None,
+    ) -> Type['ContextTemplate']:
+        ...
+
+    @overload
+    def create_context_template(
+        self,
+        keys: Iterable[str],
+        name: Optional[str] = None,
+        base: Optional[Type[TEMPLATE_T_co]] = None,
+        bases: Optional[Tuple[Type, ...]] = None,
+        namespace: Optional[Dict[str, Any]] = None,
+    ) -> Type[TEMPLATE_T_co]:
+        ...
+
+    def create_context_template(
+        self,
+        keys,
+        name=None,
+        base=None,
+        bases=None,
+        namespace=None,
+    ):
+        from stackholm.template import (
+            ActivationPlan,
+            ContextTemplate,
+        )
+        base = base if base is not None else ContextTemplate
+        assert issubclass(base, ContextTemplate), 'base class must be a subclass of stackholm.ContextTemplate'  # noqa
+        namespace = dict(namespace or {})
+        namespace['_activation_plan'] = ActivationPlan(keys)
+        return self.create_context_class(
+            name=name or 'ContextTemplate',
+            base=base,
+            bases=bases,
+            namespace=namespace,
+        )
+
+    def create_state(self) -> State:
+        return self.__class__.get_state_class()()
+
     @abc.abstractmethod
     def get_state(self) -> State:
         raise NotImplementedError()
@@ -82,10 +161,46 @@ class Storage(
     ) -> None:
         raise NotImplementedError()
 
+    def get_states(self) -> List[State]:
+        return [self.get_state()]
+
+    def get_state_owner(
+        self,
+        state: State,
+    ) -> Optional[str]:
+        return None
+
+    def set_state_owner(
+        self,
+        state: State,
+        owner: Any,
+    ) -> None:
+        pass
+
+    def get_task_context_class(self) -> Type[Context]:
+        context_class: Optional[Type[Context]] = self.__dict__.get('_task_context_class')
+        if context_class is None:
+            context_class = self.create_context_class(name='TaskContext')
+            self.__dict__['_task_context_class'] = context_class
+        return context_class
+
+    def fork_state(self) -> State:
+        state = self.get_state().fork()
+        context = self.get_task_context_class()()
+        context._index = state.push_context(context)
+        return state
+
     @property
     def state(self) -> State:
         return self.get_state()
 
+    def memory_report(
+        self,
+        sample_size: Optional[int] = None,
+    ) -> 'MemoryReport':
+        from stackholm.memory import create_memory_report
+        return create_memory_report(self, sample_size=sample_size)
+
     def push_context(
         self,
         context: Context,
@@ -98,6 +213,58 @@ class Storage(
     ) -> Optional[Context]:
         return self.state.pop_context(index)
 
+    def push_context_with_checkpoints(
+        self,
+        context: Context,
+        keys: Iterable[str],
+    ) -> int:
+        return self.state.push_context_with_checkpoints(context, keys)
+
+    def pop_context_with_checkpoints(
+        self,
+        index: int,
+        keys: Iterable[str],
+    ) -> Optional[Context]:
+        return self.state.pop_context_with_checkpoints(index, keys)
+
+    def push_context_with_plan(
+        self,
+        context: Context,
+        plan: 'ActivationPlan',
+    ) -> int:
+        return self.state.push_context_with_plan(context, plan)
+
+    def pop_context_with_plan(
+        self,
+        index: int,
+        plan: 'ActivationPlan',
+    ) -> Optional[Context]:
+        return self.state.pop_context_with_plan(index, plan)
+
+    def merge_context(
+        self,
+        index: int,
+        keys: Iterable[str],
+        target_index: int,
+        target_keys: Collection[str],
+    ) -> Optional[Context]:
+        return self.state.merge_context(index, keys, target_index, target_keys)
+
+    def push_elided_frame(self) -> None:
+        self.state.push_elided_frame()
+
+    def pop_elided_frame(self) -> bool:
+        return self.state.pop_elided_frame()
+
+    def get_elided_depth(self) -> int:
+        return self.state.get_elided_depth()
+
+    def materialize_elided_frame(
+        self,
+        context: Context,
+    ) -> int:
+        return self.state.materialize_elided_frame(context)
+
     def get_last_context(self) -> Optional[Context]:
         return self.state.get_last_context()
 
@@ -120,3 +287,6 @@ class Storage(
         key: str,
     ) -> Optional[Context]:
         return self.state.get_nearest_checkpoint(key)
+
+    def bump_version(self) -> None:
+        self.state.bump_version()
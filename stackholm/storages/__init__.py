@@ -1,33 +1,73 @@
-from typing import Tuple
+from importlib import import_module
+from typing import (
+    Any,
+    Dict,
+    List,
+    TYPE_CHECKING,
+    Tuple,
+)
 
 from stackholm.storages._discovery import IS_ASGIREF_INSTALLED
-from stackholm.storages.contextvar import ContextVarStorage
-from stackholm.storages.optimized_list import (
-    OptimizedListState,
-    OptimizedListStorage,
-)
-from stackholm.storages.thread_local.thread_local_storage import (
-    ThreadLocal,
-    ThreadLocalStorage,
-)
+
+
+if TYPE_CHECKING:
+    from stackholm.storages.asgiref_local.asgiref_local_storage import (
+        ASGIRefLocal,
+        ASGIRefLocalStorage,
+    )
+    from stackholm.storages.compact_array import CompactArrayState
+    from stackholm.storages.contextvar import ContextVarStorage
+    from stackholm.storages.optimized_list import (
+        OptimizedListState,
+        OptimizedListStorage,
+    )
+    from stackholm.storages.reference import ReferenceState
+    from stackholm.storages.thread_local.thread_local_storage import (
+        ThreadLocal,
+        ThreadLocalStorage,
+    )
 
 
 __all__: Tuple[str, ...] = (
+    'CompactArrayState',
     'ContextVarStorage',
     'OptimizedListState',
     'OptimizedListStorage',
+    'ReferenceState',
     'ThreadLocal',
     'ThreadLocalStorage',
 )
 
 
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    'CompactArrayState': 'stackholm.storages.compact_array.compact_array_state',
+    'ContextVarStorage': 'stackholm.storages.contextvar.contextvar_storage',
+    'OptimizedListState': 'stackholm.storages.optimized_list.optimized_list_state',
+    'OptimizedListStorage': 'stackholm.storages.optimized_list.optimized_list_storage',
+    'ReferenceState': 'stackholm.storages.reference.reference_state',
+    'ThreadLocal': 'stackholm.storages.thread_local.thread_local_storage',
+    'ThreadLocalStorage': 'stackholm.storages.thread_local.thread_local_storage',
+}
+
+
 if IS_ASGIREF_INSTALLED:
-    from stackholm.storages.asgiref_local.asgiref_local_storage import (
-        ASGIRefLocal,
-        ASGIRefLocalStorage,
-    )
+    _LAZY_ATTRIBUTES['ASGIRefLocal'] = 'stackholm.storages.asgiref_local.asgiref_local_storage'
+    _LAZY_ATTRIBUTES['ASGIRefLocalStorage'] = 'stackholm.storages.asgiref_local.asgiref_local_storage'
 
     __all__ += (
         'ASGIRefLocal',
         'ASGIRefLocalStorage',
     )
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals().keys()) | set(__all__))
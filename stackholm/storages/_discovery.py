@@ -1,9 +1,7 @@
+from importlib.util import find_spec
 
-try:
-    import asgiref  # noqa
-    IS_ASGIREF_INSTALLED = True
-except ImportError:
-    IS_ASGIREF_INSTALLED = False
+
+IS_ASGIREF_INSTALLED = find_spec('asgiref') is not None
 
 
 __all__ = (
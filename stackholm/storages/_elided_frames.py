@@ -0,0 +1,52 @@
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+from stackholm.context import Context
+
+
+__all__ = (
+    'ElidedFrameCountsMixin',
+)
+
+
+class ElidedFrameCountsMixin:
+
+    contexts: List[Context]
+
+    elided_frame_counts: Dict[int, int]
+
+    push_context: Callable[[Context], int]
+
+    def push_elided_frame(self) -> None:
+        depth = len(self.contexts)
+        self.elided_frame_counts[depth] = self.elided_frame_counts.get(depth, 0) + 1
+
+    def pop_elided_frame(self) -> bool:
+        depth = len(self.contexts)
+        count = self.elided_frame_counts.get(depth)
+        if not count:
+            return False
+        if count == 1:
+            del self.elided_frame_counts[depth]
+        else:
+            self.elided_frame_counts[depth] = count - 1
+        return True
+
+    def get_elided_depth(self) -> int:
+        if not self.elided_frame_counts:
+            return 0
+        return self.elided_frame_counts.get(len(self.contexts), 0)
+
+    def get_elided_frame_count(self) -> int:
+        return sum(self.elided_frame_counts.values())
+
+    def materialize_elided_frame(
+        self,
+        context: Context,
+    ) -> int:
+        if not self.pop_elided_frame():
+            raise IndexError('No elided frame to materialize.')
+        return self.push_context(context)
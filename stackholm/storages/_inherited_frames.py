@@ -0,0 +1,94 @@
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from stackholm.context import Context
+
+
+__all__ = (
+    'InheritedFramesMixin',
+)
+
+
+class InheritedFramesMixin:
+
+    contexts: List[Context]
+
+    inherited_depth: int
+
+    inherited_checkpoints: Dict[str, int]
+
+    hidden_checkpoints: Dict[str, Tuple[Tuple[int, int], ...]]
+
+    def is_inherited_frame(
+        self,
+        index: int,
+    ) -> bool:
+        return 0 <= index < self.inherited_depth
+
+    def _inherit_frames(
+        self,
+        state: 'InheritedFramesMixin',
+    ) -> None:
+        state.contexts = self.contexts.copy()
+        state.inherited_depth = len(self.contexts)
+        if self.hidden_checkpoints:
+            state.hidden_checkpoints = self.hidden_checkpoints.copy()
+
+    def _find_inherited_checkpoint(
+        self,
+        key: str,
+        index: int,
+    ) -> int:
+        contexts = self.contexts
+        hidden_ranges = self.hidden_checkpoints.get(key, ())
+        while index >= 0:
+            for start, stop in hidden_ranges:
+                if start <= index < stop:
+                    index = start - 1
+                    break
+            else:
+                if key in contexts[index]._checkpoint_data:
+                    return index
+                index -= 1
+        return -1
+
+    def _get_inherited_checkpoint_index(
+        self,
+        key: str,
+    ) -> int:
+        index = self.inherited_checkpoints.get(key)
+        if index is None:
+            index = self._find_inherited_checkpoint(key, self.inherited_depth - 1)
+            self.inherited_checkpoints[key] = index
+        return index
+
+    def _get_inherited_checkpoint(
+        self,
+        key: str,
+    ) -> Optional[Context]:
+        index = self._get_inherited_checkpoint_index(key)
+        if index < 0:
+            return None
+        return self.contexts[index]
+
+    def _remove_inherited_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        if self._get_inherited_checkpoint_index(key) != context_index:
+            return
+        hidden_range = (context_index, self.inherited_depth)
+        self.hidden_checkpoints[key] = self.hidden_checkpoints.get(key, ()) + (hidden_range,)
+        self.inherited_checkpoints[key] = self._find_inherited_checkpoint(key, context_index - 1)
+
+    def _get_inherited_checkpoint_keys(self) -> Set[str]:
+        keys: Set[str] = set()
+        for context in self.contexts[:self.inherited_depth]:
+            keys.update(context._checkpoint_data.keys())
+        return {key for key in keys if self._get_inherited_checkpoint_index(key) >= 0}
@@ -0,0 +1,8 @@
+from stackholm.storages.compact_array.compact_array_state import (
+    CompactArrayState,
+)
+
+
+__all__ = (
+    'CompactArrayState',
+)
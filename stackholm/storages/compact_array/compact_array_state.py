@@ -0,0 +1,205 @@
+from array import array
+from contextlib import suppress
+from typing import (
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from stackholm.context import Context
+from stackholm.state import State
+from stackholm.storages._elided_frames import ElidedFrameCountsMixin
+from stackholm.storages._inherited_frames import InheritedFramesMixin
+
+
+__all__ = (
+    'CompactArrayState',
+)
+
+
+def _find_last(
+    key_indexes: 'array[int]',
+    context_index: int,
+) -> Optional[int]:
+    for position in range(len(key_indexes) - 1, -1, -1):
+        if key_indexes[position] == context_index:
+            return position
+    return None
+
+
+class CompactArrayState(
+    ElidedFrameCountsMixin,
+    InheritedFramesMixin,
+    State,
+):
+
+    contexts: List[Context]
+
+    checkpoint_indexes: Dict[str, 'array[int]']
+
+    elided_frame_counts: Dict[int, int]
+
+    inherited_depth: int
+
+    inherited_checkpoints: Dict[str, int]
+
+    hidden_checkpoints: Dict[str, Tuple[Tuple[int, int], ...]]
+
+    version: int
+
+    def __init__(self) -> None:
+        self.contexts = []
+        self.checkpoint_indexes = {}
+        self.elided_frame_counts = {}
+        self.inherited_depth = 0
+        self.inherited_checkpoints = {}
+        self.hidden_checkpoints = {}
+        self.version = 0
+
+    def push_context(
+        self,
+        context: Context,
+    ) -> int:
+        self.version += 1
+        contexts = self.contexts
+        contexts.append(context)
+        return len(contexts) - 1
+
+    def pop_context(
+        self,
+        index: int = -1,
+    ) -> Optional[Context]:
+        self.version += 1
+        with suppress(IndexError):
+            return self.contexts.pop(index)
+        return None
+
+    def get_last_context(self) -> Optional[Context]:
+        with suppress(IndexError):
+            return self.contexts[-1]
+        return None
+
+    def add_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        self.version += 1
+        key_indexes = self.checkpoint_indexes.get(key)
+        if key_indexes is None:
+            self.checkpoint_indexes[key] = array('l', (context_index,))
+        elif key_indexes[-1] != context_index:
+            key_indexes.append(context_index)
+
+    def remove_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        self.version += 1
+        if context_index < self.inherited_depth:
+            self._remove_inherited_checkpoint(key, context_index)
+            return
+        self._remove_checkpoint(key, context_index)
+
+    def _remove_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        key_indexes = self.checkpoint_indexes.get(key)
+        if key_indexes is None:
+            return
+        if key_indexes[-1] == context_index:
+            key_indexes.pop()
+        else:
+            position = _find_last(key_indexes, context_index)
+            if position is None:
+                return
+            del key_indexes[position]
+        if not key_indexes:
+            del self.checkpoint_indexes[key]
+
+    def push_context_with_checkpoints(
+        self,
+        context: Context,
+        keys: Iterable[str],
+    ) -> int:
+        context_index = self.push_context(context)
+        indexes = self.checkpoint_indexes
+        for key in keys:
+            key_indexes = indexes.get(key)
+            if key_indexes is None:
+                indexes[key] = array('l', (context_index,))
+            else:
+                key_indexes.append(context_index)
+        return context_index
+
+    def pop_context_with_checkpoints(
+        self,
+        index: int,
+        keys: Iterable[str],
+    ) -> Optional[Context]:
+        for key in keys:
+            self._remove_checkpoint(key, index)
+        return self.pop_context(index)
+
+    def merge_context(
+        self,
+        index: int,
+        keys: Iterable[str],
+        target_index: int,
+        target_keys: Collection[str],
+    ) -> Optional[Context]:
+        indexes = self.checkpoint_indexes
+        for key in keys:
+            if key in target_keys:
+                self._remove_checkpoint(key, index)
+                continue
+            key_indexes = indexes.get(key)
+            if key_indexes is None:
+                continue
+            if key_indexes[-1] == index:
+                key_indexes[-1] = target_index
+                continue
+            position = _find_last(key_indexes, index)
+            if position is not None:
+                key_indexes[position] = target_index
+        return self.pop_context(index)
+
+    def bump_version(self) -> None:
+        self.version += 1
+
+    def get_nearest_checkpoint(
+        self,
+        key: str,
+    ) -> Optional[Context]:
+        key_indexes = self.checkpoint_indexes.get(key)
+        if key_indexes is None:
+            if self.inherited_depth:
+                return self._get_inherited_checkpoint(key)
+            return None
+        with suppress(IndexError):
+            return self.contexts[key_indexes[-1]]
+        return None
+
+    def get_contexts(self) -> Sequence[Context]:
+        return self.contexts
+
+    def get_checkpoint_keys(self) -> Collection[str]:
+        if self.inherited_depth:
+            return self._get_inherited_checkpoint_keys().union(self.checkpoint_indexes.keys())
+        return self.checkpoint_indexes.keys()
+
+    def get_checkpoint_index_lengths(self) -> Dict[str, int]:
+        return {key: len(indexes) for key, indexes in self.checkpoint_indexes.items()}
+
+    def fork(self) -> 'CompactArrayState':
+        state = self.__class__()
+        self._inherit_frames(state)
+        state.elided_frame_counts = self.elided_frame_counts.copy()
+        return state
@@ -26,10 +26,16 @@ class ContextVarStorage(OptimizedListStorage):
         super(ContextVarStorage, self).__init__(*args, **kwargs)
 
     def get_state(self) -> State:
-        return self._context_var.get()
+        try:
+            return self._context_var.get()
+        except LookupError:
+            state = self.create_state()
+            self.set_state(state)
+            return state
 
     def set_state(
         self,
         state: State,
     ) -> None:
+        self._register_state(state)
         self._context_var.set(state)
@@ -1,12 +1,23 @@
 from contextlib import suppress
 from typing import (
+    Collection,
     Dict,
+    Iterable,
     List,
     Optional,
+    Sequence,
+    TYPE_CHECKING,
+    Tuple,
 )
 
 from stackholm.context import Context
 from stackholm.state import State
+from stackholm.storages._elided_frames import ElidedFrameCountsMixin
+from stackholm.storages._inherited_frames import InheritedFramesMixin
+
+
+if TYPE_CHECKING:
+    from stackholm.template import ActivationPlan
 
 
 __all__ = (
@@ -14,7 +25,11 @@ __all__ = (
 )
 
 
-class OptimizedListState(State):
+class OptimizedListState(
+    ElidedFrameCountsMixin,
+    InheritedFramesMixin,
+    State,
+):
 
     context_sequence: int
 
@@ -26,17 +41,33 @@ class OptimizedListState(State):
 
     checkpoint_optimization_mapping: Dict[str, Dict[int, int]]
 
+    elided_frame_counts: Dict[int, int]
+
+    inherited_depth: int
+
+    inherited_checkpoints: Dict[str, int]
+
+    hidden_checkpoints: Dict[str, Tuple[Tuple[int, int], ...]]
+
+    version: int
+
     def __init__(self) -> None:
         self.context_sequence = -1
         self.contexts = []
         self.checkpoint_sequences = {}
         self.checkpoint_indexes = {}
         self.checkpoint_optimization_mapping = {}
+        self.elided_frame_counts = {}
+        self.inherited_depth = 0
+        self.inherited_checkpoints = {}
+        self.hidden_checkpoints = {}
+        self.version = 0
 
     def push_context(
         self,
         context: Context,
     ) -> int:
+        self.version += 1
         self.context_sequence += 1
         self.contexts.append(context)
         return self.context_sequence
@@ -45,6 +76,7 @@ class OptimizedListState(State):
         self,
         index: int = -1,
     ) -> Optional[Context]:
+        self.version += 1
         self.context_sequence -= 1
         with suppress(IndexError):
             return self.contexts.pop(index)
@@ -60,6 +92,10 @@ class OptimizedListState(State):
         key: str,
         context_index: int,
     ) -> None:
+        self.version += 1
+        key_indexes = self.checkpoint_indexes.get(key)
+        if key_indexes and key_indexes[-1] == context_index:
+            return
         if key not in self.checkpoint_sequences:
             self.checkpoint_sequences[key] = -1
         if key not in self.checkpoint_optimization_mapping:
@@ -75,6 +111,17 @@ class OptimizedListState(State):
         self,
         key: str,
         context_index: int,
+    ) -> None:
+        self.version += 1
+        if context_index < self.inherited_depth:
+            self._remove_inherited_checkpoint(key, context_index)
+            return
+        self._remove_checkpoint(key, context_index)
+
+    def _remove_checkpoint(
+        self,
+        key: str,
+        context_index: int,
     ) -> None:
         checkpoint_index: Optional[int] = None
         if key in self.checkpoint_optimization_mapping:
@@ -89,14 +136,143 @@ class OptimizedListState(State):
                 self.checkpoint_sequences[key] -= 1
             if self.checkpoint_sequences[key] < 0:
                 self.checkpoint_sequences.pop(key, None)
-            self.checkpoint_indexes[key].pop(checkpoint_index)
-            if not self.checkpoint_indexes[key]:
+            key_indexes = self.checkpoint_indexes[key]
+            key_indexes.pop(checkpoint_index)
+            if not key_indexes:
                 self.checkpoint_indexes.pop(key, None)
+            elif checkpoint_index < len(key_indexes):
+                key_mapping = self.checkpoint_optimization_mapping.setdefault(key, {})
+                for position in range(checkpoint_index, len(key_indexes)):
+                    key_mapping[key_indexes[position]] = position
+
+    def push_context_with_checkpoints(
+        self,
+        context: Context,
+        keys: Iterable[str],
+    ) -> int:
+        context_index = self.push_context(context)
+        sequences = self.checkpoint_sequences
+        mapping = self.checkpoint_optimization_mapping
+        indexes = self.checkpoint_indexes
+        for key in keys:
+            checkpoint_index = sequences.get(key, -1) + 1
+            sequences[key] = checkpoint_index
+            key_mapping = mapping.get(key)
+            if key_mapping is None:
+                mapping[key] = {context_index: checkpoint_index}
+            else:
+                key_mapping[context_index] = checkpoint_index
+            key_indexes = indexes.get(key)
+            if key_indexes is None:
+                indexes[key] = [context_index]
+            else:
+                key_indexes.append(context_index)
+        return context_index
+
+    def pop_context_with_checkpoints(
+        self,
+        index: int,
+        keys: Iterable[str],
+    ) -> Optional[Context]:
+        self._pop_checkpoints(index, keys)
+        return self.pop_context(index)
+
+    def pop_context_with_plan(
+        self,
+        index: int,
+        plan: 'ActivationPlan',
+    ) -> Optional[Context]:
+        self._pop_checkpoints(index, plan.keys)
+        return self.pop_context(index)
+
+    def _pop_checkpoints(
+        self,
+        index: int,
+        keys: Iterable[str],
+    ) -> None:
+        sequences = self.checkpoint_sequences
+        mapping = self.checkpoint_optimization_mapping
+        indexes = self.checkpoint_indexes
+        for key in keys:
+            key_indexes = indexes.get(key)
+            if key_indexes is None or key_indexes[-1] != index:
+                self._remove_checkpoint(key, index)
+                continue
+            key_indexes.pop()
+            if key_indexes:
+                sequences[key] -= 1
+                key_mapping = mapping.get(key)
+                if key_mapping is not None:
+                    key_mapping.pop(index, None)
+                    if not key_mapping:
+                        del mapping[key]
+            else:
+                del indexes[key]
+                sequences.pop(key, None)
+                mapping.pop(key, None)
+
+    def merge_context(
+        self,
+        index: int,
+        keys: Iterable[str],
+        target_index: int,
+        target_keys: Collection[str],
+    ) -> Optional[Context]:
+        mapping = self.checkpoint_optimization_mapping
+        indexes = self.checkpoint_indexes
+        for key in keys:
+            if key in target_keys:
+                self._remove_checkpoint(key, index)
+                continue
+            checkpoint_index: Optional[int] = None
+            key_mapping = mapping.get(key)
+            if key_mapping is not None:
+                checkpoint_index = key_mapping.pop(index, None)
+            key_indexes = indexes.get(key)
+            if key_indexes is None:
+                continue
+            if checkpoint_index is None:
+                with suppress(ValueError):
+                    checkpoint_index = key_indexes.index(index)
+                if checkpoint_index is None:
+                    continue
+            key_indexes[checkpoint_index] = target_index
+            if key_mapping is None:
+                mapping[key] = {target_index: checkpoint_index}
+            else:
+                key_mapping[target_index] = checkpoint_index
+        return self.pop_context(index)
+
+    def bump_version(self) -> None:
+        self.version += 1
 
     def get_nearest_checkpoint(
         self,
         key: str,
     ) -> Optional[Context]:
-        with suppress(KeyError, IndexError):
-            return self.contexts[self.checkpoint_indexes[key][-1]]
+        key_indexes = self.checkpoint_indexes.get(key)
+        if key_indexes is None:
+            if self.inherited_depth:
+                return self._get_inherited_checkpoint(key)
+            return None
+        with suppress(IndexError):
+            return self.contexts[key_indexes[-1]]
         return None
+
+    def get_contexts(self) -> Sequence[Context]:
+        return self.contexts
+
+    def get_checkpoint_keys(self) -> Collection[str]:
+        if self.inherited_depth:
+            return self._get_inherited_checkpoint_keys().union(self.checkpoint_indexes.keys())
+        return self.checkpoint_indexes.keys()
+
+    def get_checkpoint_index_lengths(self) -> Dict[str, int]:
+        return {key: len(indexes) for key, indexes in self.checkpoint_indexes.items()}
+
+    def fork(self) -> 'OptimizedListState':
+        state = self.__class__()
+        state.context_sequence = self.context_sequence
+        self._inherit_frames(state)
+        state.elided_frame_counts = self.elided_frame_counts.copy()
+        return state
@@ -1,7 +1,18 @@
+import sys
+import threading
 from typing import (
     Any,
+    Callable,
+    List,
+    Optional,
+    Union,
     cast,
 )
+from weakref import (
+    WeakKeyDictionary,
+    WeakSet,
+    ref,
+)
 
 from stackholm.state import State
 from stackholm.storage import Storage
@@ -12,14 +23,96 @@ __all__ = (
 )
 
 
+class _TaskOwner:
+
+    __slots__ = (
+        'task',
+        'thread_name',
+    )
+
+    task: 'ref[Any]'
+
+    thread_name: str
+
+    def __init__(
+        self,
+        task: Any,
+        thread_name: str,
+    ) -> None:
+        self.task = ref(task)
+        self.thread_name = thread_name
+
+    def __str__(self) -> str:
+        task = self.task()
+        task_name = task.get_name() if task is not None else 'finished task'
+        return f'{task_name} ({self.thread_name})'
+
+
+def _get_current_owner() -> Union[str, _TaskOwner]:
+    thread_name = threading.current_thread().name
+    asyncio = sys.modules.get('asyncio')
+    if asyncio is not None:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is not None:
+            return _TaskOwner(task, thread_name)
+    return thread_name
+
+
 class OptimizedListStorage(Storage):
 
+    _state_class: Optional[Callable[[], State]]
+
+    _states: 'WeakSet[State]'
+
+    _state_owners: 'WeakKeyDictionary[State, Union[str, _TaskOwner]]'
+
     def __init__(
         self,
         *args: Any,
+        state_class: Optional[Callable[[], State]] = None,
         **kwargs: Any,
     ) -> None:
-        self.set_state(self.__class__.get_state_class()())
+        self._state_class = state_class
+        self._states = WeakSet()
+        self._state_owners = WeakKeyDictionary()
+        self.set_state(self.create_state())
+
+    def create_state(self) -> State:
+        if self._state_class is not None:
+            return self._state_class()
+        return super(OptimizedListStorage, self).create_state()
+
+    def get_states(self) -> List[State]:
+        return list(self._states)
+
+    def get_state_owner(
+        self,
+        state: State,
+    ) -> Optional[str]:
+        owner = self._state_owners.get(state)
+        if owner is None:
+            return None
+        return str(owner)
+
+    def set_state_owner(
+        self,
+        state: State,
+        owner: Any,
+    ) -> None:
+        if not isinstance(owner, str):
+            owner = _TaskOwner(owner, threading.current_thread().name)
+        self._state_owners[state] = owner
+
+    def _register_state(
+        self,
+        state: State,
+    ) -> None:
+        self._states.add(state)
+        if state not in self._state_owners:
+            self._state_owners[state] = _get_current_owner()
 
     def get_state(self) -> State:
         return cast(State, getattr(self, '_state'))
@@ -28,4 +121,5 @@ class OptimizedListStorage(Storage):
         self,
         state: State,
     ) -> None:
+        self._register_state(state)
         setattr(self, '_state', state)
@@ -0,0 +1,6 @@
+from stackholm.storages.reference.reference_state import ReferenceState
+
+
+__all__ = (
+    'ReferenceState',
+)
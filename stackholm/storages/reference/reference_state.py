@@ -0,0 +1,154 @@
+from contextlib import suppress
+from typing import (
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from stackholm.context import Context
+from stackholm.state import State
+from stackholm.storages._inherited_frames import InheritedFramesMixin
+
+
+__all__ = (
+    'ReferenceState',
+)
+
+
+class ReferenceState(
+    InheritedFramesMixin,
+    State,
+):
+
+    contexts: List[Context]
+
+    frame_keys: List[Set[str]]
+
+    elided_frame_depths: List[int]
+
+    inherited_depth: int
+
+    inherited_checkpoints: Dict[str, int]
+
+    hidden_checkpoints: Dict[str, Tuple[Tuple[int, int], ...]]
+
+    version: int
+
+    def __init__(self) -> None:
+        self.contexts = []
+        self.frame_keys = []
+        self.elided_frame_depths = []
+        self.inherited_depth = 0
+        self.inherited_checkpoints = {}
+        self.hidden_checkpoints = {}
+        self.version = 0
+
+    def push_context(
+        self,
+        context: Context,
+    ) -> int:
+        self.version += 1
+        self.contexts.append(context)
+        self.frame_keys.append(set())
+        return len(self.contexts) - 1
+
+    def pop_context(
+        self,
+        index: int = -1,
+    ) -> Optional[Context]:
+        self.version += 1
+        with suppress(IndexError):
+            self.frame_keys.pop(index)
+            return self.contexts.pop(index)
+        return None
+
+    def get_last_context(self) -> Optional[Context]:
+        if not self.contexts:
+            return None
+        return self.contexts[-1]
+
+    def add_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        self.version += 1
+        self.frame_keys[context_index].add(key)
+
+    def remove_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        self.version += 1
+        if context_index < self.inherited_depth:
+            self._remove_inherited_checkpoint(key, context_index)
+            return
+        with suppress(IndexError):
+            self.frame_keys[context_index].discard(key)
+
+    def bump_version(self) -> None:
+        self.version += 1
+
+    def get_nearest_checkpoint(
+        self,
+        key: str,
+    ) -> Optional[Context]:
+        for index in range(len(self.contexts) - 1, self.inherited_depth - 1, -1):
+            if key in self.frame_keys[index]:
+                return self.contexts[index]
+        if self.inherited_depth:
+            return self._get_inherited_checkpoint(key)
+        return None
+
+    def push_elided_frame(self) -> None:
+        self.elided_frame_depths.append(len(self.contexts))
+
+    def pop_elided_frame(self) -> bool:
+        depths = self.elided_frame_depths
+        if not depths or depths[-1] != len(self.contexts):
+            return False
+        depths.pop()
+        return True
+
+    def get_elided_depth(self) -> int:
+        depth = len(self.contexts)
+        return sum(1 for elided_depth in self.elided_frame_depths if elided_depth == depth)
+
+    def get_elided_frame_count(self) -> int:
+        return len(self.elided_frame_depths)
+
+    def materialize_elided_frame(
+        self,
+        context: Context,
+    ) -> int:
+        if not self.pop_elided_frame():
+            raise IndexError('No elided frame to materialize.')
+        return self.push_context(context)
+
+    def get_contexts(self) -> Sequence[Context]:
+        return self.contexts
+
+    def get_checkpoint_keys(self) -> Collection[str]:
+        keys = {key for keys in self.frame_keys for key in keys}
+        if self.inherited_depth:
+            keys.update(self._get_inherited_checkpoint_keys())
+        return keys
+
+    def get_checkpoint_index_lengths(self) -> Dict[str, int]:
+        lengths: Dict[str, int] = {}
+        for keys in self.frame_keys:
+            for key in keys:
+                lengths[key] = lengths.get(key, 0) + 1
+        return lengths
+
+    def fork(self) -> 'ReferenceState':
+        state = self.__class__()
+        self._inherit_frames(state)
+        state.frame_keys = [set() for _ in self.frame_keys]
+        state.elided_frame_depths = self.elided_frame_depths.copy()
+        return state
@@ -43,11 +43,12 @@ class ThreadLocalStorage(OptimizedListStorage):
 
     def get_state(self) -> State:
         if not hasattr(self._local, 'state'):
-            self.set_state(self.__class__.get_state_class()())
+            self.set_state(self.create_state())
         return self._local.state
 
     def set_state(
         self,
         state: State,
     ) -> None:
+        self._register_state(state)
         self._local.state = state
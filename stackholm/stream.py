@@ -0,0 +1,80 @@
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Type,
+    TypeVar,
+)
+
+from stackholm.context import Context
+
+
+__all__ = (
+    'scoped',
+)
+
+
+ITEM_T = TypeVar('ITEM_T')
+
+_MISSING = object()
+
+
+def _insert_checkpoint(
+    context: Context,
+    key: str,
+) -> None:
+    storage = context.storage
+    index = context.index
+    storage.remove_checkpoint(key, index)
+    upper_indexes = [
+        upper_context.index
+        for upper_context in storage.state.get_contexts()
+        if upper_context._index is not None and upper_context._index > index and key in upper_context._checkpoint_data
+    ]
+    for upper_index in upper_indexes:
+        storage.remove_checkpoint(key, upper_index)
+    storage.add_checkpoint(key, index)
+    for upper_index in upper_indexes:
+        storage.add_checkpoint(key, upper_index)
+
+
+def scoped(
+    iterable: Iterable[ITEM_T],
+    context_class: Type[Context],
+    per_item: Callable[[ITEM_T], Optional[Mapping[str, Any]]],
+) -> Generator[ITEM_T, None, None]:
+    context = context_class()
+    context.activate()
+    try:
+        storage = context.storage
+        index = context.index
+        checkpoint_data = context._checkpoint_data
+        for item in iterable:
+            values = per_item(item) or {}
+            stale_keys: List[str] = [key for key in checkpoint_data if key not in values]
+            for key in stale_keys:
+                context._remove_checkpoint(key)
+            is_top = storage.state.get_last_context() is context
+            is_changed = False
+            for key, value in values.items():
+                current_value = checkpoint_data.get(key, _MISSING)
+                if current_value is not _MISSING and (current_value is value or current_value == value):
+                    continue
+                checkpoint_data[key] = value
+                if context._checkpoint_expirations is not None:
+                    context._remove_checkpoint_expiration(key)
+                if not is_top:
+                    _insert_checkpoint(context, key)
+                elif current_value is _MISSING:
+                    storage.add_checkpoint(key, index)
+                else:
+                    is_changed = True
+            if is_changed:
+                storage.bump_version()
+            yield item
+    finally:
+        context.deactivate()
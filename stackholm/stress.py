@@ -0,0 +1,389 @@
+import argparse
+import asyncio
+from contextvars import ContextVar
+import random
+import threading
+from time import perf_counter_ns
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from stackholm.context import Context
+from stackholm.state import State
+from stackholm.storage import Storage
+from stackholm.storages._discovery import IS_ASGIREF_INSTALLED
+
+
+__all__ = (
+    'StressReport',
+    'Workload',
+    'run_thread_local_stress',
+    'run_contextvar_stress',
+    'run_asgiref_local_stress',
+    'main',
+)
+
+
+DEFAULT_KEYS = ('a', 'b', 'c', 'd')
+
+_MISSING = object()
+
+
+class Workload:
+
+    context_class: Type[Context]
+
+    worker_id: int
+
+    max_depth: int
+
+    keys: Tuple[str, ...]
+
+    rng: random.Random
+
+    frames: List[Tuple[Context, Dict[str, Any]]]
+
+    latencies: List[int]
+
+    violations: List[str]
+
+    operations: int
+
+    def __init__(
+        self,
+        context_class: Type[Context],
+        worker_id: int,
+        seed: int,
+        max_depth: int = 16,
+        keys: Sequence[str] = DEFAULT_KEYS,
+    ) -> None:
+        self.context_class = context_class
+        self.worker_id = worker_id
+        self.max_depth = max_depth
+        self.keys = tuple(keys)
+        self.rng = random.Random(seed)
+        self.frames = []
+        self.latencies = []
+        self.violations = []
+        self.operations = 0
+
+    def _get_expected_value(
+        self,
+        key: str,
+    ) -> Any:
+        for _, data in reversed(self.frames):
+            if key in data:
+                return data[key]
+        return _MISSING
+
+    @property
+    def is_failed(self) -> bool:
+        return bool(self.violations)
+
+    def step(self) -> None:
+        try:
+            self._step()
+        except Exception as exception:
+            self.violations.append(f'worker {self.worker_id}: {exception!r} at operation {self.operations}')
+
+    def _step(self) -> None:
+        context_class = self.context_class
+        frames = self.frames
+        roll = self.rng.random()
+        key = self.rng.choice(self.keys)
+        depth = len(frames)
+        if depth == 0 or (roll < 0.25 and depth < self.max_depth):
+            context = context_class()
+            start = perf_counter_ns()
+            context.activate()
+            self.latencies.append(perf_counter_ns() - start)
+            frames.append((context, {}))
+        elif roll < 0.45:
+            context, _ = frames.pop()
+            start = perf_counter_ns()
+            context.deactivate()
+            self.latencies.append(perf_counter_ns() - start)
+        elif roll < 0.75:
+            value = (self.worker_id, self.operations)
+            start = perf_counter_ns()
+            context_class.set_checkpoint_value(key, value)
+            self.latencies.append(perf_counter_ns() - start)
+            frames[-1][1][key] = value
+        elif roll < 0.85:
+            start = perf_counter_ns()
+            context_class.pop_checkpoint_value(key)
+            self.latencies.append(perf_counter_ns() - start)
+            for _, data in reversed(frames):
+                if key in data:
+                    del data[key]
+                    break
+        else:
+            start = perf_counter_ns()
+            context_class.get_checkpoint_value(key)
+            self.latencies.append(perf_counter_ns() - start)
+        self.operations += 1
+        self.verify()
+
+    def verify(self) -> None:
+        context_class = self.context_class
+        expected_context = self.frames[-1][0] if self.frames else None
+        if context_class.get_current() is not expected_context:
+            self.violations.append(
+                f'worker {self.worker_id}: unexpected current context at operation {self.operations}',
+            )
+        for key in self.keys:
+            expected_value = self._get_expected_value(key)
+            actual_value = context_class.get_checkpoint_value(key, _MISSING)
+            if actual_value != expected_value:
+                self.violations.append(
+                    f'worker {self.worker_id}: {key!r} is {actual_value!r} instead of {expected_value!r}'
+                    f' at operation {self.operations}',
+                )
+
+    def close(self) -> None:
+        try:
+            while self.frames:
+                context, _ = self.frames.pop()
+                context.deactivate()
+            self.verify()
+        except Exception as exception:
+            self.violations.append(f'worker {self.worker_id}: {exception!r} while closing')
+
+
+class StressReport:
+
+    backend: str
+
+    workers: int
+
+    operations: int
+
+    duration: float
+
+    latencies: List[int]
+
+    violations: List[str]
+
+    def __init__(
+        self,
+        backend: str,
+        workloads: Sequence[Workload],
+        duration: float,
+    ) -> None:
+        self.backend = backend
+        self.workers = len(workloads)
+        self.operations = sum(workload.operations for workload in workloads)
+        self.duration = duration
+        self.latencies = sorted(latency for workload in workloads for latency in workload.latencies)
+        self.violations = [violation for workload in workloads for violation in workload.violations]
+
+    @property
+    def is_consistent(self) -> bool:
+        return not self.violations
+
+    @property
+    def operations_per_second(self) -> float:
+        if self.duration <= 0:
+            return 0.0
+        return self.operations / self.duration
+
+    def get_latency_percentile(
+        self,
+        percentile: float,
+    ) -> float:
+        if not self.latencies:
+            return 0.0
+        position = min(len(self.latencies) - 1, int(len(self.latencies) * percentile / 100))
+        return self.latencies[position] / 1000
+
+    def format(self) -> str:
+        return (
+            f'{self.backend}: {self.workers} workers, {self.operations} operations,'
+            f' {self.operations_per_second:,.0f} ops/s,'
+            f' p50={self.get_latency_percentile(50):.2f}us'
+            f' p99={self.get_latency_percentile(99):.2f}us'
+            f' p99.9={self.get_latency_percentile(99.9):.2f}us'
+            f' max={self.get_latency_percentile(100):.2f}us,'
+            f' {len(self.violations)} violations'
+        )
+
+
+def _create_workloads(
+    storage: Storage,
+    workers: int,
+    seed: int,
+    max_depth: int,
+) -> List[Workload]:
+    context_class = storage.create_context_class()
+    return [
+        Workload(context_class, worker_id, seed + worker_id, max_depth=max_depth)
+        for worker_id in range(workers)
+    ]
+
+
+def run_thread_local_stress(
+    workers: int = 16,
+    operations: int = 10000,
+    seed: int = 0,
+    max_depth: int = 16,
+) -> StressReport:
+    from stackholm.storages.thread_local import ThreadLocalStorage
+    storage = ThreadLocalStorage()
+    workloads = _create_workloads(storage, workers, seed, max_depth)
+    barrier = threading.Barrier(workers + 1)
+
+    def run(workload: Workload) -> None:
+        barrier.wait()
+        for _ in range(operations):
+            workload.step()
+            if workload.is_failed:
+                break
+        workload.close()
+
+    threads = [threading.Thread(target=run, args=(workload,)) for workload in workloads]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = perf_counter_ns()
+    for thread in threads:
+        thread.join()
+    duration = (perf_counter_ns() - start) / 1e9
+    return StressReport('ThreadLocalStorage', workloads, duration)
+
+
+def _run_async_workloads(
+    storage: Storage,
+    workloads: Sequence[Workload],
+    worker: Callable[[Workload], Any],
+) -> float:
+
+    async def run(workload: Workload) -> None:
+        storage.set_state(storage.create_state())
+        await worker(workload)
+        workload.close()
+
+    async def run_all() -> float:
+        start = perf_counter_ns()
+        await asyncio.gather(*(run(workload) for workload in workloads))
+        return (perf_counter_ns() - start) / 1e9
+
+    return asyncio.run(run_all())
+
+
+def run_contextvar_stress(
+    workers: int = 64,
+    operations: int = 10000,
+    seed: int = 0,
+    max_depth: int = 16,
+    context_var: Optional[ContextVar[State]] = None,
+) -> StressReport:
+    from stackholm.storages.contextvar import ContextVarStorage
+    storage = ContextVarStorage(context_var or ContextVar('stackholm.stress'))
+    workloads = _create_workloads(storage, workers, seed, max_depth)
+
+    async def worker(workload: Workload) -> None:
+        for _ in range(operations):
+            workload.step()
+            if workload.is_failed:
+                break
+            if workload.rng.random() < 0.1:
+                await asyncio.sleep(0)
+
+    duration = _run_async_workloads(storage, workloads, worker)
+    return StressReport('ContextVarStorage', workloads, duration)
+
+
+def run_asgiref_local_stress(
+    workers: int = 32,
+    operations: int = 10000,
+    seed: int = 0,
+    max_depth: int = 16,
+    chunk_size: int = 100,
+) -> StressReport:
+    from asgiref.sync import sync_to_async
+
+    from stackholm.storages.asgiref_local import ASGIRefLocalStorage
+    storage = ASGIRefLocalStorage()
+    workloads = _create_workloads(storage, workers, seed, max_depth)
+
+    def run_chunk(
+        workload: Workload,
+        size: int,
+    ) -> None:
+        for _ in range(size):
+            workload.step()
+            if workload.is_failed:
+                break
+
+    async def worker(workload: Workload) -> None:
+        remaining = operations
+        while remaining > 0 and not workload.is_failed:
+            size = min(chunk_size, remaining)
+            remaining -= size
+            if workload.rng.random() < 0.5:
+                await sync_to_async(run_chunk, thread_sensitive=False)(workload, size)
+                continue
+            for _ in range(size):
+                workload.step()
+                if workload.is_failed:
+                    break
+                if workload.rng.random() < 0.1:
+                    await asyncio.sleep(0)
+
+    duration = _run_async_workloads(storage, workloads, worker)
+    return StressReport('ASGIRefLocalStorage', workloads, duration)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m stackholm.stress',
+        description='Run randomized concurrent workloads against the storage backends.',
+    )
+    parser.add_argument(
+        '--backend',
+        choices=('all', 'thread_local', 'contextvar', 'asgiref_local'),
+        default='all',
+    )
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--operations', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-depth', type=int, default=16)
+    arguments = parser.parse_args(argv)
+
+    runners: Dict[str, Callable[..., StressReport]] = {
+        'thread_local': run_thread_local_stress,
+        'contextvar': run_contextvar_stress,
+    }
+    if IS_ASGIREF_INSTALLED:
+        runners['asgiref_local'] = run_asgiref_local_stress
+    if arguments.backend != 'all':
+        if arguments.backend not in runners:
+            parser.error(f'backend {arguments.backend!r} is not available.')
+        runners = {arguments.backend: runners[arguments.backend]}
+
+    is_consistent = True
+    for runner in runners.values():
+        options: Dict[str, Any] = {
+            'operations': arguments.operations,
+            'seed': arguments.seed,
+            'max_depth': arguments.max_depth,
+        }
+        if arguments.workers is not None:
+            options['workers'] = arguments.workers
+        report = runner(**options)
+        print(report.format())
+        for violation in report.violations[:10]:
+            print(f'  {violation}')
+        is_consistent = is_consistent and report.is_consistent
+    return 0 if is_consistent else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Tuple,
+)
+
+from stackholm.context import Context
+
+
+__all__ = (
+    'ActivationPlan',
+    'ContextTemplate',
+)
+
+
+_MISSING = object()
+
+
+class ActivationPlan:
+
+    __slots__ = (
+        'keys',
+        'key_set',
+        'positions',
+    )
+
+    keys: Tuple[str, ...]
+
+    key_set: FrozenSet[str]
+
+    positions: Dict[str, int]
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+    ) -> None:
+        self.keys = tuple(keys)
+        self.key_set = frozenset(self.keys)
+        assert len(self.keys) == len(self.key_set), 'template keys must be unique'  # noqa
+        self.positions = {key: position for position, key in enumerate(self.keys)}
+
+
+class ContextTemplate(Context):
+
+    _activation_plan: ActivationPlan = ActivationPlan(())
+
+    def __init__(
+        self,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        super(ContextTemplate, self).__init__()
+        plan = self._activation_plan
+        keys = plan.keys
+        if len(args) > len(keys):
+            raise TypeError(f'{self.__class__.__name__} takes {len(keys)} values but {len(args)} were given.')
+        if kwargs:
+            values: List[Any] = list(args)
+            values.extend([_MISSING] * (len(keys) - len(args)))
+            positions = plan.positions
+            for key, value in kwargs.items():
+                position = positions.get(key)
+                if position is None:
+                    raise TypeError(f'{self.__class__.__name__} got an unexpected key {key!r}.')
+                if values[position] is not _MISSING:
+                    raise TypeError(f'{self.__class__.__name__} got multiple values for key {key!r}.')
+                values[position] = value
+        else:
+            values = list(args)
+        if len(values) != len(keys) or _MISSING in values:
+            missing_keys = ', '.join(
+                key
+                for position, key in enumerate(keys)
+                if position >= len(values) or values[position] is _MISSING
+            )
+            raise TypeError(f'{self.__class__.__name__} is missing values for keys: {missing_keys}.')
+        self._checkpoint_data = dict(zip(keys, values))
+
+    @classmethod
+    def get_template_keys(cls) -> Tuple[str, ...]:
+        return cls._activation_plan.keys
+
+    @classmethod
+    def get_activation_plan(cls) -> ActivationPlan:
+        return cls._activation_plan
+
+    def activate(self) -> 'ContextTemplate':
+        if self.is_active:
+            return self
+        plan = self._activation_plan
+        if self._checkpoint_data.keys() != plan.key_set:
+            super(ContextTemplate, self).activate()
+            return self
+        self._index = self.storage.push_context_with_plan(self, plan)
+        return self
+
+    def deactivate(self) -> None:
+        if not self.is_active:
+            return
+        plan = self._activation_plan
+        if self._checkpoint_data.keys() != plan.key_set:
+            super(ContextTemplate, self).deactivate()
+            return
+        self.storage.pop_context_with_plan(self.index, plan)
+        self._index = None
+        if self._deactivation_callbacks is not None:
+            self._run_deactivation_callbacks()
@@ -0,0 +1,205 @@
+from asyncio import current_task
+import itertools
+import json
+import os
+import threading
+from time import perf_counter_ns
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    IO,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+import weakref
+
+from stackholm.context import Context
+
+
+__all__ = (
+    'ContextTracer',
+    'TracedContext',
+)
+
+
+TraceEvent = Tuple[str, int, int, str, Optional[Dict[str, Any]]]
+
+
+class ContextTracer:
+
+    keys: Tuple[str, ...]
+
+    max_events: Optional[int]
+
+    clock: Callable[[], int]
+
+    events: List[TraceEvent]
+
+    dropped_events: int
+
+    _origin: int
+
+    _track_names: Dict[int, str]
+
+    _track_ids: 'weakref.WeakKeyDictionary[Any, int]'
+
+    _track_counter: 'itertools.count[int]'
+
+    def __init__(
+        self,
+        keys: Sequence[str] = (),
+        max_events: Optional[int] = None,
+        clock: Callable[[], int] = perf_counter_ns,
+    ) -> None:
+        self.keys = tuple(keys)
+        self.max_events = max_events
+        self.clock = clock
+        self._origin = clock()
+        self.events = []
+        self.dropped_events = 0
+        self._track_names = {}
+        self._track_ids = weakref.WeakKeyDictionary()
+        self._track_counter = itertools.count(1)
+
+    def _get_track(self) -> int:
+        thread = threading.current_thread()
+        try:
+            owner: Any = current_task()
+        except RuntimeError:
+            owner = None
+        if owner is None:
+            owner = thread
+        track = self._track_ids.get(owner)
+        if track is None:
+            track = next(self._track_counter)
+            self._track_ids[owner] = track
+            if owner is thread:
+                self._track_names[track] = thread.name
+            else:
+                self._track_names[track] = f'{owner.get_name()} ({thread.name})'
+        return track
+
+    def _add_event(
+        self,
+        phase: str,
+        label: str,
+        args: Optional[Dict[str, Any]],
+    ) -> None:
+        if self.max_events is not None and len(self.events) >= self.max_events:
+            self.dropped_events += 1
+            return
+        self.events.append((phase, self.clock(), self._get_track(), label, args))
+
+    def record_enter(
+        self,
+        context: 'TracedContext',
+    ) -> None:
+        self._add_event('B', context.get_trace_label(), None)
+
+    def record_exit(
+        self,
+        context: 'TracedContext',
+    ) -> None:
+        args: Optional[Dict[str, Any]] = None
+        if self.keys:
+            context_class = context.__class__
+            args = {}
+            for key in self.keys:
+                nearest_context = context_class.get_nearest_checkpoint(key)
+                if nearest_context is not None and key in nearest_context._checkpoint_data:
+                    args[key] = nearest_context._checkpoint_data[key]
+        self._add_event('E', context.get_trace_label(), args)
+
+    def clear(self) -> None:
+        self.events = []
+        self.dropped_events = 0
+
+    def export(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        origin = self._origin
+        trace_events: List[Dict[str, Any]] = [
+            {
+                'name': 'process_name',
+                'ph': 'M',
+                'pid': pid,
+                'tid': 0,
+                'args': {'name': f'stackholm ({pid})'},
+            },
+        ]
+        for track, name in list(self._track_names.items()):
+            trace_events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': pid,
+                'tid': track,
+                'args': {'name': name},
+            })
+        for phase, timestamp, track, label, args in list(self.events):
+            event: Dict[str, Any] = {
+                'name': label,
+                'cat': 'stackholm',
+                'ph': phase,
+                'ts': (timestamp - origin) / 1000,
+                'pid': pid,
+                'tid': track,
+            }
+            if args:
+                event['args'] = args
+            trace_events.append(event)
+        return {
+            'traceEvents': trace_events,
+            'displayTimeUnit': 'ns',
+            'otherData': {'droppedEvents': self.dropped_events},
+        }
+
+    def dump(
+        self,
+        file: IO[str],
+    ) -> None:
+        json.dump(self.export(), file, default=repr)
+
+    def dumps(self) -> str:
+        return json.dumps(self.export(), default=repr)
+
+
+class TracedContext(Context):
+
+    tracer: Optional[ContextTracer] = None
+
+    trace_label: Optional[str] = None
+
+    _trace_label: Optional[str] = None
+
+    _is_traced: bool = False
+
+    def __init__(
+        self,
+        label: Optional[str] = None,
+    ) -> None:
+        super(TracedContext, self).__init__()
+        self._trace_label = label
+
+    def get_trace_label(self) -> str:
+        return self._trace_label or self.trace_label or self.__class__.__qualname__
+
+    def activate(self) -> 'TracedContext':
+        if self.is_active:
+            return self
+        super(TracedContext, self).activate()
+        tracer = self.tracer
+        if tracer is not None:
+            tracer.record_enter(self)
+            self._is_traced = True
+        return self
+
+    def deactivate(self) -> None:
+        if not self.is_active:
+            return
+        tracer = self.tracer
+        if self._is_traced and tracer is not None:
+            tracer.record_exit(self)
+        self._is_traced = False
+        super(TracedContext, self).deactivate()
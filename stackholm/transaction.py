@@ -0,0 +1,69 @@
+from types import TracebackType
+from typing import (
+    Optional,
+    Type,
+)
+
+from stackholm.aggregate import merge_aggregate_checkpoints
+from stackholm.context import Context
+
+
+__all__ = (
+    'TransactionalContext',
+)
+
+
+class TransactionalContext(Context):
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exception_type is None:
+            self.commit()
+        else:
+            if exception is not None and self.capture_exception_context:
+                self._capture_exception_context(exception)
+            self.rollback()
+
+    def deactivate(self) -> None:
+        self.commit()
+
+    def commit(self) -> None:
+        if not self.is_active:
+            return
+        index = self.index
+        storage = self.storage
+        checkpoint_data = self._checkpoint_data
+        if index == 0:
+            storage.pop_context_with_checkpoints(index, checkpoint_data.keys())
+        else:
+            parent = storage.state.get_contexts()[index - 1]
+            parent_checkpoint_data = parent._checkpoint_data
+            storage.merge_context(index, checkpoint_data.keys(), index - 1, parent_checkpoint_data.keys())
+            merge_aggregate_checkpoints(parent_checkpoint_data, checkpoint_data)
+            parent_checkpoint_data.update(checkpoint_data)
+            if parent._checkpoint_expirations is not None:
+                for key in checkpoint_data.keys():
+                    parent._remove_checkpoint_expiration(key)
+            if self._checkpoint_expirations is not None:
+                if parent._checkpoint_expirations is None:
+                    parent._checkpoint_expirations = {}
+                parent._checkpoint_expirations.update(self._checkpoint_expirations)
+            self._move_resource_releases(parent)
+        self._finish()
+
+    def rollback(self) -> None:
+        if not self.is_active:
+            return
+        self.storage.pop_context_with_checkpoints(self.index, self._checkpoint_data.keys())
+        self._finish()
+
+    def _finish(self) -> None:
+        self._index = None
+        self._checkpoint_data = {}
+        self._checkpoint_expirations = None
+        if self._deactivation_callbacks is not None:
+            self._run_deactivation_callbacks()
@@ -0,0 +1,435 @@
+import base64
+import json
+import mmap
+import struct
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    KeysView,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
+
+from stackholm.context import Context
+from stackholm.exceptions import WireFormatError
+
+
+__all__ = (
+    'WIRE_FORMAT_VERSION',
+    'EncodedValue',
+    'LazyCheckpointData',
+    'encode_checkpoint_values',
+    'encode_context',
+    'encode_context_header',
+    'decode_checkpoint_values',
+    'decode_header',
+    'restore_context',
+    'restore_context_from_header',
+)
+
+
+CONTEXT_T = TypeVar('CONTEXT_T', bound=Context)
+
+LAZY_T = TypeVar('LAZY_T', bound='LazyCheckpointData')
+
+BytesLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+WIRE_FORMAT_VERSION = 1
+
+
+TAG_NONE = 0
+
+TAG_TRUE = 1
+
+TAG_FALSE = 2
+
+TAG_INT = 3
+
+TAG_FLOAT = 4
+
+TAG_STR = 5
+
+TAG_BYTES = 6
+
+TAG_JSON = 7
+
+
+_FLOAT_STRUCT = struct.Struct('>d')
+
+_MISSING = object()
+
+
+def _encode_varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    buffer = bytearray()
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+    return bytes(buffer)
+
+
+def _decode_varint(
+    buffer: memoryview,
+    offset: int,
+) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        try:
+            byte = buffer[offset]
+        except IndexError:
+            raise WireFormatError('Truncated varint.') from None
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def _encode_value(value: Any) -> Tuple[int, bytes]:
+    if value is None:
+        return TAG_NONE, b''
+    if value is True:
+        return TAG_TRUE, b''
+    if value is False:
+        return TAG_FALSE, b''
+    value_type = value.__class__
+    if value_type is str:
+        return TAG_STR, value.encode('utf-8')
+    if value_type is int:
+        return TAG_INT, value.to_bytes((value.bit_length() + 8) // 8, 'big', signed=True)
+    if value_type is bytes:
+        return TAG_BYTES, value
+    if value_type is float:
+        return TAG_FLOAT, _FLOAT_STRUCT.pack(value)
+    try:
+        return TAG_JSON, json.dumps(value, separators=(',', ':')).encode('utf-8')
+    except (TypeError, ValueError) as exception:
+        raise WireFormatError(f'Unserializable value: {exception}.') from exception
+
+
+def _decode_value(
+    tag: int,
+    payload: memoryview,
+) -> Any:
+    try:
+        return _decode_tagged_value(tag, payload)
+    except (ValueError, struct.error) as exception:
+        raise WireFormatError(f'Malformed value: {exception}.') from exception
+
+
+def _decode_tagged_value(
+    tag: int,
+    payload: memoryview,
+) -> Any:
+    if tag == TAG_STR:
+        return str(payload, 'utf-8')
+    if tag == TAG_NONE:
+        return None
+    if tag == TAG_TRUE:
+        return True
+    if tag == TAG_FALSE:
+        return False
+    if tag == TAG_INT:
+        return int.from_bytes(payload, 'big', signed=True)
+    if tag == TAG_BYTES:
+        return bytes(payload)
+    if tag == TAG_FLOAT:
+        return _FLOAT_STRUCT.unpack(payload)[0]
+    if tag == TAG_JSON:
+        return json.loads(str(payload, 'utf-8'))
+    raise WireFormatError(f'Unknown value tag: {tag}.')
+
+
+def _encode_entry(
+    key: str,
+    value: Any,
+) -> bytes:
+    encoded_key = key.encode('utf-8')
+    tag, payload = _encode_value(value)
+    return b''.join((
+        _encode_varint(len(encoded_key)),
+        encoded_key,
+        bytes((tag,)),
+        _encode_varint(len(payload)),
+        payload,
+    ))
+
+
+class EncodedValue:
+
+    __slots__ = (
+        'tag',
+        'payload',
+        'entry',
+        '_value',
+    )
+
+    tag: int
+
+    payload: memoryview
+
+    entry: memoryview
+
+    _value: Any
+
+    def __init__(
+        self,
+        tag: int,
+        payload: memoryview,
+        entry: memoryview,
+    ) -> None:
+        self.tag = tag
+        self.payload = payload
+        self.entry = entry
+        self._value = _MISSING
+
+    @property
+    def is_cached(self) -> bool:
+        return self._value is not _MISSING
+
+    def decode(self) -> Any:
+        return _decode_value(self.tag, self.payload)
+
+    def decode_once(self) -> Any:
+        value = self._value
+        if value is _MISSING:
+            value = self._value = _decode_value(self.tag, self.payload)
+        return value
+
+
+class LazyCheckpointData(MutableMapping[str, Any]):
+
+    __slots__ = (
+        '_data',
+    )
+
+    _data: Dict[str, Any]
+
+    def __init__(
+        self,
+        values: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        self._data = dict(values) if values is not None else {}
+
+    def _resolve(
+        self,
+        key: str,
+        value: Any,
+    ) -> Any:
+        if value.__class__ is EncodedValue:
+            value = value.decode()
+            self._data[key] = value
+        return value
+
+    def __getitem__(
+        self,
+        key: str,
+    ) -> Any:
+        return self._resolve(key, self._data[key])
+
+    def __setitem__(
+        self,
+        key: str,
+        value: Any,
+    ) -> None:
+        self._data[key] = value
+
+    def __delitem__(
+        self,
+        key: str,
+    ) -> None:
+        del self._data[key]
+
+    def __contains__(
+        self,
+        key: object,
+    ) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self._data!r})'
+
+    def keys(self) -> KeysView[str]:
+        return self._data.keys()
+
+    def get(
+        self,
+        key: str,
+        default: Any = None,
+    ) -> Any:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        return self._resolve(key, value)
+
+    def pop(
+        self,
+        key: str,
+        default: Any = _MISSING,
+    ) -> Any:
+        value = self._data.pop(key, _MISSING)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        if value.__class__ is EncodedValue:
+            return value.decode()
+        return value
+
+    def copy(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self._data}
+
+    def lazy_copy(self: LAZY_T) -> LAZY_T:
+        checkpoint_data = self.__class__()
+        checkpoint_data._data = self._data.copy()
+        return checkpoint_data
+
+    def set_encoded_value(
+        self,
+        key: str,
+        value: EncodedValue,
+    ) -> None:
+        self._data[key] = value
+
+    def get_encoded_entry(
+        self,
+        key: str,
+    ) -> Optional[memoryview]:
+        value = self._data.get(key)
+        if value.__class__ is EncodedValue:
+            return value.entry
+        return None
+
+    def is_decoded(
+        self,
+        key: str,
+    ) -> bool:
+        return self._data.get(key).__class__ is not EncodedValue
+
+
+def encode_checkpoint_values(values: Mapping[str, Any]) -> bytes:
+    entries: List[BytesLike] = [bytes((WIRE_FORMAT_VERSION,))]
+    for key, value in values.items():
+        entries.append(_encode_entry(key, value))
+    return b''.join(entries)
+
+
+def encode_context(
+    context_class: Type[Context],
+    keys: Iterable[str],
+) -> bytes:
+    entries: List[BytesLike] = [bytes((WIRE_FORMAT_VERSION,))]
+    for key in keys:
+        context = context_class.get_nearest_checkpoint(key)
+        if context is None:
+            continue
+        checkpoint_data = context._checkpoint_data
+        if key not in checkpoint_data:
+            continue
+        if checkpoint_data.__class__ is LazyCheckpointData:
+            entry = checkpoint_data.get_encoded_entry(key)  # type: ignore[attr-defined]
+            if entry is not None:
+                entries.append(entry)
+                continue
+        entries.append(_encode_entry(key, checkpoint_data[key]))
+    return b''.join(entries)
+
+
+def encode_context_header(
+    context_class: Type[Context],
+    keys: Iterable[str],
+) -> str:
+    data = encode_context(context_class, keys)
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+@overload
+def decode_checkpoint_values(data: BytesLike) -> LazyCheckpointData:
+    ...
+
+
+@overload
+def decode_checkpoint_values(
+    data: BytesLike,
+    data_class: Type[LAZY_T],
+) -> LAZY_T:
+    ...
+
+
+def decode_checkpoint_values(
+    data,
+    data_class=LazyCheckpointData,
+):
+    buffer = memoryview(data)
+    if not buffer:
+        raise WireFormatError('Empty wire format data.')
+    if buffer[0] != WIRE_FORMAT_VERSION:
+        raise WireFormatError(f'Unsupported wire format version: {buffer[0]}.')
+    values = data_class()
+    size = len(buffer)
+    offset = 1
+    while offset < size:
+        entry_start = offset
+        key_length, offset = _decode_varint(buffer, offset)
+        key_end = offset + key_length
+        if key_end >= size:
+            raise WireFormatError('Truncated entry.')
+        try:
+            key = str(buffer[offset:key_end], 'utf-8')
+        except UnicodeDecodeError as exception:
+            raise WireFormatError(f'Malformed key: {exception}.') from exception
+        tag = buffer[key_end]
+        payload_length, offset = _decode_varint(buffer, key_end + 1)
+        payload_end = offset + payload_length
+        if payload_end > size:
+            raise WireFormatError('Truncated entry.')
+        values.set_encoded_value(
+            key,
+            EncodedValue(tag, buffer[offset:payload_end], buffer[entry_start:payload_end]),
+        )
+        offset = payload_end
+    return values
+
+
+def decode_header(header: Union[str, bytes]) -> bytes:
+    try:
+        if isinstance(header, str):
+            header = header.encode('ascii')
+        return base64.urlsafe_b64decode(header + b'=' * (-len(header) % 4))
+    except ValueError as exception:
+        raise WireFormatError(str(exception)) from exception
+
+
+def restore_context(
+    context_class: Type[CONTEXT_T],
+    data: BytesLike,
+) -> CONTEXT_T:
+    context = context_class()
+    context._checkpoint_data = decode_checkpoint_values(data)  # type: ignore[assignment]
+    return context
+
+
+def restore_context_from_header(
+    context_class: Type[CONTEXT_T],
+    header: Union[str, bytes],
+) -> CONTEXT_T:
+    return restore_context(context_class, decode_header(header))
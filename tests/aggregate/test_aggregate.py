@@ -0,0 +1,51 @@
+import operator
+import unittest
+
+import stackholm
+
+
+class AggregateKeyTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.storage = stackholm.OptimizedListStorage()
+        self.context_class = self.storage.create_context_class()
+
+    def test_minimum(self) -> None:
+        deadline: stackholm.AggregateKey[int] = stackholm.AggregateKey('deadline', min)
+        self.assertIsNone(deadline.get(self.context_class))
+        with self.context_class():
+            deadline.set(self.context_class, 30)
+            with self.context_class():
+                self.assertEqual(deadline.get(self.context_class), 30)
+                deadline.set(self.context_class, 50)
+                self.assertEqual(deadline.get(self.context_class), 30)
+                self.assertEqual(self.context_class.get_checkpoint_value('deadline'), 50)
+                with self.context_class():
+                    deadline.set(self.context_class, 10)
+                    self.assertEqual(deadline.get(self.context_class), 10)
+                    deadline.set(self.context_class, 40)
+                    self.assertEqual(deadline.get(self.context_class), 30)
+                self.assertEqual(deadline.get(self.context_class), 30)
+            deadline.set(self.context_class, 60)
+            self.assertEqual(deadline.get(self.context_class), 60)
+        self.assertEqual(deadline.get(self.context_class, 0), 0)
+
+    def test_union_and_sum(self) -> None:
+        permissions = stackholm.AggregateKey('permissions', operator.or_)
+        budget = stackholm.AggregateKey('budget', operator.add)
+        with self.context_class():
+            permissions.set(self.context_class, frozenset({'read'}))
+            budget.set(self.context_class, 10)
+            with self.context_class():
+                permissions.set(self.context_class, frozenset({'write'}))
+                budget.set(self.context_class, 5)
+                self.assertEqual(permissions.get(self.context_class), {'read', 'write'})
+                self.assertEqual(budget.get(self.context_class), 15)
+                self.assertEqual(budget.pop(self.context_class), 5)
+                self.assertEqual(budget.get(self.context_class), 10)
+            self.assertEqual(permissions.get(self.context_class), {'read'})
+
+    def test_requires_active_context(self) -> None:
+        deadline: stackholm.AggregateKey[int] = stackholm.AggregateKey('deadline', min)
+        with self.assertRaises(stackholm.NoContextIsActive):
+            deadline.set(self.context_class, 1)
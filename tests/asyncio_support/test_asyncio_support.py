@@ -0,0 +1,198 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+import io
+import os
+import tempfile
+from typing import (
+    List,
+    Optional,
+)
+import unittest
+
+import stackholm
+from stackholm import (
+    asyncio as stackholm_asyncio,
+    flight_recorder,
+    recording,
+)
+from stackholm.state import State
+
+
+class AsyncioTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.storage = stackholm.ContextVarStorage(ContextVar[State]('stackholm.tests.asyncio'))
+        self.context_class = self.storage.create_context_class()
+
+    def test_async_with(self) -> None:
+        context_class = self.context_class
+        transaction_class = self.storage.create_context_class(base=stackholm.TransactionalContext)
+
+        async def main() -> None:
+            async with context_class() as context:
+                self.assertIs(context_class.get_current(), context)
+                context_class.set_checkpoint_value('a', 1)
+                with self.assertRaises(ValueError):
+                    async with transaction_class():
+                        context_class.set_checkpoint_value('a', 2)
+                        raise ValueError()
+                self.assertEqual(context_class.get_checkpoint_value('a'), 1)
+            self.assertIsNone(context_class.get_current())
+
+        asyncio.run(main())
+
+    def test_task_factory(self) -> None:
+        context_class = self.context_class
+
+        async def child(name: str) -> Optional[str]:
+            inherited = context_class.get_checkpoint_value('name')
+            with context_class():
+                context_class.set_checkpoint_value('name', name)
+                await asyncio.sleep(0)
+                self.assertEqual(context_class.get_checkpoint_value('name'), name)
+            return inherited
+
+        async def main() -> None:
+            stackholm_asyncio.install_task_factory([self.storage])
+            with context_class() as root:
+                context_class.set_checkpoint_value('name', 'root')
+                state = self.storage.get_state()
+                results = await asyncio.gather(*(child(f'child-{index}') for index in range(10)))
+                self.assertEqual(results, ['root'] * 10)
+                self.assertIs(self.storage.get_state(), state)
+                self.assertEqual(list(state.get_contexts()), [root])
+                self.assertEqual(context_class.get_checkpoint_value('name'), 'root')
+
+        asyncio.run(main())
+
+    def test_call_soon_and_later(self) -> None:
+        context_class = self.context_class
+        values: List[Optional[int]] = []
+
+        def callback() -> None:
+            with context_class():
+                context_class.set_checkpoint_value('value', 2)
+            values.append(context_class.get_checkpoint_value('value'))
+
+        async def main() -> None:
+            with context_class():
+                context_class.set_checkpoint_value('value', 1)
+                stackholm_asyncio.call_soon([self.storage], callback)
+                stackholm_asyncio.call_later([self.storage], 0, callback)
+                await asyncio.sleep(0.01)
+                self.assertEqual(len(self.storage.get_state().get_contexts()), 1)
+
+        asyncio.run(main())
+        self.assertEqual(values, [1, 1])
+
+    def test_run_in_executor(self) -> None:
+        thread_storage = stackholm.ThreadLocalStorage()
+        thread_context_class = thread_storage.create_context_class()
+        context_class = self.context_class
+
+        def work() -> List[Optional[str]]:
+            result: List[Optional[str]] = [
+                context_class.get_checkpoint_value('task'),
+                thread_context_class.get_checkpoint_value('thread'),
+            ]
+            with context_class():
+                context_class.set_checkpoint_value('task', 'changed')
+            return result
+
+        async def main() -> None:
+            with context_class(), thread_context_class():
+                context_class.set_checkpoint_value('task', 'task')
+                thread_context_class.set_checkpoint_value('thread', 'thread')
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    result = await stackholm_asyncio.run_in_executor(
+                        [self.storage, thread_storage],
+                        executor,
+                        work,
+                    )
+                    thread_state = await asyncio.get_running_loop().run_in_executor(
+                        executor,
+                        thread_storage.get_state,
+                    )
+                self.assertEqual(result, ['task', 'thread'])
+                self.assertEqual(list(thread_state.get_contexts()), [])
+                self.assertEqual(context_class.get_checkpoint_value('task'), 'task')
+
+        asyncio.run(main())
+
+    def test_fork_states(self) -> None:
+        for state_class in (stackholm.OptimizedListState, stackholm.CompactArrayState, stackholm.ReferenceState):
+            storage = stackholm.OptimizedListStorage(state_class=state_class)
+            context_class = storage.create_context_class()
+            with context_class() as root:
+                context_class.set_checkpoint_value('a', 1)
+                forked = storage.fork_state()
+                with context_class():
+                    context_class.set_checkpoint_value('a', 2)
+                    self.assertIs(forked.get_nearest_checkpoint('a'), root)
+                    contexts = list(forked.get_contexts())
+                    self.assertEqual(contexts[:-1], [root])
+                    self.assertIsInstance(contexts[-1], storage.get_task_context_class())
+
+    def test_child_writes_are_copy_on_write(self) -> None:
+        context_class = self.context_class
+
+        async def child() -> Optional[str]:
+            context_class.set_checkpoint_value('name', 'child')
+            context_class.set_checkpoint_value('extra', 1)
+            await asyncio.sleep(0)
+            return context_class.get_checkpoint_value('name')
+
+        async def main() -> None:
+            stackholm_asyncio.install_task_factory([self.storage])
+            with context_class() as root:
+                context_class.set_checkpoint_value('name', 'root')
+                self.assertEqual(await asyncio.create_task(child()), 'child')
+                self.assertEqual(context_class.get_checkpoint_value('name'), 'root')
+                self.assertEqual(root._checkpoint_data, {'name': 'root'})
+                self.assertEqual(list(self.storage.get_state().get_contexts()), [root])
+
+        asyncio.run(main())
+
+    def test_inherited_frames_are_read_only(self) -> None:
+        for state_class in (stackholm.OptimizedListState, stackholm.CompactArrayState, stackholm.ReferenceState):
+            storage = stackholm.OptimizedListStorage(state_class=state_class)
+            context_class = storage.create_context_class()
+            with context_class() as outer:
+                context_class.set_checkpoint_value('name', 'outer')
+                inner = context_class().activate()
+                context_class.set_checkpoint_value('name', 'inner')
+                context_class.set_checkpoint_value('token', 'secret', ttl=0)
+                parent_state = storage.get_state()
+                child_state = storage.fork_state()
+                storage.set_state(child_state)
+                self.assertEqual(context_class.pop_checkpoint_value('name'), 'inner')
+                self.assertEqual(context_class.get_checkpoint_value('name'), 'outer')
+                self.assertIsNone(context_class.get_checkpoint_value('token'))
+                self.assertEqual(context_class.purge_expired_checkpoints(), 0)
+                self.assertEqual(set(child_state.get_checkpoint_keys()), {'name'})
+                storage.set_state(storage.fork_state())
+                self.assertEqual(context_class.get_checkpoint_value('name'), 'outer')
+                storage.set_state(parent_state)
+                self.assertEqual(inner._checkpoint_data, {'name': 'inner', 'token': 'secret'})
+                self.assertIs(parent_state.get_nearest_checkpoint('name'), inner)
+                self.assertIs(parent_state.get_nearest_checkpoint('token'), inner)
+                self.assertEqual(outer._checkpoint_data, {'name': 'outer'})
+                inner.deactivate()
+
+    def test_fork_recorded_states(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        trace_recorder = recording.TraceRecorder(io.BytesIO())
+        self.addCleanup(trace_recorder.close)
+        ring_recorder = flight_recorder.FlightRecorder(os.path.join(directory.name, 'trace.flight'))
+        self.addCleanup(ring_recorder.close)
+        for state_factory in (trace_recorder.create_state, ring_recorder.create_state):
+            storage = stackholm.OptimizedListStorage(state_class=state_factory)
+            context_class = storage.create_context_class()
+            with context_class() as root:
+                context_class.set_checkpoint_value('a', 1)
+                forked = storage.fork_state()
+                self.assertIsInstance(forked, type(storage.get_state()))
+                self.assertIsNot(forked, storage.get_state())
+                self.assertIs(forked.get_nearest_checkpoint('a'), root)
@@ -0,0 +1,89 @@
+import asyncio
+from contextvars import ContextVar
+import threading
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+import unittest
+
+import stackholm
+from stackholm.auto import (
+    RuntimeInfo,
+    inspect_runtime,
+)
+from stackholm.storages._discovery import IS_ASGIREF_INSTALLED
+
+
+class AutoStorageTestCase(unittest.TestCase):
+
+    def test_single_threaded(self) -> None:
+        storage = stackholm.auto_storage(runtime=RuntimeInfo())
+        self.assertIs(storage.__class__, stackholm.ContextVarStorage)
+
+    def test_import_time_selection_with_later_threads(self) -> None:
+        storage = stackholm.auto_storage(runtime=RuntimeInfo())
+        context_class = storage.create_context_class()
+        barrier = threading.Barrier(2)
+        values: Dict[str, Any] = {}
+
+        def run(tenant: str) -> None:
+            with context_class():
+                context_class.set_checkpoint_value('tenant', tenant)
+                barrier.wait()
+                values[tenant] = context_class.get_checkpoint_value('tenant')
+
+        threads = [threading.Thread(target=run, args=(tenant,)) for tenant in ('A', 'B')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(values, {'A': 'A', 'B': 'B'})
+
+    def test_threads(self) -> None:
+        storage = stackholm.auto_storage(runtime=RuntimeInfo(has_threads=True))
+        self.assertIs(storage.__class__, stackholm.ThreadLocalStorage)
+        storage = stackholm.auto_storage(runtime=RuntimeInfo(is_free_threaded=True))
+        self.assertIs(storage.__class__, stackholm.ThreadLocalStorage)
+
+    def test_running_loop(self) -> None:
+
+        async def create_storage() -> stackholm.Storage:
+            self.assertTrue(inspect_runtime().has_running_loop)
+            return stackholm.auto_storage(runtime=RuntimeInfo(has_running_loop=True, has_threads=True))
+
+        storage = asyncio.run(create_storage())
+        self.assertIs(storage.__class__, stackholm.ContextVarStorage)
+        self.assertFalse(inspect_runtime().has_running_loop)
+
+    @unittest.skipUnless(IS_ASGIREF_INSTALLED, 'asgiref is not installed')
+    def test_asgiref(self) -> None:
+        storage = stackholm.auto_storage(runtime=RuntimeInfo(uses_asgiref=True, has_running_loop=True))
+        self.assertIs(storage.__class__, stackholm.ASGIRefLocalStorage)  # type: ignore[attr-defined]
+
+    def test_inspect_threads(self) -> None:
+        release = threading.Event()
+        thread = threading.Thread(target=release.wait)
+        thread.start()
+        try:
+            self.assertTrue(inspect_runtime().has_threads)
+        finally:
+            release.set()
+            thread.join()
+
+    def test_contextvar_storage_in_new_thread(self) -> None:
+        storage = stackholm.ContextVarStorage(ContextVar('test_contextvar_storage_in_new_thread'))
+        context_class = storage.create_context_class()
+        values: List[Optional[int]] = []
+
+        def run() -> None:
+            with context_class():
+                context_class.set_checkpoint_value('a', 1)
+                values.append(context_class.get_checkpoint_value('a'))
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(values, [1])
@@ -0,0 +1,78 @@
+from typing import List
+import unittest
+
+import stackholm
+
+
+class ScopedCacheTestCase(unittest.TestCase):
+
+    def test_cache_is_scoped_to_current_context(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        calls: List[int] = []
+
+        @stackholm.scoped_cache(context_class)
+        def square(value: int) -> int:
+            calls.append(value)
+            return value * value
+
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(2), 4)
+        self.assertEqual(calls, [2, 2])
+
+        with context_class() as context:
+            self.assertEqual(square(3), 9)
+            self.assertEqual(square(3), 9)
+            self.assertEqual(calls, [2, 2, 3])
+            with context_class():
+                self.assertEqual(square(3), 9)
+                self.assertEqual(calls, [2, 2, 3, 3])
+            square.cache_clear()  # type: ignore[attr-defined]
+            self.assertEqual(square(3), 9)
+            self.assertEqual(calls, [2, 2, 3, 3, 3])
+
+        self.assertEqual(context.block_data, {})
+        with context:
+            self.assertEqual(square(3), 9)
+            self.assertEqual(calls, [2, 2, 3, 3, 3, 3])
+
+    def test_cache_is_scoped_to_marked_context(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        calls: List[str] = []
+
+        @stackholm.scoped_cache(context_class, scope_key='request')
+        def resolve(name: str, *, strict: bool = False) -> str:
+            calls.append(name)
+            return name.upper()
+
+        with context_class():
+            context_class.set_checkpoint_value('request', 1)
+            with context_class():
+                self.assertEqual(resolve('a'), 'A')
+            with context_class():
+                self.assertEqual(resolve('a'), 'A')
+                self.assertEqual(resolve('a', strict=True), 'A')
+                self.assertEqual(resolve('a', strict=True), 'A')
+
+        self.assertEqual(calls, ['a', 'a'])
+
+    def test_lru_eviction(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        calls: List[int] = []
+
+        @stackholm.scoped_cache(context_class, maxsize=2)
+        def identity(value: int) -> int:
+            calls.append(value)
+            return value
+
+        with context_class():
+            identity(1)
+            identity(2)
+            identity(1)
+            identity(3)
+            identity(1)
+            identity(2)
+
+        self.assertEqual(calls, [1, 2, 3, 2])
@@ -1,7 +1,14 @@
-from typing import cast
+import threading
+from typing import (
+    List,
+    Set,
+    cast,
+)
 import unittest
+from unittest import mock
 
 import stackholm
+from stackholm.state import State
 
 
 class ContextTestCase(unittest.TestCase):
@@ -118,3 +125,178 @@ class ContextTestCase(unittest.TestCase):
             self.assertEqual(context_class.get_checkpoint_value('a'), 1)
 
         self.assertIsNone(context_class.get_checkpoint_value('a'))
+
+    def test_get_or_create_resource(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        closed: List[object] = []
+
+        with self.assertRaises(stackholm.NoContextIsActive):
+            context_class.get_or_create_resource('connection', object)
+
+        with context_class() as context_1:
+            connection = context_class.get_or_create_resource('connection', object, closed.append)
+
+            with context_class():
+                self.assertIs(context_class.get_or_create_resource('connection', object, closed.append), connection)
+
+                with context_class():
+                    session = context_class.get_or_create_resource('session', object, closed.append)
+                    self.assertIs(context_class.get_or_create_resource('session', object), session)
+
+                self.assertEqual(closed, [session])
+                self.assertIsNot(context_class.get_or_create_resource('session', object), session)
+
+            self.assertEqual(closed, [session])
+            self.assertIs(context_class.get_or_create_resource('connection', object), connection)
+
+        self.assertEqual(closed, [session, connection])
+        self.assertEqual(context_1.checkpoint_data, {})
+
+    def test_deactivation_callbacks(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        calls: List[int] = []
+        context = context_class()
+
+        with self.assertRaises(stackholm.ContextIsNotActive):
+            context.add_deactivation_callback(lambda: None)
+
+        def fail() -> None:
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            with context:
+                context.add_deactivation_callback(lambda: calls.append(1))
+                context.add_deactivation_callback(fail)
+                context.add_deactivation_callback(lambda: calls.append(2))
+
+        self.assertEqual(calls, [2, 1])
+        self.assertFalse(context.is_active)
+
+    def test_get_checkpoint_value_for_update(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+
+        with self.assertRaises(stackholm.NoContextIsActive):
+            context_class.get_checkpoint_value_for_update('a')
+
+        with context_class() as context_1:
+            permissions = {'read'}
+            context_class.set_checkpoint_value('permissions', permissions)
+            self.assertIs(context_class.get_checkpoint_value_for_update('permissions'), permissions)
+
+            with context_class() as context_2:
+                self.assertIs(context_class.get_checkpoint_value('permissions'), permissions)
+
+                local_permissions = cast(Set[str], context_class.get_checkpoint_value_for_update('permissions'))
+                self.assertIsNot(local_permissions, permissions)
+                local_permissions.add('write')
+                self.assertIs(context_class.get_nearest_checkpoint('permissions'), context_2)
+                self.assertIs(context_class.get_checkpoint_value_for_update('permissions'), local_permissions)
+                self.assertEqual(context_class.get_checkpoint_value('permissions'), {'read', 'write'})
+
+                self.assertIsNone(context_class.get_checkpoint_value_for_update('missing'))
+                self.assertIsNone(context_class.get_nearest_checkpoint('missing'))
+                flags = context_class.get_checkpoint_value_for_update('flags', [])
+                flags.append(1)
+                self.assertEqual(context_class.get_checkpoint_value('flags'), [1])
+
+            self.assertEqual(permissions, {'read'})
+            self.assertIs(context_class.get_nearest_checkpoint('permissions'), context_1)
+            self.assertIsNone(context_class.get_checkpoint_value('flags'))
+
+            lock = threading.Lock()
+            context_class.set_checkpoint_value('lock', lock)
+            with context_class():
+                self.assertIs(context_class.get_checkpoint_value_for_update('lock'), lock)
+                self.assertIs(context_class.get_nearest_checkpoint('lock'), context_1)
+
+    def test_elided(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        state = cast(stackholm.OptimizedListState, storage.state)
+        context_class = storage.create_context_class()
+        depth = 500
+
+        def walk(level: int) -> None:
+            with context_class.elided():
+                self.assertEqual(len(state.contexts), 1)
+                self.assertEqual(context_class.get_checkpoint_value('level'), 0)
+                if level < depth:
+                    walk(level + 1)
+
+        with context_class() as root:
+            context_class.set_checkpoint_value('level', 0)
+            walk(1)
+            self.assertEqual(state.elided_frame_counts, {})
+            self.assertIs(context_class.get_current(), root)
+
+            with context_class.elided():
+                with context_class.elided():
+                    current = context_class.get_current()
+                    self.assertIsNotNone(current)
+                    self.assertIsNot(current, root)
+                    self.assertIs(context_class.get_current(), current)
+                    context_class.set_checkpoint_value('level', 2)
+                    self.assertEqual(state.elided_frame_counts, {1: 1})
+
+                    with context_class.elided():
+                        self.assertEqual(context_class.get_checkpoint_value('level'), 2)
+                        context_class.set_checkpoint_value('level', 3)
+                        self.assertEqual(len(state.contexts), 3)
+
+                    self.assertEqual(context_class.get_checkpoint_value('level'), 2)
+
+                self.assertEqual(len(state.contexts), 1)
+                self.assertEqual(context_class.get_checkpoint_value('level'), 0)
+                self.assertIs(context_class.get_current(), context_class.get_current())
+
+            self.assertIs(context_class.get_current(), root)
+            self.assertEqual(state.elided_frame_counts, {})
+
+    def test_state_requires_elision_and_inspection_methods(self) -> None:
+        abstract_methods = {
+            'push_elided_frame',
+            'pop_elided_frame',
+            'get_elided_depth',
+            'materialize_elided_frame',
+            'get_contexts',
+            'get_checkpoint_keys',
+            'fork',
+        }
+        self.assertTrue(abstract_methods <= State.__abstractmethods__)
+        for state_class in (stackholm.OptimizedListState, stackholm.CompactArrayState, stackholm.ReferenceState):
+            self.assertEqual(state_class.__abstractmethods__, frozenset())
+
+    def test_checkpoint_value_ttl(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        state = cast(stackholm.OptimizedListState, storage.state)
+        context_class = storage.create_context_class()
+
+        with mock.patch('stackholm.context.monotonic', return_value=100.0) as monotonic:
+            with context_class() as root:
+                context_class.set_checkpoint_value('token', 'root')
+                context_class.set_checkpoint_value('config', 'root', ttl=10)
+                with context_class() as child:
+                    context_class.set_checkpoint_value('token', 'child', ttl=5)
+                    self.assertEqual(context_class.get_checkpoint_value('token'), 'child')
+
+                    monotonic.return_value = 105.0
+                    self.assertEqual(context_class.get_checkpoint_value('token'), 'root')
+                    self.assertNotIn('token', child.checkpoint_data)
+                    self.assertEqual(state.checkpoint_indexes['token'], [0])
+
+                    context_class.set_checkpoint_value('token', 'child', ttl=5)
+                    context_class.set_checkpoint_value('token', 'child')
+                    monotonic.return_value = 200.0
+                    self.assertEqual(context_class.get_checkpoint_value('token'), 'child')
+                    self.assertIsNone(child._checkpoint_expirations)
+
+                    self.assertEqual(context_class.purge_expired_checkpoints(), 1)
+                    self.assertNotIn('config', root.checkpoint_data)
+                    self.assertNotIn('config', state.checkpoint_indexes)
+                    self.assertIsNone(context_class.get_checkpoint_value('config'))
+
+                context_class.set_checkpoint_value('config', 'root', ttl=1)
+                self.assertEqual(context_class.pop_checkpoint_value('config'), 'root')
+                self.assertIsNone(root._checkpoint_expirations)
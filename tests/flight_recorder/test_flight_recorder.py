@@ -0,0 +1,126 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import stackholm
+from stackholm import flight_recorder
+from stackholm.recording import Opcode
+
+
+class FlightRecorderTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'trace.flight')
+
+    def test_records_operations(self) -> None:
+        with flight_recorder.FlightRecorder(self.path, capacity=64) as recorder:
+            storage = stackholm.OptimizedListStorage(state_class=recorder.create_state)
+            context_class = storage.create_context_class()
+            with context_class():
+                context_class.set_checkpoint_value('tenant', 'a')
+                with context_class():
+                    context_class.set_checkpoint_value('user', 'b')
+                    self.assertEqual(context_class.get_checkpoint_value('tenant'), 'a')
+                    with open(self.path, 'rb') as file:
+                        log = flight_recorder.read_flight_log(file.read())
+        operations = [(record.opcode, record.index, record.key) for record in log.records]
+        self.assertEqual(
+            operations,
+            [
+                (Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS, 0, None),
+                (Opcode.ADD_CHECKPOINT, 0, 'tenant'),
+                (Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS, 1, None),
+                (Opcode.ADD_CHECKPOINT, 1, 'user'),
+            ],
+        )
+        self.assertEqual(log.pid, os.getpid())
+        self.assertEqual(log.get_open_frames(), {0: [(0, ['tenant']), (1, ['user'])]})
+
+    def test_ring_buffer_wraps(self) -> None:
+        with flight_recorder.FlightRecorder(self.path, capacity=8) as recorder:
+            storage = stackholm.OptimizedListStorage(state_class=recorder.create_state)
+            context_class = storage.create_context_class()
+            for _ in range(10):
+                with context_class():
+                    pass
+        with open(self.path, 'rb') as file:
+            log = flight_recorder.read_flight_log(file.read())
+        self.assertEqual(len(log.records), 8)
+        self.assertEqual(log.records[-1].sequence, 20)
+        self.assertEqual(log.dropped, 12)
+        self.assertEqual(log.get_open_frames(), {})
+
+    def test_cli(self) -> None:
+        with flight_recorder.FlightRecorder(self.path) as recorder:
+            storage = stackholm.OptimizedListStorage(state_class=recorder.create_state)
+            context_class = storage.create_context_class()
+            context = context_class().activate()
+            context_class.set_checkpoint_value('request_id', 1)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(flight_recorder.main([self.path]), 0)
+            context.deactivate()
+        self.assertIn('add_checkpoint index=0 key=request_id', output.getvalue())
+        self.assertIn('index=0 keys=request_id', output.getvalue())
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'os.fork is not available')
+    def test_fork_reopens_per_process_ring(self) -> None:
+        with flight_recorder.FlightRecorder(self.path, capacity=64) as recorder:
+            storage = stackholm.OptimizedListStorage(state_class=recorder.create_state)
+            context_class = storage.create_context_class()
+            with context_class():
+                context_class.set_checkpoint_value('parent', 1)
+                pid = os.fork()
+                if pid == 0:
+                    try:
+                        with context_class():
+                            context_class.set_checkpoint_value('child', 2)
+                    finally:
+                        os._exit(0)
+                _, status = os.waitpid(pid, 0)
+                self.assertEqual(status, 0)
+                with open(self.path, 'rb') as file:
+                    parent_log = flight_recorder.read_flight_log(file.read())
+        root, extension = os.path.splitext(self.path)
+        with open(f'{root}-{pid}{extension}', 'rb') as file:
+            child_log = flight_recorder.read_flight_log(file.read())
+        self.assertEqual(parent_log.pid, os.getpid())
+        self.assertEqual([record.key for record in parent_log.records], [None, 'parent'])
+        self.assertEqual(child_log.pid, pid)
+        self.assertEqual(
+            [(record.sequence, record.opcode, record.key) for record in child_log.records],
+            [
+                (1, Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS, None),
+                (2, Opcode.ADD_CHECKPOINT, 'child'),
+                (3, Opcode.POP_CONTEXT_WITH_CHECKPOINTS, None),
+            ],
+        )
+
+    def test_close_removes_default_file(self) -> None:
+        recorder = flight_recorder.FlightRecorder(capacity=8)
+        self.assertTrue(os.path.exists(recorder.path))
+        recorder.close()
+        self.assertFalse(os.path.exists(recorder.path))
+        with flight_recorder.FlightRecorder(self.path, capacity=8, remove_on_close=True):
+            self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.path))
+
+    @unittest.skipUnless(os.name == 'posix', 'process liveness checks require POSIX')
+    def test_remove_stale_flight_logs(self) -> None:
+        directory = os.path.dirname(self.path)
+        dead_pid = int(subprocess.check_output([sys.executable, '-c', 'import os; print(os.getpid())']))
+        stale_path = os.path.join(directory, f'stackholm-{dead_pid}.flight')
+        live_path = os.path.join(directory, f'stackholm-{os.getpid()}.flight')
+        for path in (stale_path, live_path, self.path):
+            with open(path, 'wb'):
+                pass
+        self.assertEqual(flight_recorder.remove_stale_flight_logs(directory), [stale_path])
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertTrue(os.path.exists(live_path))
+        self.assertTrue(os.path.exists(self.path))
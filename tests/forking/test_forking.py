@@ -0,0 +1,98 @@
+import gc
+import json
+import os
+from typing import (
+    Any,
+    Callable,
+    Dict,
+)
+import unittest
+
+import stackholm
+from stackholm import forking
+
+
+def run_in_child(function: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    read_descriptor, write_descriptor = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_descriptor)
+        try:
+            result = function()
+        except BaseException as exception:
+            result = {'error': repr(exception)}
+        with os.fdopen(write_descriptor, 'w') as file:
+            json.dump(result, file)
+        os._exit(0)
+    os.close(write_descriptor)
+    with os.fdopen(read_descriptor) as file:
+        result = json.load(file)
+    os.waitpid(pid, 0)
+    return result
+
+
+class ForkingTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.storage = stackholm.ThreadLocalStorage()
+        self.context_class = self.storage.create_context_class()
+
+    def tearDown(self) -> None:
+        forking.unregister_fork_handlers(self.storage)
+
+    def test_reset_storage(self) -> None:
+        with self.context_class() as root:
+            self.context_class.set_checkpoint_value('config', 1)
+            with self.context_class() as request:
+                self.context_class.set_checkpoint_value('user', 2)
+                callbacks = []
+                request.add_deactivation_callback(lambda: callbacks.append(True))
+                kept_root = forking.reset_storage(self.storage, keep_root=True)
+                self.assertIs(kept_root, root)
+                self.assertFalse(request.is_active)
+                self.assertIs(self.context_class.get_current(), root)
+                self.assertEqual(self.context_class.get_checkpoint_value('config'), 1)
+                self.assertIsNone(self.context_class.get_checkpoint_value('user'))
+            self.assertEqual(callbacks, [])
+        self.assertIsNone(self.context_class.get_current())
+
+        with self.context_class() as context:
+            self.assertIsNone(forking.reset_storage(self.storage))
+            self.assertFalse(context.is_active)
+            self.assertIsNone(self.context_class.get_current())
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'os.fork is not available')
+    def test_child_gets_clean_state(self) -> None:
+        forking.register_fork_handlers(self.storage)
+        with self.context_class():
+            self.context_class.set_checkpoint_value('config', 1)
+
+            def child() -> Dict[str, Any]:
+                return {
+                    'current': self.context_class.get_current() is not None,
+                    'config': self.context_class.get_checkpoint_value('config'),
+                }
+
+            self.assertEqual(run_in_child(child), {'current': False, 'config': None})
+            self.assertEqual(self.context_class.get_checkpoint_value('config'), 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'os.fork is not available')
+    def test_child_keeps_frozen_root(self) -> None:
+        forking.register_fork_handlers(self.storage, keep_root=True, freeze_gc=True)
+        with self.context_class():
+            self.context_class.set_checkpoint_value('config', 1)
+            with self.context_class():
+                self.context_class.set_checkpoint_value('user', 2)
+
+                def child() -> Dict[str, Any]:
+                    return {
+                        'depth': len(self.storage.get_state().get_contexts()),
+                        'config': self.context_class.get_checkpoint_value('config'),
+                        'user': self.context_class.get_checkpoint_value('user'),
+                        'frozen': gc.get_freeze_count() > 0,
+                    }
+
+                result = run_in_child(child)
+                self.assertEqual(result, {'depth': 1, 'config': 1, 'user': None, 'frozen': True})
+                self.assertEqual(gc.get_freeze_count(), 0)
+                self.assertEqual(self.context_class.get_checkpoint_value('user'), 2)
@@ -0,0 +1,54 @@
+import unittest
+
+import stackholm
+from stackholm import fuzzing
+from stackholm.context import Context
+
+
+class SkippingRemovalState(stackholm.OptimizedListState):
+
+    def remove_checkpoint(
+        self,
+        key: str,
+        context_index: int,
+    ) -> None:
+        if context_index == 0:
+            return
+        super(SkippingRemovalState, self).remove_checkpoint(key, context_index)
+
+
+class DifferentialFuzzingTestCase(unittest.TestCase):
+
+    def test_default_engines(self) -> None:
+        report = fuzzing.run_differential_fuzz(runs=50, operations=200)
+        self.assertEqual([mismatch.format() for mismatch in report.mismatches], [])
+        self.assertEqual(report.operations, 50 * 200)
+
+    def test_detects_mismatches(self) -> None:
+        report = fuzzing.run_differential_fuzz({'SkippingRemovalState': SkippingRemovalState}, runs=20)
+        self.assertFalse(report.is_consistent)
+        mismatch = report.mismatches[0]
+        self.assertEqual(mismatch.engine, 'SkippingRemovalState')
+        self.assertEqual(len(mismatch.history), mismatch.operation)
+
+    def test_reference_state(self) -> None:
+        storage = stackholm.OptimizedListStorage(state_class=stackholm.ReferenceState)
+        context_class = storage.create_context_class()
+        with context_class():
+            context_class.set_checkpoint_value('a', 1)
+            with context_class():
+                context_class.set_checkpoint_value('a', 2)
+                context_class.set_checkpoint_value('b', 3)
+                self.assertEqual(context_class.get_checkpoint_value('a'), 2)
+            self.assertEqual(context_class.get_checkpoint_value('a'), 1)
+            self.assertIsNone(context_class.get_checkpoint_value('b'))
+
+    def test_optimized_list_state_removal_below_top(self) -> None:
+        state = stackholm.OptimizedListState()
+        contexts = [Context() for _ in range(3)]
+        for context in contexts:
+            state.push_context_with_checkpoints(context, ['a'])
+        state.remove_checkpoint('a', 1)
+        self.assertIs(state.get_nearest_checkpoint('a'), contexts[2])
+        state.pop_context_with_checkpoints(2, ['a'])
+        self.assertIs(state.get_nearest_checkpoint('a'), contexts[0])
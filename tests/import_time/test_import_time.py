@@ -0,0 +1,57 @@
+import subprocess
+import sys
+from typing import Dict
+import unittest
+
+import stackholm
+
+
+STACKHOLM_SELF_IMPORT_TIME_BUDGET_US = 100_000
+
+
+def measure_import_time(statement: str) -> Dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    timings: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, module_name = line[len('import time:'):].split('|')
+        timings[module_name.strip()] = int(self_time)
+    return timings
+
+
+class ImportTimeTestCase(unittest.TestCase):
+
+    def test_backends_are_not_imported_eagerly(self) -> None:
+        timings = measure_import_time('import stackholm')
+        self.assertIn('stackholm', timings)
+        for module_name in timings.keys():
+            self.assertFalse(module_name.startswith('asgiref'), module_name)
+            if module_name.startswith('stackholm.storages.'):
+                self.assertEqual(module_name, 'stackholm.storages._discovery')
+
+    def test_import_time_budget(self) -> None:
+        timings = measure_import_time('import stackholm')
+        self_time = sum(
+            timing
+            for module_name, timing in timings.items()
+            if module_name == 'stackholm' or module_name.startswith('stackholm.')
+        )
+        self.assertLess(self_time, STACKHOLM_SELF_IMPORT_TIME_BUDGET_US)
+
+    def test_backend_is_imported_on_access(self) -> None:
+        timings = measure_import_time('import stackholm; stackholm.ThreadLocalStorage')
+        self.assertIn('stackholm.storages.thread_local.thread_local_storage', timings)
+        self.assertNotIn('stackholm.storages.contextvar.contextvar_storage', timings)
+
+    def test_lazy_attributes(self) -> None:
+        for name in stackholm.__all__:
+            self.assertIsNotNone(getattr(stackholm, name))
+            self.assertIn(name, dir(stackholm))
+        with self.assertRaises(AttributeError):
+            getattr(stackholm, 'MissingStorage')
@@ -0,0 +1,127 @@
+import logging
+from typing import (
+    Any,
+    List,
+)
+import unittest
+from unittest import mock
+
+import stackholm
+from stackholm.logging import (
+    CheckpointLogFilter,
+    CheckpointValuesCache,
+    install_log_record_factory,
+)
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self) -> None:
+        super(ListHandler, self).__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(
+        self,
+        record: logging.LogRecord,
+    ) -> None:
+        self.records.append(record)
+
+
+class LoggingTestCase(unittest.TestCase):
+
+    def test_cache_rebuilt_only_on_change(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        cache = CheckpointValuesCache(context_class, ('a', 'b'))
+
+        with context_class():
+            context_class.set_checkpoint_value('a', 1)
+            with mock.patch.object(cache, '_extract', wraps=cache._extract) as extract:
+                values = cache.get()
+                self.assertEqual(dict(values), {'a': 1, 'b': None})
+                self.assertIs(cache.get(), values)
+                self.assertEqual(extract.call_count, 1)
+
+                context_class.set_checkpoint_value('b', 2)
+                self.assertEqual(dict(cache.get()), {'a': 1, 'b': 2})
+                self.assertEqual(extract.call_count, 2)
+
+                with context_class():
+                    self.assertEqual(dict(cache.get()), {'a': 1, 'b': 2})
+                    self.assertEqual(extract.call_count, 3)
+
+    def test_cache_expires_with_checkpoint_ttl(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        cache = CheckpointValuesCache(context_class, ('token', 'tenant'))
+
+        context_monotonic = mock.patch('stackholm.context.monotonic', return_value=100.0).start()
+        logging_monotonic = mock.patch('stackholm.logging.monotonic', return_value=100.0).start()
+        self.addCleanup(mock.patch.stopall)
+
+        with context_class():
+            context_class.set_checkpoint_value('tenant', 'acme')
+            context_class.set_checkpoint_value('token', 'secret', ttl=5)
+            values = cache.get()
+            self.assertEqual(dict(values), {'token': 'secret', 'tenant': 'acme'})
+            self.assertIs(cache.get(), values)
+
+            context_monotonic.return_value = logging_monotonic.return_value = 106.0
+            self.assertEqual(dict(cache.get()), {'token': None, 'tenant': 'acme'})
+            values = cache.get()
+            self.assertIs(cache.get(), values)
+
+    def test_filter(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        logger = logging.getLogger('stackholm.tests.filter')
+        logger.propagate = False
+        handler = ListHandler()
+        logger.addHandler(handler)
+        logger.addFilter(CheckpointLogFilter(context_class, ('tenant',), flatten=True))
+
+        with context_class():
+            context_class.set_checkpoint_value('tenant', 'acme')
+            logger.warning('first')
+            logger.warning('second')
+
+        record: Any = handler.records[0]
+        self.assertEqual(record.tenant, 'acme')
+        self.assertEqual(dict(record.checkpoint_values), {'tenant': 'acme'})
+        self.assertIs(handler.records[1].checkpoint_values, record.checkpoint_values)  # type: ignore[attr-defined]
+
+    def test_flatten_reserved_keys(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        logger = logging.getLogger('stackholm.tests.reserved')
+        logger.propagate = False
+        handler = ListHandler()
+        logger.addHandler(handler)
+        logger.addFilter(CheckpointLogFilter(context_class, ('msg', 'levelname', 'message', 'tenant'), flatten=True))
+
+        with context_class():
+            context_class.set_checkpoint_value('msg', 'injected')
+            context_class.set_checkpoint_value('levelname', 'NONE')
+            context_class.set_checkpoint_value('tenant', 'acme')
+            logger.warning('hello %s', 'world')
+
+        record: Any = handler.records[0]
+        self.assertEqual(record.getMessage(), 'hello world')
+        self.assertEqual(record.levelname, 'WARNING')
+        self.assertEqual(record.checkpoint_msg, 'injected')
+        self.assertEqual(record.checkpoint_levelname, 'NONE')
+        self.assertIsNone(record.checkpoint_message)
+        self.assertEqual(record.tenant, 'acme')
+
+    def test_record_factory(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        previous_factory = logging.getLogRecordFactory()
+        factory = install_log_record_factory(context_class, ('request_id',), attribute_name='context')
+        self.addCleanup(logging.setLogRecordFactory, previous_factory)
+        self.assertIs(factory.previous_factory, previous_factory)
+
+        with context_class():
+            context_class.set_checkpoint_value('request_id', 7)
+            record: Any = logging.getLogRecordFactory()('name', logging.INFO, __file__, 1, 'message', (), None)
+            self.assertEqual(dict(record.context), {'request_id': 7})
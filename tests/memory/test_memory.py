@@ -0,0 +1,165 @@
+import asyncio
+from contextvars import ContextVar
+import threading
+from typing import (
+    List,
+    Optional,
+)
+import unittest
+
+import stackholm
+from stackholm import asyncio as stackholm_asyncio
+from stackholm.memory import create_process_memory_report
+from stackholm.state import State
+from stackholm.storage import get_storages
+
+
+class MemoryTestCase(unittest.TestCase):
+
+    def test_memory_report(self) -> None:
+        storage = stackholm.ThreadLocalStorage()
+        context_class = storage.create_context_class()
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold_state() -> None:
+            with context_class():
+                context_class.set_checkpoint_value('payload', 'x' * 100000)
+                entered.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold_state, name='pool-worker')
+        thread.start()
+        entered.wait()
+        try:
+            with context_class() as context:
+                context_class.set_checkpoint_value('tenant', 'acme')
+                context.set_block_value('rows', [1, 2, 3])
+                with context_class():
+                    context_class.set_checkpoint_value('tenant', 'other')
+                    report = storage.memory_report()
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(report.storages, 1)
+        self.assertEqual(report.live_states, 2)
+        self.assertEqual(report.frames, 3)
+        self.assertEqual(report.sampled_frames, 3)
+        self.assertFalse(report.is_sampled)
+        self.assertEqual(report.checkpoint_keys, 2)
+        self.assertEqual(report.checkpoint_entries, 3)
+        self.assertEqual(report.block_entries, 1)
+        self.assertEqual(set(report.checkpoint_bytes), {'payload', 'tenant'})
+        self.assertEqual(set(report.block_bytes), {'rows'})
+        self.assertEqual(report.get_top_keys(1)[0][0], 'payload')
+        self.assertGreater(report.states[0].retained_bytes, 100000)
+        self.assertEqual(report.states[0].frames, 1)
+        self.assertEqual(report.states[0].owner, 'pool-worker')
+        self.assertEqual(report.states[1].owner, threading.current_thread().name)
+        self.assertEqual(report.index_entries, {'payload': 1, 'tenant': 2})
+        self.assertEqual(report.max_index_lengths, {'payload': 1, 'tenant': 2})
+        self.assertEqual(report.states[1].index_entries, 2)
+        self.assertEqual(report.to_dict()['retained_bytes'], report.retained_bytes)
+
+    def test_sampled_memory_report(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        contexts = []
+        for index in range(10):
+            context = context_class().activate()
+            context_class.set_checkpoint_value('value', index)
+            contexts.append(context)
+        try:
+            report = storage.memory_report(sample_size=2)
+        finally:
+            for context in reversed(contexts):
+                context.deactivate()
+        self.assertEqual(report.frames, 10)
+        self.assertEqual(report.sampled_frames, 2)
+        self.assertTrue(report.is_sampled)
+        self.assertEqual(report.checkpoint_entries, 10)
+        self.assertGreater(report.checkpoint_bytes['value'], 0)
+
+    def test_forked_states_share_frames(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        with context_class():
+            context_class.set_checkpoint_value('payload', 'x' * 100000)
+            parent_state = storage.get_state()
+            forked_states = [storage.fork_state() for _ in range(3)]
+            for state in forked_states:
+                storage.set_state(state)
+            storage.set_state(parent_state)
+            report = storage.memory_report()
+        self.assertEqual(report.live_states, 4)
+        self.assertEqual(report.frames, 4)
+        self.assertEqual(report.checkpoint_entries, 1)
+        self.assertLess(report.checkpoint_bytes['payload'], 200000)
+        self.assertEqual(sorted(usage.frames for usage in report.states), [1, 2, 2, 2])
+
+    def test_sampled_memory_report_skips_states(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        with context_class():
+            context_class.set_checkpoint_value('value', 1)
+            parent_state = storage.get_state()
+            forked_states = [storage.fork_state() for _ in range(20)]
+            for state in forked_states:
+                storage.set_state(state)
+            storage.set_state(parent_state)
+            report = storage.memory_report(sample_size=3)
+        self.assertEqual(report.live_states, 21)
+        self.assertLessEqual(report.sampled_frames, 3)
+        self.assertLess(len(report.states), 21)
+        self.assertTrue(report.is_sampled)
+        self.assertGreater(report.frames, report.sampled_frames)
+
+    def test_process_memory_report(self) -> None:
+        first_storage = stackholm.OptimizedListStorage()
+        second_storage = stackholm.ThreadLocalStorage()
+        self.assertIn(first_storage, get_storages())
+        self.assertIn(second_storage, get_storages())
+        with first_storage.create_context_class()() as context:
+            context.set_block_value('a', 1)
+            with second_storage.create_context_class()() as other_context:
+                other_context.set_block_value('b', 2)
+                report = create_process_memory_report([first_storage, second_storage])
+                process_report = create_process_memory_report()
+        self.assertEqual(report.storages, 2)
+        self.assertEqual(report.frames, 2)
+        self.assertEqual(set(report.block_bytes), {'a', 'b'})
+        self.assertGreaterEqual(process_report.storages, 2)
+        self.assertGreaterEqual(process_report.frames, 2)
+
+    def test_index_and_elided_frames(self) -> None:
+        for state_class in (stackholm.OptimizedListState, stackholm.CompactArrayState, stackholm.ReferenceState):
+            storage = stackholm.OptimizedListStorage(state_class=state_class)
+            context_class = storage.create_context_class()
+            with context_class():
+                context_class.set_checkpoint_value('a', 1)
+                with context_class():
+                    context_class.set_checkpoint_value('a', 2)
+                    with context_class.elided(), context_class.elided():
+                        report = storage.memory_report()
+            self.assertEqual(report.index_entries, {'a': 2})
+            self.assertEqual(report.max_index_lengths, {'a': 2})
+            self.assertEqual(report.elided_frames, 2)
+            self.assertEqual(report.states[0].elided_frames, 2)
+            self.assertEqual(report.to_dict()['states'][0]['index_entries'], 2)
+
+    def test_task_state_owners(self) -> None:
+        storage = stackholm.ContextVarStorage(ContextVar[State]('stackholm.tests.memory'))
+        context_class = storage.create_context_class()
+        owners: List[Optional[str]] = []
+
+        async def child() -> None:
+            with context_class():
+                owners.append(storage.get_state_owner(storage.get_state()))
+
+        async def main() -> None:
+            stackholm_asyncio.install_task_factory([storage])
+            with context_class():
+                await asyncio.create_task(child(), name='request-1')
+
+        asyncio.run(main())
+        self.assertEqual(owners, [f'request-1 ({threading.current_thread().name})'])
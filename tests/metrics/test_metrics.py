@@ -0,0 +1,88 @@
+import gc
+import threading
+import unittest
+from urllib.request import urlopen
+
+import stackholm
+from stackholm.metrics import (
+    InstrumentedOptimizedListState,
+    StorageMetricsCollector,
+)
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def test_collect(self) -> None:
+        storage = stackholm.ThreadLocalStorage(state_class=InstrumentedOptimizedListState)
+        context_class = storage.create_context_class()
+        collector = StorageMetricsCollector({'default': storage})
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold_state() -> None:
+            with context_class():
+                context_class.set_checkpoint_value('b', 1)
+                entered.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold_state)
+        thread.start()
+        entered.wait()
+        try:
+            with context_class():
+                with context_class():
+                    context_class.set_checkpoint_value('a', 1)
+                    context_class.get_checkpoint_value('a')
+                    context_class.get_checkpoint_value('missing')
+                    sample = collector.collect()['default']
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(sample.live_states, 2)
+        self.assertEqual(sorted(sample.depths), [1, 2])
+        self.assertEqual(sample.peak_depth, 2)
+        self.assertEqual(sample.checkpoint_keys, 2)
+        self.assertEqual(sample.lookups, 2)
+        self.assertEqual(sample.misses, 1)
+
+    def test_counters_survive_dead_states(self) -> None:
+        storage = stackholm.ThreadLocalStorage(state_class=InstrumentedOptimizedListState)
+        context_class = storage.create_context_class()
+        collector = StorageMetricsCollector({'default': storage})
+
+        def lookup() -> None:
+            with context_class():
+                context_class.get_checkpoint_value('a')
+                collector.collect()
+
+        for _ in range(3):
+            thread = threading.Thread(target=lookup)
+            thread.start()
+            thread.join()
+            del thread
+            gc.collect()
+
+        sample = collector.collect()['default']
+        self.assertEqual(sample.lookups, 3)
+        self.assertEqual(sample.misses, 3)
+
+    def test_scrape(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        collector = StorageMetricsCollector({'main "storage"': storage})
+        server = collector.serve()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with context_class():
+            context_class.set_checkpoint_value('a', 1)
+            with urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+                body = response.read().decode('utf-8')
+
+        self.assertIn('# TYPE stackholm_live_states gauge', body)
+        self.assertIn('stackholm_live_states{storage="main \\"storage\\""} 1', body)
+        self.assertIn('stackholm_stack_depth_current{storage="main \\"storage\\""} 1', body)
+        self.assertIn('stackholm_checkpoint_keys{storage="main \\"storage\\""} 1', body)
+        self.assertIn('stackholm_stack_depth_bucket{storage="main \\"storage\\"",le="1"} 1', body)
+        self.assertIn('stackholm_stack_depth_count{storage="main \\"storage\\""} 1', body)
@@ -0,0 +1,116 @@
+import contextlib
+import io
+import os
+import tempfile
+import threading
+from typing import (
+    Any,
+    Callable,
+    Optional,
+)
+import unittest
+
+import stackholm
+from stackholm import recording
+from stackholm.metrics import InstrumentedOptimizedListState
+
+
+class InterleavingFile(io.BytesIO):
+
+    on_write: Optional[Callable[[], Any]] = None
+
+    def write(
+        self,
+        data: Any,
+    ) -> int:
+        on_write, self.on_write = self.on_write, None
+        if on_write is not None:
+            on_write()
+        return super(InterleavingFile, self).write(data)
+
+
+class RecordingTestCase(unittest.TestCase):
+
+    def record(
+        self,
+        file: io.BytesIO,
+    ) -> None:
+        with recording.TraceRecorder(file, buffer_size=64) as recorder:
+            storage = stackholm.OptimizedListStorage(state_class=recorder.create_state)
+            context_class = storage.create_context_class()
+            with context_class():
+                context_class.set_checkpoint_value('a', 1)
+                with context_class():
+                    context_class.set_checkpoint_value('b', 2)
+                    self.assertEqual(context_class.get_checkpoint_value('a'), 1)
+                    context_class.pop_checkpoint_value('b')
+                with context_class.elided():
+                    self.assertEqual(context_class.get_checkpoint_value('a'), 1)
+            self.assertIsNone(context_class.get_current())
+
+    def test_records_operations(self) -> None:
+        file = io.BytesIO()
+        self.record(file)
+        records = list(recording.read_trace(file.getvalue()))
+        opcodes = [opcode for _, opcode, _, _ in records]
+        self.assertEqual(opcodes[0], recording.Opcode.PUSH_CONTEXT_WITH_CHECKPOINTS)
+        self.assertIn(recording.Opcode.ADD_CHECKPOINT, opcodes)
+        self.assertIn(recording.Opcode.REMOVE_CHECKPOINT, opcodes)
+        self.assertIn(recording.Opcode.PUSH_ELIDED_FRAME, opcodes)
+        self.assertIn((0, recording.Opcode.ADD_CHECKPOINT, 0, ('a',)), records)
+        self.assertIn((0, recording.Opcode.GET_NEAREST_CHECKPOINT, 0, ('a',)), records)
+        self.assertEqual(records[-2][1], recording.Opcode.POP_CONTEXT_WITH_CHECKPOINTS)
+        self.assertEqual(records[-1][1], recording.Opcode.GET_LAST_CONTEXT)
+
+    def test_replay(self) -> None:
+        file = io.BytesIO()
+        self.record(file)
+        replayer = recording.TraceReplayer(file.getvalue())
+        report = replayer.replay()
+        self.assertEqual(report.states, 1)
+        self.assertEqual(report.operations, len(replayer.records))
+        self.assertIn('OptimizedListState', report.format())
+        report = replayer.replay(InstrumentedOptimizedListState)
+        self.assertEqual(report.state_class, 'InstrumentedOptimizedListState')
+
+    def test_threads(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.bin')
+            with recording.TraceRecorder(path, buffer_size=256) as recorder:
+                storage = stackholm.ThreadLocalStorage(state_class=recorder.create_state)
+                context_class = storage.create_context_class()
+
+                def run() -> None:
+                    for index in range(100):
+                        with context_class():
+                            context_class.set_checkpoint_value('key', index)
+                            context_class.get_checkpoint_value('key')
+
+                threads = [threading.Thread(target=run) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(recording.main([path]), 0)
+            self.assertIn('OptimizedListState: ', output.getvalue())
+            report = recording.TraceReplayer(path).replay()
+            self.assertGreaterEqual(report.states, 4)
+            self.assertGreaterEqual(report.operations, 4 * 100 * 3)
+
+    def test_records_appended_during_flush(self) -> None:
+        file = InterleavingFile()
+        with recording.TraceRecorder(file, buffer_size=1 << 20) as recorder:
+            storage = stackholm.OptimizedListStorage(state_class=recorder.create_state)
+            context_class = storage.create_context_class()
+            with context_class():
+                file.on_write = lambda: context_class.set_checkpoint_value('late', 1)
+                recorder.flush()
+                file.on_write = None
+        records = list(recording.read_trace(file.getvalue()))
+        self.assertIn((0, recording.Opcode.ADD_CHECKPOINT, 0, ('late',)), records)
+
+    def test_rejects_unknown_files(self) -> None:
+        with self.assertRaises(ValueError):
+            list(recording.read_trace(b'XXXX\x01'))
@@ -0,0 +1,100 @@
+import gc
+import os
+import subprocess
+import sys
+from typing import cast
+import unittest
+
+import stackholm
+from stackholm.shared import (
+    SharedCheckpointData,
+    SharedCheckpointLayer,
+)
+
+
+class SharedCheckpointLayerTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.storage = stackholm.OptimizedListStorage()
+        self.context_class = self.storage.create_context_class()
+
+    def test_lazy_reads(self) -> None:
+        values = {
+            'routes': {'/': 'index', '/users': 'users'},
+            'flags': ['a', 'b'],
+            'name': 'service',
+        }
+        with SharedCheckpointLayer.create(values) as layer:
+            root = layer.activate(self.context_class)
+            checkpoint_data = cast(SharedCheckpointData, root._checkpoint_data)
+            self.assertFalse(checkpoint_data.is_decoded('routes'))
+            self.assertFalse(layer.data.is_decoded('routes'))
+            routes = self.context_class.get_checkpoint_value('routes')
+            self.assertEqual(routes, values['routes'])
+            self.assertTrue(checkpoint_data.is_decoded('routes'))
+            self.assertIs(self.context_class.get_checkpoint_value('routes'), routes)
+            self.assertTrue(layer.data.is_decoded('routes'))
+            self.assertIs(layer.create_context(self.context_class)._checkpoint_data['routes'], routes)
+            self.assertFalse(checkpoint_data.is_decoded('flags'))
+            with self.context_class():
+                self.context_class.set_checkpoint_value('name', 'override')
+                self.assertEqual(self.context_class.get_checkpoint_value('name'), 'override')
+            self.assertEqual(self.context_class.get_checkpoint_value('name'), 'service')
+            root.deactivate()
+            del root
+            gc.collect()
+            path = layer.path
+        self.assertTrue(layer.is_closed)
+        self.assertFalse(os.path.exists(path))
+
+    def test_create_from_context(self) -> None:
+        with self.context_class():
+            self.context_class.set_checkpoint_value('config', {'workers': 32})
+            self.context_class.set_checkpoint_value('ignored', 1)
+            layer = SharedCheckpointLayer.create_from_context(self.context_class, ['config', 'missing'])
+        with layer:
+            self.assertEqual(list(layer.data.keys()), ['config'])
+            attached = SharedCheckpointLayer.attach(layer.path)
+            self.assertFalse(attached.is_owner)
+            with attached:
+                self.assertEqual(attached.data['config'], {'workers': 32})
+            self.assertTrue(os.path.exists(layer.path))
+
+    def test_attach_from_another_process(self) -> None:
+        with SharedCheckpointLayer.create({'config': {'size': 50}}) as layer:
+            code = (
+                'import stackholm\n'
+                'from stackholm.shared import SharedCheckpointLayer\n'
+                'context_class = stackholm.OptimizedListStorage().create_context_class()\n'
+                f'layer = SharedCheckpointLayer.attach({layer.path!r})\n'
+                'layer.activate(context_class)\n'
+                "print(context_class.get_checkpoint_value('config')['size'])\n"
+            )
+            result = subprocess.run(
+                [sys.executable, '-c', code],
+                capture_output=True,
+                check=True,
+                text=True,
+            )
+            self.assertEqual(result.stdout.strip(), '50')
+
+    def test_close_with_live_contexts(self) -> None:
+        layer = SharedCheckpointLayer.create({'a': 'value'})
+        context = layer.create_context(self.context_class)
+        layer.close()
+        layer.unlink()
+        self.assertEqual(context._checkpoint_data['a'], 'value')
+
+    def test_owner_cleanup(self) -> None:
+        layer = SharedCheckpointLayer.create({'a': 1})
+        path = layer.path
+        self.assertTrue(os.path.exists(path))
+        del layer
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
+
+    def test_unlink_after_map(self) -> None:
+        with SharedCheckpointLayer.create({'a': [1, 2]}, unlink_after_map=True) as layer:
+            self.assertFalse(os.path.exists(layer.path))
+            context = layer.create_context(self.context_class)
+            self.assertEqual(context._checkpoint_data['a'], [1, 2])
@@ -0,0 +1,99 @@
+import sys
+import traceback
+import unittest
+
+import stackholm
+from stackholm.snapshot import (
+    EXCEPTION_CONTEXT_ATTRIBUTE,
+    CheckpointSnapshot,
+    add_exception_context_note,
+)
+
+
+class SnapshotTestCase(unittest.TestCase):
+
+    def test_capture_exception_context(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class(namespace={'capture_exception_context': True})
+        captured = None
+        try:
+            with context_class():
+                context_class.set_checkpoint_value('tenant', 'acme')
+                context_class.set_checkpoint_value('stackholm.resource:db', object())
+                with context_class():
+                    context_class.set_checkpoint_value('request_id', 1)
+                    with context_class():
+                        raise ValueError('boom')
+        except ValueError as exception:
+            captured = exception
+        self.assertIsNotNone(captured)
+        snapshot = captured.__dict__[EXCEPTION_CONTEXT_ATTRIBUTE]
+        self.assertIsInstance(snapshot, CheckpointSnapshot)
+        self.assertFalse(snapshot.is_materialized)
+        values = stackholm.get_exception_context(captured)
+        self.assertIsNotNone(values)
+        self.assertEqual(dict(values or {}), {'tenant': 'acme', 'request_id': 1})
+        self.assertTrue(snapshot.is_materialized)
+        self.assertFalse(hasattr(captured, '__notes__'))
+        if sys.version_info >= (3, 11):
+            self.assertTrue(add_exception_context_note(captured))
+            self.assertFalse(add_exception_context_note(captured))
+            self.assertEqual(captured.__notes__, ["stackholm context: tenant='acme', request_id=1"])
+            self.assertIn("stackholm context: tenant='acme', request_id=1", '\n'.join(captured.__notes__))
+            rendered = ''.join(traceback.format_exception(captured))
+            self.assertIn("stackholm context: tenant='acme', request_id=1", rendered)
+
+    def test_capture_does_not_copy_frames(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class(namespace={'capture_exception_context': True})
+        try:
+            with context_class() as outer:
+                context_class.set_checkpoint_value('tenant', 'acme')
+                context_class.set_checkpoint_value('region', 'eu')
+                with context_class() as inner:
+                    context_class.set_checkpoint_value('tenant', 'other')
+                    for index in range(100):
+                        context_class.set_checkpoint_value(f'stackholm.internal:{index}', index)
+                    raise ValueError('boom')
+        except ValueError as exception:
+            captured = exception
+        snapshot = captured.__dict__[EXCEPTION_CONTEXT_ATTRIBUTE]
+        self.assertEqual(len(snapshot._frames), 2)
+        self.assertIs(snapshot._frames[0], outer._checkpoint_data)
+        self.assertIs(snapshot._frames[1], inner._checkpoint_data)
+        values = stackholm.get_exception_context(captured)
+        self.assertIsNotNone(values)
+        self.assertEqual(dict(values or {}), {'tenant': 'other', 'region': 'eu'})
+
+    def test_capture_exception_context_keys(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class(
+            base=stackholm.TransactionalContext,
+            namespace={
+                'capture_exception_context': True,
+                'exception_context_keys': ('request_id', 'missing'),
+            },
+        )
+        captured = None
+        with context_class():
+            context_class.set_checkpoint_value('tenant', 'acme')
+            try:
+                with context_class():
+                    context_class.set_checkpoint_value('request_id', 1)
+                    raise KeyError('boom')
+            except KeyError as exception:
+                captured = exception
+            context_class.set_checkpoint_value('request_id', 2)
+        values = stackholm.get_exception_context(captured)
+        self.assertIsNotNone(values)
+        self.assertEqual(dict(values or {}), {'request_id': 1})
+
+    def test_capture_is_disabled_by_default(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        with self.assertRaises(RuntimeError) as assertion:
+            with context_class():
+                context_class.set_checkpoint_value('tenant', 'acme')
+                raise RuntimeError('boom')
+        self.assertIsNone(stackholm.get_exception_context(assertion.exception))
+        self.assertFalse(hasattr(assertion.exception, '__notes__'))
@@ -0,0 +1,69 @@
+import threading
+from typing import (
+    List,
+    cast,
+)
+import unittest
+
+import stackholm
+from stackholm import stress
+
+
+class CompactArrayStateTestCase(unittest.TestCase):
+
+    def test_checkpoints(self) -> None:
+        storage = stackholm.OptimizedListStorage(state_class=stackholm.CompactArrayState)
+        context_class = storage.create_context_class()
+        state = cast(stackholm.CompactArrayState, storage.get_state())
+        self.assertIsInstance(state, stackholm.CompactArrayState)
+
+        with context_class() as root:
+            context_class.set_checkpoint_value('a', 1)
+            context_class.set_checkpoint_value('a', 2)
+            with context_class():
+                self.assertEqual(context_class.get_checkpoint_value('a'), 2)
+                context_class.set_checkpoint_value('a', 3)
+                self.assertEqual(list(state.checkpoint_indexes['a']), [0, 1])
+                self.assertEqual(context_class.get_checkpoint_value('a'), 3)
+            self.assertEqual(list(state.checkpoint_indexes['a']), [0])
+            self.assertIs(state.get_nearest_checkpoint('a'), root)
+            context_class.pop_checkpoint_value('a')
+            self.assertNotIn('a', state.checkpoint_indexes)
+            self.assertIsNone(context_class.get_checkpoint_value('a'))
+        self.assertEqual(state.get_contexts(), [])
+
+    def test_transaction_merge(self) -> None:
+        storage = stackholm.OptimizedListStorage(state_class=stackholm.CompactArrayState)
+        context_class = storage.create_context_class()
+        transaction_class = storage.create_context_class(base=stackholm.TransactionalContext)
+        state = cast(stackholm.CompactArrayState, storage.get_state())
+
+        with context_class() as root:
+            context_class.set_checkpoint_value('a', 1)
+            with transaction_class():
+                context_class.set_checkpoint_value('a', 2)
+                context_class.set_checkpoint_value('b', 3)
+            self.assertEqual(context_class.get_checkpoint_value('a'), 2)
+            self.assertIs(state.get_nearest_checkpoint('b'), root)
+            self.assertEqual(list(state.checkpoint_indexes['a']), [0])
+
+    def test_stress_workload(self) -> None:
+        storage = stackholm.ThreadLocalStorage(state_class=stackholm.CompactArrayState)
+        context_class = storage.create_context_class()
+        workloads = [stress.Workload(context_class, worker_id, worker_id) for worker_id in range(4)]
+
+        def run(workload: stress.Workload) -> None:
+            for _ in range(1000):
+                workload.step()
+            workload.close()
+
+        threads: List[threading.Thread] = [
+            threading.Thread(target=run, args=(workload,))
+            for workload in workloads
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for workload in workloads:
+            self.assertEqual(workload.violations, [])
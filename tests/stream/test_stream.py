@@ -0,0 +1,106 @@
+import operator
+from typing import (
+    Any,
+    Dict,
+    List,
+    cast,
+)
+import unittest
+
+import stackholm
+from stackholm.aggregate import AggregateKey
+from stackholm.logging import CheckpointValuesCache
+from stackholm.stream import scoped
+
+
+class StreamTestCase(unittest.TestCase):
+
+    def test_scoped(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        state = cast(stackholm.OptimizedListState, storage.state)
+        context_class = storage.create_context_class()
+        cache = CheckpointValuesCache(context_class, ['row', 'kind', 'tenant'])
+        rows: List[Dict[str, Any]] = [
+            {'id': 1, 'kind': 'a'},
+            {'id': 2, 'kind': 'a'},
+            {'id': 3},
+        ]
+        seen = []
+
+        def per_item(row: Dict[str, Any]) -> Dict[str, Any]:
+            values = {'row': row['id']}
+            if 'kind' in row:
+                values['kind'] = row['kind']
+            return values
+
+        with context_class() as root:
+            context_class.set_checkpoint_value('tenant', 'acme')
+            stream_contexts = set()
+            for row in scoped(rows, context_class, per_item):
+                current = context_class.get_current()
+                stream_contexts.add(current)
+                self.assertIsNot(current, root)
+                self.assertEqual(len(state.contexts), 2)
+                seen.append(dict(cache.get()))
+            self.assertEqual(len(stream_contexts), 1)
+            self.assertIs(context_class.get_current(), root)
+            self.assertEqual(state.checkpoint_indexes, {'tenant': [0]})
+
+        self.assertEqual(
+            seen,
+            [
+                {'row': 1, 'kind': 'a', 'tenant': 'acme'},
+                {'row': 2, 'kind': 'a', 'tenant': 'acme'},
+                {'row': 3, 'kind': None, 'tenant': 'acme'},
+            ],
+        )
+
+    def test_scoped_closes_on_break(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        iterator = scoped(range(10), context_class, lambda item: {'item': item})
+        for item in iterator:
+            self.assertEqual(context_class.get_checkpoint_value('item'), item)
+            if item == 3:
+                break
+        iterator.close()
+        self.assertIsNone(context_class.get_current())
+        self.assertIsNone(context_class.get_checkpoint_value('item'))
+
+    def test_scoped_below_consumer_frame(self) -> None:
+        for state_class in (stackholm.OptimizedListState, stackholm.CompactArrayState, stackholm.ReferenceState):
+            storage = stackholm.OptimizedListStorage(state_class=state_class)
+            context_class = storage.create_context_class()
+            with context_class():
+                iterator = scoped(['a', 'b', 'c'], context_class, lambda item: {'k': item, item: True})
+                self.assertEqual(next(iterator), 'a')
+                with context_class():
+                    context_class.set_checkpoint_value('k', 'inner')
+                    self.assertEqual(next(iterator), 'b')
+                    self.assertEqual(context_class.get_checkpoint_value('k'), 'inner')
+                    self.assertTrue(context_class.get_checkpoint_value('b'))
+                    self.assertIsNone(context_class.get_checkpoint_value('a'))
+                self.assertEqual(context_class.get_checkpoint_value('k'), 'b')
+                self.assertEqual(next(iterator), 'c')
+                self.assertEqual(context_class.get_checkpoint_value('k'), 'c')
+                iterator.close()
+                self.assertIsNone(context_class.get_checkpoint_value('k'))
+
+    def test_scoped_removes_stale_expirations_and_aggregates(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        total = AggregateKey('cost', operator.add)
+        with context_class():
+            total.set(context_class, 10)
+            iterator = scoped(['a', 'b'], context_class, lambda item: {'item': item})
+            next(iterator)
+            stream_context = cast(stackholm.Context, context_class.get_current())
+            total.set(context_class, 5)
+            context_class.set_checkpoint_value('temporary', 1, ttl=60)
+            self.assertEqual(total.get(context_class), 15)
+            next(iterator)
+            self.assertEqual(total.get(context_class), 10)
+            self.assertEqual(context_class.get_checkpoint_value('cost'), 10)
+            self.assertIsNone(context_class.get_checkpoint_value('temporary'))
+            self.assertIsNone(stream_context._checkpoint_expirations)
+            iterator.close()
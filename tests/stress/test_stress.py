@@ -0,0 +1,37 @@
+import unittest
+
+import stackholm
+from stackholm import stress
+from stackholm.storages._discovery import IS_ASGIREF_INSTALLED
+
+
+class StressTestCase(unittest.TestCase):
+
+    def test_thread_local_stress(self) -> None:
+        report = stress.run_thread_local_stress(workers=8, operations=500)
+        self.assertEqual(report.violations, [])
+        self.assertEqual(report.operations, 8 * 500)
+        self.assertGreater(report.operations_per_second, 0)
+
+    def test_contextvar_stress(self) -> None:
+        report = stress.run_contextvar_stress(workers=16, operations=500)
+        self.assertEqual(report.violations, [])
+        self.assertEqual(report.operations, 16 * 500)
+
+    @unittest.skipUnless(IS_ASGIREF_INSTALLED, 'asgiref is not installed')
+    def test_asgiref_local_stress(self) -> None:
+        report = stress.run_asgiref_local_stress(workers=8, operations=500)
+        self.assertEqual(report.violations, [])
+        self.assertEqual(report.operations, 8 * 500)
+
+    def test_detects_violations(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        workload = stress.Workload(context_class, 0, 0)
+        workload.step()
+        self.assertFalse(workload.is_failed)
+
+        context_class.set_checkpoint_value('a', 'foreign')
+        workload.verify()
+        self.assertTrue(workload.is_failed)
+        workload.close()
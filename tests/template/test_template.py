@@ -0,0 +1,94 @@
+from typing import cast
+import unittest
+
+import stackholm
+
+
+class ContextTemplateTestCase(unittest.TestCase):
+
+    def test_create_context_template(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        template_class = storage.create_context_template(('a', 'b'), name='Row')
+        self.assertTrue(issubclass(template_class, stackholm.ContextTemplate))
+        self.assertIs(template_class._storage, storage)
+        self.assertEqual(template_class.__name__, 'Row')
+        self.assertEqual(template_class.get_template_keys(), ('a', 'b'))
+
+    def test_init(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        template_class = storage.create_context_template(('a', 'b'))
+
+        self.assertEqual(template_class(1, 2).checkpoint_data, {'a': 1, 'b': 2})
+        self.assertEqual(template_class(1, b=2).checkpoint_data, {'a': 1, 'b': 2})
+        with self.assertRaises(TypeError):
+            template_class(1)
+        with self.assertRaises(TypeError):
+            template_class(1, 2, 3)
+        with self.assertRaises(TypeError):
+            template_class(1, a=2)
+        with self.assertRaises(TypeError):
+            template_class(1, c=2)
+
+    def test_activate_deactivate(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        state = cast(stackholm.OptimizedListState, storage.state)
+        context_class = storage.create_context_class()
+        template_class = storage.create_context_template(('a', 'b'))
+
+        with context_class():
+            context_class.set_checkpoint_value('a', 0)
+
+            for row in range(3):
+                with template_class(row, -row) as context:
+                    self.assertIs(context_class.get_nearest_checkpoint('a'), context)
+                    self.assertEqual(context_class.get_checkpoint_value('a'), row)
+                    self.assertEqual(template_class.get_checkpoint_value('b'), -row)
+                    self.assertEqual(state.checkpoint_indexes, {'a': [0, 1], 'b': [1]})
+
+            self.assertEqual(context_class.get_checkpoint_value('a'), 0)
+            self.assertIsNone(context_class.get_checkpoint_value('b'))
+            self.assertEqual(state.checkpoint_indexes, {'a': [0]})
+
+        self.assertEqual(state.checkpoint_indexes, {})
+        self.assertEqual(state.checkpoint_sequences, {})
+        self.assertEqual(state.checkpoint_optimization_mapping, {})
+
+    def test_activation_plan(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        state = cast(stackholm.OptimizedListState, storage.state)
+        reference_storage = stackholm.OptimizedListStorage()
+        reference_state = cast(stackholm.OptimizedListState, reference_storage.state)
+        template_class = storage.create_context_template(('a', 'b', 'c'))
+        context_class = storage.create_context_class()
+        reference_context_class = reference_storage.create_context_class()
+        plan = template_class.get_activation_plan()
+        self.assertEqual(plan.keys, ('a', 'b', 'c'))
+        self.assertEqual(list(template_class(c=3, a=1, b=2).checkpoint_data), ['a', 'b', 'c'])
+
+        def get_indexes(state: stackholm.OptimizedListState) -> tuple:
+            return (
+                state.checkpoint_indexes,
+                state.checkpoint_sequences,
+                state.checkpoint_optimization_mapping,
+            )
+
+        with context_class(), reference_context_class():
+            context_class.set_checkpoint_value('a', 0)
+            reference_context_class.set_checkpoint_value('a', 0)
+            with template_class(1, 2, 3), reference_context_class():
+                for key, value in (('a', 1), ('b', 2), ('c', 3)):
+                    reference_context_class.set_checkpoint_value(key, value)
+                self.assertEqual(get_indexes(state), get_indexes(reference_state))
+                with template_class(4, 5, 6) as context, reference_context_class():
+                    for key, value in (('a', 4), ('b', 5), ('c', 6)):
+                        reference_context_class.set_checkpoint_value(key, value)
+                    context_class.pop_checkpoint_value('b')
+                    context_class.set_checkpoint_value('d', 7)
+                    reference_context_class.pop_checkpoint_value('b')
+                    reference_context_class.set_checkpoint_value('d', 7)
+                    self.assertEqual(set(context.checkpoint_data), {'a', 'c', 'd'})
+                    self.assertEqual(get_indexes(state), get_indexes(reference_state))
+                self.assertEqual(get_indexes(state), get_indexes(reference_state))
+                self.assertEqual(context_class.get_checkpoint_value('b'), 2)
+            self.assertEqual(get_indexes(state), get_indexes(reference_state))
+        self.assertEqual(get_indexes(state), ({}, {}, {}))
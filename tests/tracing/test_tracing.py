@@ -0,0 +1,107 @@
+import asyncio
+from contextvars import ContextVar
+import io
+import json
+import threading
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+import unittest
+
+import stackholm
+from stackholm.state import State
+from stackholm.tracing import (
+    ContextTracer,
+    TracedContext,
+)
+
+
+class TracingTestCase(unittest.TestCase):
+
+    def test_nested_scopes(self) -> None:
+        tracer = ContextTracer(keys=['tenant'])
+        storage = stackholm.ThreadLocalStorage()
+        context_class = storage.create_context_class(
+            name='RequestContext',
+            base=TracedContext,
+            namespace={'tracer': tracer},
+        )
+
+        def handle() -> None:
+            with context_class('request'):
+                context_class.set_checkpoint_value('tenant', 'acme')
+                with context_class('query'):
+                    pass
+                with context_class.elided():
+                    context_class.set_checkpoint_value('tenant', 'other')
+
+        handle()
+        thread = threading.Thread(target=handle, name='worker')
+        thread.start()
+        thread.join()
+
+        trace = tracer.export()
+        events = [event for event in trace['traceEvents'] if event['ph'] != 'M']
+        self.assertEqual(len(events), 8)
+        self.assertEqual(
+            [(event['ph'], event['name']) for event in events[:4]],
+            [('B', 'request'), ('B', 'query'), ('E', 'query'), ('E', 'request')],
+        )
+        self.assertEqual(events[2]['args'], {'tenant': 'acme'})
+        self.assertNotEqual(events[0]['tid'], events[4]['tid'])
+        self.assertLessEqual(events[0]['ts'], events[1]['ts'])
+        thread_names = {
+            event['args']['name']
+            for event in trace['traceEvents']
+            if event['name'] == 'thread_name'
+        }
+        self.assertIn('worker', thread_names)
+        file = io.StringIO()
+        tracer.dump(file)
+        self.assertEqual(json.loads(file.getvalue())['traceEvents'], json.loads(tracer.dumps())['traceEvents'])
+
+    def test_tasks_and_limits(self) -> None:
+        tracer = ContextTracer(max_events=6)
+        storage = stackholm.ContextVarStorage(ContextVar[State]('stackholm.tests.tracing'))
+        context_class = storage.create_context_class(base=TracedContext, namespace={'tracer': tracer})
+
+        async def work() -> None:
+            with context_class():
+                await asyncio.sleep(0)
+
+        async def main() -> None:
+            await asyncio.gather(*(asyncio.create_task(work(), name=f'task-{index}') for index in range(4)))
+
+        asyncio.run(main())
+        events: List[Dict[str, Any]] = [event for event in tracer.export()['traceEvents'] if event['ph'] != 'M']
+        self.assertEqual(len(events), 6)
+        self.assertEqual(tracer.dropped_events, 2)
+        self.assertEqual(len({event['tid'] for event in events}), 4)
+        tracer.clear()
+        self.assertEqual(tracer.events, [])
+
+    def test_sequential_tasks_get_distinct_tracks(self) -> None:
+        tracer = ContextTracer()
+        storage = stackholm.ContextVarStorage(ContextVar[State]('stackholm.tests.tracing.sequential'))
+        context_class = storage.create_context_class(base=TracedContext, namespace={'tracer': tracer})
+
+        async def work() -> None:
+            with context_class():
+                pass
+
+        async def main() -> None:
+            for index in range(8):
+                await asyncio.create_task(work(), name=f'task-{index}')
+
+        asyncio.run(main())
+        trace = tracer.export()
+        tracks = {event['tid'] for event in trace['traceEvents'] if event['ph'] != 'M'}
+        self.assertEqual(len(tracks), 8)
+        thread_names = {
+            event['args']['name']
+            for event in trace['traceEvents']
+            if event['name'] == 'thread_name'
+        }
+        self.assertTrue({f'task-{index} ({threading.current_thread().name})' for index in range(8)} <= thread_names)
@@ -0,0 +1,147 @@
+import operator
+from typing import (
+    List,
+    cast,
+)
+import unittest
+
+import stackholm
+
+
+class TransactionalContextTestCase(unittest.TestCase):
+
+    def test_commit(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        state = cast(stackholm.OptimizedListState, storage.state)
+        context_class = storage.create_context_class()
+        transaction_class = storage.create_context_class(base=stackholm.TransactionalContext)
+
+        with context_class():
+            with context_class() as parent:
+                context_class.set_checkpoint_value('a', 1)
+
+                with transaction_class() as transaction:
+                    context_class.set_checkpoint_value('a', 2)
+                    context_class.set_checkpoint_value('b', 3)
+                    self.assertIs(context_class.get_nearest_checkpoint('b'), transaction)
+                    self.assertEqual(context_class.get_checkpoint_value('a'), 2)
+
+                self.assertEqual(parent.checkpoint_data, {'a': 2, 'b': 3})
+                self.assertEqual(transaction.checkpoint_data, {})
+                self.assertIs(context_class.get_nearest_checkpoint('a'), parent)
+                self.assertIs(context_class.get_nearest_checkpoint('b'), parent)
+                self.assertEqual(state.checkpoint_indexes, {'a': [1], 'b': [1]})
+
+                context_class.pop_checkpoint_value('b')
+                self.assertIsNone(context_class.get_checkpoint_value('b'))
+
+            self.assertEqual(state.checkpoint_indexes, {})
+            self.assertEqual(state.checkpoint_optimization_mapping, {})
+
+    def test_rollback(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        state = cast(stackholm.OptimizedListState, storage.state)
+        context_class = storage.create_context_class()
+        transaction_class = storage.create_context_class(base=stackholm.TransactionalContext)
+
+        with context_class() as parent:
+            context_class.set_checkpoint_value('a', 1)
+
+            with self.assertRaises(ValueError):
+                with transaction_class():
+                    context_class.set_checkpoint_value('a', 2)
+                    context_class.set_checkpoint_value('b', 3)
+                    raise ValueError()
+
+            self.assertEqual(parent.checkpoint_data, {'a': 1})
+            self.assertEqual(context_class.get_checkpoint_value('a'), 1)
+            self.assertIsNone(context_class.get_checkpoint_value('b'))
+            self.assertEqual(state.checkpoint_indexes, {'a': [0]})
+
+    def test_commit_without_parent(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        transaction_class = storage.create_context_class(base=stackholm.TransactionalContext)
+
+        with transaction_class():
+            transaction_class.set_checkpoint_value('a', 1)
+
+        self.assertIsNone(transaction_class.get_current())
+        self.assertIsNone(transaction_class.get_checkpoint_value('a'))
+
+    def test_generic_merge_context(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        state = cast(stackholm.OptimizedListState, storage.state)
+        context_class = storage.create_context_class()
+
+        with context_class() as parent:
+            context_class.set_checkpoint_value('a', 1)
+            child = context_class().activate()
+            context_class.set_checkpoint_value('a', 2)
+            context_class.set_checkpoint_value('b', 3)
+            stackholm.State.merge_context(state, child.index, ('a', 'b'), parent.index, ('a',))
+            self.assertIs(context_class.get_current(), parent)
+            self.assertEqual(state.checkpoint_indexes, {'a': [0], 'b': [0]})
+            self.assertEqual(state.context_sequence, 0)
+
+    def test_commit_keeps_expirations(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        transaction_class = storage.create_context_class(base=stackholm.TransactionalContext)
+
+        with context_class() as parent:
+            context_class.set_checkpoint_value('a', 1, ttl=60)
+            context_class.set_checkpoint_value('b', 1, ttl=60)
+            with transaction_class():
+                context_class.set_checkpoint_value('a', 2)
+                context_class.set_checkpoint_value('c', 3, ttl=30)
+            expirations = parent._checkpoint_expirations
+            self.assertIsNotNone(expirations)
+            self.assertEqual(sorted(cast(dict, expirations)), ['b', 'c'])
+
+    def test_commit_keeps_merged_resources_open(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        transaction_class = storage.create_context_class(base=stackholm.TransactionalContext)
+        closed: List[object] = []
+        events: List[str] = []
+
+        with context_class():
+            with transaction_class() as transaction:
+                connection = context_class.get_or_create_resource('connection', object, closed.append)
+                transaction.add_deactivation_callback(lambda: events.append('committed'))
+            self.assertEqual(events, ['committed'])
+            self.assertEqual(closed, [])
+            self.assertIs(context_class.get_or_create_resource('connection', object), connection)
+        self.assertEqual(closed, [connection])
+
+        with context_class():
+            with self.assertRaises(ValueError):
+                with transaction_class():
+                    session = context_class.get_or_create_resource('session', object, closed.append)
+                    raise ValueError()
+            self.assertEqual(closed, [connection, session])
+            self.assertIsNot(context_class.get_or_create_resource('session', object), session)
+
+    def test_commit_recomputes_aggregates(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        transaction_class = storage.create_context_class(base=stackholm.TransactionalContext)
+        budget = stackholm.AggregateKey('budget', operator.add)
+
+        with context_class():
+            budget.set(context_class, 100)
+            with context_class():
+                budget.set(context_class, 10)
+                self.assertEqual(budget.get(context_class), 110)
+                with transaction_class():
+                    budget.set(context_class, 5)
+                    self.assertEqual(budget.get(context_class), 115)
+                self.assertEqual(context_class.get_checkpoint_value('budget'), 5)
+                self.assertEqual(budget.get(context_class), 105)
+                budget.set(context_class, 1)
+                self.assertEqual(budget.get(context_class), 101)
+                with transaction_class():
+                    with transaction_class():
+                        budget.set(context_class, 2)
+                self.assertEqual(budget.get(context_class), 102)
+            self.assertEqual(budget.get(context_class), 100)
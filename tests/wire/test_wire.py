@@ -0,0 +1,126 @@
+from typing import (
+    Any,
+    Dict,
+    List,
+    cast,
+)
+import unittest
+
+import stackholm
+from stackholm import wire
+
+
+class LoopbackTransport:
+
+    def __init__(self) -> None:
+        self.headers: Dict[str, str] = {}
+
+    def send(
+        self,
+        name: str,
+        value: str,
+    ) -> None:
+        self.headers[name] = value
+
+    def receive(
+        self,
+        name: str,
+    ) -> str:
+        return self.headers[name]
+
+
+class WireTestCase(unittest.TestCase):
+
+    def test_encode_decode_values(self) -> None:
+        values = {
+            'none': None,
+            'true': True,
+            'false': False,
+            'int': -1234567890123,
+            'float': 1.5,
+            'str': 'tenant-ü',
+            'bytes': b'\x00\x01',
+            'json': {'flags': [1, 2, 3]},
+        }
+        data = wire.encode_checkpoint_values(values)
+        decoded = wire.decode_checkpoint_values(data)
+        self.assertEqual(list(decoded.keys()), list(values.keys()))
+        self.assertEqual(dict(decoded.items()), values)
+
+    def test_lazy_decoding(self) -> None:
+        decoded = wire.decode_checkpoint_values(wire.encode_checkpoint_values({'a': 'x', 'b': [1]}))
+        self.assertFalse(decoded.is_decoded('a'))
+        self.assertEqual(decoded.get('a'), 'x')
+        self.assertTrue(decoded.is_decoded('a'))
+        self.assertFalse(decoded.is_decoded('b'))
+
+    def test_loopback_propagation(self) -> None:
+        sender_storage = stackholm.OptimizedListStorage()
+        sender_context_class = sender_storage.create_context_class()
+        receiver_storage = stackholm.OptimizedListStorage()
+        receiver_context_class = receiver_storage.create_context_class()
+        transport = LoopbackTransport()
+
+        with sender_context_class():
+            sender_context_class.set_checkpoint_value('tenant', 'acme')
+            sender_context_class.set_checkpoint_value('private', 'secret')
+            with sender_context_class():
+                sender_context_class.set_checkpoint_value('request_id', 42)
+                header = wire.encode_context_header(sender_context_class, ('tenant', 'request_id', 'missing'))
+                transport.send('x-stackholm', header)
+
+        context = wire.restore_context_from_header(receiver_context_class, transport.receive('x-stackholm'))
+        self.assertIsNone(receiver_context_class.get_current())
+        with context:
+            self.assertEqual(receiver_context_class.get_checkpoint_value('tenant'), 'acme')
+            self.assertEqual(receiver_context_class.get_checkpoint_value('request_id'), 42)
+            self.assertIsNone(receiver_context_class.get_checkpoint_value('private'))
+            self.assertIsNone(receiver_context_class.get_checkpoint_value('missing'))
+
+    def test_reencode_undecoded_values(self) -> None:
+        storage = stackholm.OptimizedListStorage()
+        context_class = storage.create_context_class()
+        data = wire.encode_checkpoint_values({'a': {'b': 1}, 'c': 'd'})
+
+        with wire.restore_context(context_class, data) as context:
+            self.assertEqual(wire.encode_context(context_class, ('a', 'c')), data)
+            self.assertFalse(cast(wire.LazyCheckpointData, context.checkpoint_data).is_decoded('a'))
+
+    def test_malformed_data(self) -> None:
+        with self.assertRaises(stackholm.WireFormatError):
+            wire.decode_checkpoint_values(b'')
+        with self.assertRaises(stackholm.WireFormatError):
+            wire.decode_checkpoint_values(bytes((wire.WIRE_FORMAT_VERSION, 5, 0x61)))
+
+    def test_mapping_protocol_decodes(self) -> None:
+        values = {'a': 'x', 'b': [1, 2], 'c': 3}
+        data = wire.encode_checkpoint_values(values)
+        self.assertEqual(dict(wire.decode_checkpoint_values(data)), values)
+        self.assertEqual({**wire.decode_checkpoint_values(data)}, values)
+        self.assertEqual(dict(wire.decode_checkpoint_values(data).copy()), values)
+        decoded = wire.decode_checkpoint_values(data)
+        self.assertEqual(list(decoded.values()), list(values.values()))
+        self.assertEqual(len(decoded.items()), 3)
+        self.assertIn(('c', 3), decoded.items())
+        merged = {'z': 0}
+        merged.update(wire.decode_checkpoint_values(data))
+        self.assertEqual(merged, {'z': 0, **values})
+
+    def test_malformed_values(self) -> None:
+        version = wire.WIRE_FORMAT_VERSION
+        for tag, payload in ((wire.TAG_STR, 0xff), (wire.TAG_JSON, 0x7b), (wire.TAG_FLOAT, 0)):
+            decoded = wire.decode_checkpoint_values(bytes((version, 1, 0x61, tag, 1, payload)))
+            with self.assertRaises(stackholm.WireFormatError):
+                decoded['a']
+        with self.assertRaises(stackholm.WireFormatError):
+            wire.decode_checkpoint_values(bytes((version, 1, 0xff, wire.TAG_NONE, 0)))
+
+    def test_invalid_header_and_unserializable_values(self) -> None:
+        with self.assertRaises(stackholm.WireFormatError):
+            wire.decode_header('ğ')
+        with self.assertRaises(stackholm.WireFormatError):
+            wire.encode_checkpoint_values({'a': object()})
+        circular: List[Any] = []
+        circular.append(circular)
+        with self.assertRaises(stackholm.WireFormatError):
+            wire.encode_checkpoint_values({'a': circular})